@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Time building variants of a module that share a common base, by adding
+every snippet again for each variant or by forking the base module.
+
+Usage: python3 benchmarks/bench_fork.py [variants]
+"""
+import sys
+import time
+
+from context import mage2gen
+from mage2gen.snippet import add_cache
+from mage2gen.snippets import ModelSnippet, EavEntitySnippet, SystemSnippet
+
+def build_base():
+	module = mage2gen.Module(package='Bench', name='Fork')
+	model = ModelSnippet(module)
+	for name in ('post', 'comment', 'author', 'category', 'tag'):
+		model.add(model_name=name, field_name='title', web_api=True)
+	EavEntitySnippet(module).add(entity_name='brand', adminhtml_grid=True, adminhtml_form=True, web_api=True)
+	system = SystemSnippet(module)
+	for field in ('enabled', 'title', 'limit'):
+		system.add(tab='bench', section='bench', group='general', field=field)
+	return module
+
+def add_variant(module, index):
+	SystemSnippet(module).add(tab='bench', section='bench', group='variant', field='field{}'.format(index))
+
+def rebuild(count):
+	for index in range(count):
+		add_variant(build_base(), index)
+
+def fork(count):
+	base = build_base()
+	for index in range(count):
+		add_variant(base.fork(), index)
+
+def bench(name, function, count):
+	start = time.perf_counter()
+	function(count)
+	print('{:<10} {:>6} variants: {:.4f}s'.format(name, count, time.perf_counter() - start))
+
+def main(count=100):
+	bench('rebuild', rebuild, count)
+	add_cache.max_entries = 256
+	bench('memoized', rebuild, count)
+	add_cache.max_entries = 0
+	bench('fork', fork, count)
+
+if __name__ == '__main__':
+	main(*[int(arg) for arg in sys.argv[1:2]])
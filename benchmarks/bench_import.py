@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Time `import mage2gen` in a fresh interpreter, with and without loading all
+snippets, so regressions in startup time get noticed. With max_ms the script
+exits with an error when the median import time is above it.
+
+Usage: python3 benchmarks/bench_import.py [runs] [max_ms]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+SCRIPTS = [
+	('import', 'import mage2gen'),
+	('one snippet', 'from mage2gen.snippets import ControllerSnippet'),
+	('all snippets', 'import mage2gen; mage2gen.Snippet.snippets()'),
+]
+
+def measure(code):
+	script = (
+		'import sys, time\n'
+		'sys.path.insert(0, {!r})\n'
+		'start = time.perf_counter()\n'
+		'{}\n'
+		'print(time.perf_counter() - start)\n'
+	).format(ROOT, code)
+	return float(subprocess.check_output([sys.executable, '-c', script])) * 1000
+
+def main(runs=10, max_ms=None):
+	results = {}
+	for name, code in SCRIPTS:
+		times = [measure(code) for run in range(runs)]
+		results[name] = statistics.median(times)
+		print('{:<14} median {:7.1f} ms  min {:7.1f} ms'.format(name, results[name], min(times)))
+
+	if max_ms is not None and results['import'] > max_ms:
+		print('import mage2gen takes more than {} ms'.format(max_ms))
+		sys.exit(1)
+
+if __name__ == '__main__':
+	main(*[int(arg) for arg in sys.argv[1:2]], *[float(arg) for arg in sys.argv[2:3]])
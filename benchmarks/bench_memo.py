@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Time building modules from the same snippet calls with and without the
+snippet add cache, as enabled by --memoize of the batch and serve commands.
+
+Usage: python3 benchmarks/bench_memo.py [count]
+"""
+import sys
+import time
+
+from context import mage2gen
+from mage2gen.snippet import add_cache
+from mage2gen.snippets import ModelSnippet, EavEntitySnippet, SystemSnippet, ControllerSnippet
+
+def build_module():
+	module = mage2gen.Module(package='Bench', name='Memo')
+	ModelSnippet(module).add(model_name='post', field_name='title', web_api=True)
+	EavEntitySnippet(module).add(entity_name='brand', adminhtml_grid=True, adminhtml_form=True, web_api=True)
+	SystemSnippet(module).add(tab='bench', section='bench', group='general', field='enabled')
+	ControllerSnippet(module).add(frontname='bench', section='index', action='index')
+	return module
+
+def bench(name, count):
+	start = time.perf_counter()
+	for index in range(count):
+		build_module()
+	print('{:<10} {:>6} modules: {:.4f}s'.format(name, count, time.perf_counter() - start))
+
+def main(count=200):
+	bench('no cache', count)
+	add_cache.max_entries = 256
+	bench('cache', count)
+	add_cache.max_entries = 0
+	print('hits {} misses {}'.format(add_cache.hits, add_cache.misses))
+
+if __name__ == '__main__':
+	main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Measure the peak memory of building a module with many ModelSnippet and
+EavEntitySnippet models with tracemalloc, and the number of XML nodes
+and PHP methods it holds. The snippet add cache is disabled so only the
+module itself is measured.
+
+Usage: python3 benchmarks/bench_memory.py [models]
+"""
+import sys
+import time
+import tracemalloc
+
+from context import mage2gen
+from mage2gen.snippets import ModelSnippet, EavEntitySnippet
+
+def build_module(models):
+	module = mage2gen.Module(package='Bench', name='Memory')
+	model = ModelSnippet(module)
+	entity = EavEntitySnippet(module)
+	for index in range(models):
+		model.add(model_name='model{}'.format(index), field_name='title', web_api=True)
+		model.add(model_name='model{}'.format(index), field_name='code')
+		if index % 10 == 0:
+			entity.add(entity_name='entity{}'.format(index), adminhtml_grid=True, adminhtml_form=True, web_api=True)
+	return module
+
+def count_nodes(node):
+	return 1 + sum(count_nodes(child) for child in node.nodes)
+
+def main(models=100):
+	tracemalloc.start()
+	start = time.perf_counter()
+	module = build_module(models)
+	seconds = time.perf_counter() - start
+	current, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	nodes = sum(count_nodes(node) for node in module._xmls.values())
+	methods = sum(len(phpclass.methods) for phpclass in module._classes.values())
+	print('{} models: {} xml nodes, {} methods'.format(models, nodes, methods))
+	print('current {:.1f} MiB, peak {:.1f} MiB, {:.2f}s'.format(current / 2 ** 20, peak / 2 ** 20, seconds))
+
+if __name__ == '__main__':
+	main(*[int(arg) for arg in sys.argv[1:2]])
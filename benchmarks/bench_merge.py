@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Time merging many snippets into a single file or class, as done for
+etc/di.xml by generated plugin and preference sets.
+
+Usage: python3 benchmarks/bench_merge.py [count]
+"""
+import sys
+import time
+
+from context import mage2gen
+
+def merge_di_xml(count):
+	module = mage2gen.Module(package='Bench', name='Merge')
+	for index in range(count):
+		module.add_xml('etc/di.xml', mage2gen.Xmlnode('config', attributes={
+			'xsi:noNamespaceSchemaLocation': 'urn:magento:framework:ObjectManager/etc/config.xsd'
+		}, nodes=[
+			mage2gen.Xmlnode('type', attributes={'name': 'Magento\\Catalog\\Model\\Product{}'.format(index // 2)}, nodes=[
+				mage2gen.Xmlnode('plugin', attributes={
+					'name': 'Bench_Merge_Plugin_{}'.format(index),
+					'type': 'Bench\\Merge\\Plugin\\Product{}'.format(index),
+					'sortOrder': 10,
+					'disabled': 'false',
+				}),
+			]),
+			mage2gen.Xmlnode('preference', attributes={
+				'for': 'Magento\\Catalog\\Api\\Data\\Product{}Interface'.format(index),
+				'type': 'Bench\\Merge\\Model\\Product{}'.format(index),
+			}),
+		]))
+	return module
+
+def merge_methods(count):
+	php_class = mage2gen.Phpclass('Bench\\Merge\\Model\\Data')
+	for index in range(count):
+		other = mage2gen.Phpclass('Bench\\Merge\\Model\\Data')
+		other.add_method(mage2gen.Phpmethod('getField{}'.format(index), body='return $this->_get(self::FIELD{});'.format(index)))
+		other.add_method(mage2gen.Phpmethod('__construct',
+			params=['\\Magento\\Framework\\Model\\Context $context{}'.format(index)],
+			body='$this->context{0} = $context{0};'.format(index)
+		))
+		php_class += other
+	return php_class
+
+def bench(name, function, count):
+	start = time.perf_counter()
+	function(count)
+	print('{:<10} {:>6} merges: {:.4f}s'.format(name, count, time.perf_counter() - start))
+
+def main(count=5000):
+	bench('di.xml', merge_di_xml, count)
+	bench('methods', merge_methods, count)
+
+if __name__ == '__main__':
+	main(*[int(arg) for arg in sys.argv[1:2]])
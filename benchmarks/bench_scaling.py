@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Grow synthetic modules (see stress_spec.py) geometrically and record time
+and peak memory at every size. A power law t = c * n^k is fitted to the
+timings of every phase and merge method, exponents above the threshold
+flag superlinear behavior such as quadratic merging in Xmlnode.add_nodes,
+Phpclass.add_method or Readme.__add__.
+
+Usage:
+	python3 benchmarks/bench_scaling.py
+	python3 benchmarks/bench_scaling.py --kind plugins --start 40 --max 5000 -o scaling.json
+"""
+import argparse
+import json
+import math
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from context import mage2gen
+from mage2gen.sink import MemorySink
+from stress_spec import KINDS, synthetic_spec
+
+# Largest snippet count per kind, 500 models are 1000 model snippet calls
+MAX_COUNTS = OrderedDict([
+	('models', 1000),
+	('plugins', 5000),
+	('system', 2000),
+	('mixed', 5000),
+])
+
+# Timings below this are mostly noise and are left out of the fit
+MIN_SECONDS = 0.01
+
+# Fewest sizes with timings of at least MIN_SECONDS a fit is made of
+MIN_POINTS = 3
+
+def geometric_sizes(start, maximum, factor=2):
+	sizes = []
+	size = start
+	while size < maximum:
+		sizes.append(size)
+		size = int(size * factor)
+	sizes.append(maximum)
+	return sizes
+
+def run_size(kind, count, memory=True, repeat=3):
+	"""
+	Time and optionally peak memory of building and rendering a synthetic
+	module of count snippets, every timing is the best of repeat runs.
+	"""
+	spec = synthetic_spec(kind, count)
+	timings = OrderedDict()
+	for run in range(max(1, repeat)):
+		for name, seconds in time_spec(spec).items():
+			timings[name] = min(timings.get(name, seconds), seconds)
+
+	result = OrderedDict([('count', count), ('timings', timings)])
+	if memory:
+		tracemalloc.start()
+		module = mage2gen.Module.load_module(spec)
+		module.generate_to(MemorySink())
+		result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+	return result
+
+def time_spec(spec):
+	"""Total, phase and merge method timings of one profiled run of spec"""
+	profile = mage2gen.instrument.Profile()
+
+	start = time.perf_counter()
+	module = mage2gen.Module.load_module(spec, profile=profile)
+	with module.profile(profile):
+		module.generate_to(MemorySink())
+	seconds = time.perf_counter() - start
+
+	timings = OrderedDict([('total', seconds)])
+	for phase, phase_seconds in profile.phases().items():
+		timings['phase:' + phase] = phase_seconds
+	for stat in profile.stats.values():
+		if stat.category == 'merge':
+			timings['merge:' + stat.name] = stat.self_seconds
+	return timings
+
+def fit_power_law(points):
+	"""Exponent k and factor c of t = c * n^k by least squares on log n and log t"""
+	points = [(math.log(count), math.log(seconds)) for count, seconds in points if count > 0 and seconds > 0]
+	if len(points) < 2:
+		return None, None
+	mean_x = sum(x for x, y in points) / len(points)
+	mean_y = sum(y for x, y in points) / len(points)
+	variance = sum((x - mean_x) ** 2 for x, y in points)
+	if not variance:
+		return None, None
+	exponent = sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+	return exponent, math.exp(mean_y - exponent * mean_x)
+
+def complexity(exponent):
+	if exponent is None:
+		return '?'
+	if exponent < 1.25:
+		return 'O(n)'
+	if exponent < 1.75:
+		return 'O(n^{:.1f})'.format(exponent)
+	return 'O(n^2) or worse'
+
+def fit_results(results, threshold=1.5):
+	"""
+	Fit every timing of the results of one kind, the smallest size is left
+	out because fixed costs dominate it and so are timings below MIN_SECONDS.
+	Timings with less than MIN_POINTS sizes left are not fitted. Gives a dict
+	of timing name to exponent, complexity and if it is flagged as superlinear.
+	"""
+	points = results[1:] if len(results) > 2 else results
+	fits = OrderedDict()
+	for name in results[-1]['timings']:
+		series = [(result['count'], result['timings'].get(name, 0)) for result in points]
+		series = [(count, seconds) for count, seconds in series if seconds >= MIN_SECONDS]
+		exponent, factor = fit_power_law(series) if len(series) >= MIN_POINTS else (None, None)
+		fits[name] = OrderedDict([
+			('exponent', exponent),
+			('complexity', complexity(exponent)),
+			('flagged', exponent is not None and exponent > threshold),
+		])
+	if all('peak_memory' in result for result in points):
+		exponent, factor = fit_power_law([(result['count'], result['peak_memory']) for result in points])
+		fits['peak_memory'] = OrderedDict([('exponent', exponent), ('complexity', complexity(exponent)), ('flagged', False)])
+	return fits
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Scaling benchmark on synthetic modules')
+	parser.add_argument('-k', '--kind', action='append', choices=list(KINDS), help='Module kind, can be repeated, defaults to all')
+	parser.add_argument('--start', type=int, default=20, help='Smallest snippet count')
+	parser.add_argument('--max', type=int, help='Largest snippet count, defaults to the count of the kind')
+	parser.add_argument('--factor', type=float, default=2)
+	parser.add_argument('-r', '--repeat', type=int, default=3, help='Runs per size, the best timings are used')
+	parser.add_argument('-t', '--threshold', type=float, default=1.5, help='Fitted exponent flagged as superlinear')
+	parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc run of every size')
+	parser.add_argument('-o', '--output', help='Write the results as JSON to this file')
+	args = parser.parse_args(argv)
+
+	report = OrderedDict()
+	flagged = []
+	for kind in args.kind or list(KINDS):
+		results = []
+		for count in geometric_sizes(args.start, args.max or MAX_COUNTS[kind], args.factor):
+			result = run_size(kind, count, memory=not args.no_memory, repeat=args.repeat)
+			results.append(result)
+			print('{:<8} {:>6} snippets {:8.3f}s {:>10}'.format(
+				kind, count, result['timings']['total'],
+				'{:.1f} MiB'.format(result['peak_memory'] / 2 ** 20) if 'peak_memory' in result else ''
+			))
+
+		fits = fit_results(results, args.threshold)
+		for name, fit in fits.items():
+			print('    {:<32} {:>6} {}{}'.format(
+				name, '-' if fit['exponent'] is None else '{:.2f}'.format(fit['exponent']), fit['complexity'],
+				'  SUPERLINEAR' if fit['flagged'] else ''
+			))
+			if fit['flagged']:
+				flagged.append('{} {}'.format(kind, name))
+		report[kind] = OrderedDict([('results', results), ('fits', fits)])
+
+	if args.output:
+		with open(args.output, 'w') as output_file:
+			json.dump(OrderedDict([('version', 1), ('threshold', args.threshold), ('kinds', report)]), output_file, indent=4)
+	return 1 if flagged else 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Benchmark every registered snippet with small, medium and large specs and
+the core renderers in isolation. Snippet runs are split in the add, merge,
+render and write phases of mage2gen.instrument, every value is the best of
+the repeated runs. Results are written as JSON and can be compared with an
+earlier run to flag regressions.
+
+Usage:
+	python3 benchmarks/bench_snippets.py -o results.json
+	python3 benchmarks/bench_snippets.py -o new.json --compare results.json
+"""
+import argparse
+import inspect
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+import traceback
+from collections import OrderedDict
+
+from context import mage2gen
+from mage2gen import Snippet, SnippetParam
+from mage2gen.snippets import ModelSnippet, EavEntitySnippet
+from stress_spec import name_suffix
+
+RESULTS_VERSION = 1
+
+# Number of add calls per spec size
+SIZES = OrderedDict([
+	('small', 1),
+	('medium', 5),
+	('large', 25),
+])
+
+PHASES = ('add', 'merge', 'render', 'write')
+
+# Regressions smaller than this are timer noise
+MIN_DIFFERENCE = 0.001
+
+# Params the generated values do not cover, some snippets read params that
+# are not active for the other params or need a full class name
+PARAM_OVERRIDES = {
+	'SystemSnippet': {'source_model_options': 'one,two,three'},
+	'CategoryAttributeSnippet': {'source_model_options': 'one,two,three'},
+	'CustomerAttributeSnippet': {'source_model_options': 'one,two,three'},
+	'GraphQlEndpointSnippet': {'data_provider_dependency': 'Bench\\Snippets\\Model\\DataProvider'},
+}
+
+def value_candidates(index):
+	suffix = name_suffix(index)
+	return [
+		'bench' + suffix,
+		'Bench' + suffix.title(),
+		'bench_' + suffix,
+		str(10 + index),
+		'Magento\\Catalog\\Model\\Product{}'.format(suffix.title()),
+		'*/5 * * * *',
+	]
+
+def choice_value(choice):
+	return choice[0] if isinstance(choice, (list, tuple)) else choice
+
+def spec_params(snippet_class, index, size):
+	"""
+	Params for the index-th add of a spec, gives None when no valid value is
+	found for a required param. Small specs use the defaults, larger specs
+	enable yes/no params and cycle through the choices.
+	"""
+	# add() needs its positional params even when their depend does not match
+	arguments = inspect.signature(snippet_class.add).parameters.values()
+	positional = {argument.name for argument in arguments if argument.default is inspect.Parameter.empty}
+
+	params = OrderedDict()
+	for param in snippet_class.params():
+		if not isinstance(param, SnippetParam) or not (param.is_active(params) or param.name in positional):
+			continue
+
+		if param.choices:
+			choices = [choice_value(choice) for choice in param.choices]
+			value = choices[index % len(choices)] if size != 'small' else (param.default if param.default is not None else choices[0])
+			params[param.name] = [value] if param.multiple_choices and not isinstance(value, list) else value
+		elif param.yes_no:
+			params[param.name] = True if size != 'small' else bool(param.default)
+		elif param.default is not None and not param.regex_validator:
+			params[param.name] = param.default
+		else:
+			candidates = value_candidates(index)
+			if param.default is not None and size == 'small':
+				candidates.insert(0, param.default)
+			for value in candidates:
+				if param.validation_error(value) is None:
+					params[param.name] = value
+					break
+			else:
+				if param.required:
+					return None
+	params.update(PARAM_OVERRIDES.get(snippet_class.__name__, {}))
+	return params
+
+def build_specs(snippet_class, size):
+	specs = [spec_params(snippet_class, index, size) for index in range(SIZES[size])]
+	return None if None in specs else specs
+
+def run_spec(snippet_class, specs, path):
+	"""Add the specs and save the module once, gives the phase and total times, file count and bytes"""
+	module = mage2gen.Module(package='Bench', name='Snippets')
+	start = time.perf_counter()
+	with module.profile() as profile:
+		snippet = snippet_class(module)
+		for params in specs:
+			snippet.add(**params)
+		module.generate_module(path)
+	total = time.perf_counter() - start
+
+	result = OrderedDict(profile.phases())
+	result['total'] = total
+	writes = [stat for stat in profile.stats.values() if stat.category == 'write']
+	result['files'] = len(writes)
+	result['bytes'] = sum(stat.bytes for stat in writes)
+	return result
+
+def bench_snippet(snippet_class, size, repeat):
+	specs = build_specs(snippet_class, size)
+	if specs is None:
+		raise Exception('No valid params for {}'.format(snippet_class.__name__))
+
+	best = None
+	for run in range(repeat):
+		path = tempfile.mkdtemp()
+		try:
+			result = run_spec(snippet_class, specs, path)
+		finally:
+			shutil.rmtree(path)
+		if best is None:
+			best = result
+		else:
+			for key in PHASES + ('total',):
+				best[key] = min(best[key], result[key])
+	return best
+
+def time_call(function, repeat):
+	"""Best time of a single call, calls are looped for at least 0.05 seconds per measurement"""
+	timer = timeit.Timer(function)
+	number, _ = timer.autorange()
+	number = max(1, number // 4)
+	return min(timer.repeat(repeat=repeat, number=number)) / number
+
+def count_nodes(node):
+	return 1 + sum(count_nodes(child) for child in node.nodes)
+
+def bench_core(repeat):
+	"""Xmlnode.generate and Phpclass.generate on the largest XML file and class of a large module"""
+	module = mage2gen.Module(package='Bench', name='Core')
+	model = ModelSnippet(module)
+	for index in range(10):
+		for field in ('title', 'code', 'sort'):
+			model.add(model_name='model' + name_suffix(index), field_name=field, web_api=True)
+	EavEntitySnippet(module).add(entity_name='brand', adminhtml_grid=True, adminhtml_form=True, web_api=True)
+
+	xml_file, node = max(module._xmls.items(), key=lambda item: count_nodes(item[1]))
+	class_name, phpclass = max(module._classes.items(), key=lambda item: len(item[1].generate()))
+
+	return OrderedDict([
+		('Xmlnode.generate', OrderedDict([
+			('seconds', time_call(node.generate, repeat)),
+			('file', xml_file),
+			('nodes', count_nodes(node)),
+		])),
+		('Phpclass.generate', OrderedDict([
+			('seconds', time_call(phpclass.generate, repeat)),
+			('file', class_name),
+			('methods', len(phpclass.methods)),
+		])),
+	])
+
+def run(snippet_names=None, sizes=None, repeat=3, verbose=True):
+	sizes = sizes or list(SIZES)
+	results = OrderedDict([
+		('version', RESULTS_VERSION),
+		('mage2gen', getattr(mage2gen, '__version__', None)),
+		('python', platform.python_version()),
+		('platform', platform.platform()),
+		('repeat', repeat),
+		('snippets', OrderedDict()),
+		('errors', OrderedDict()),
+		('core', None),
+	])
+
+	for snippet_class in Snippet.snippets():
+		if snippet_names and snippet_class.__name__ not in snippet_names:
+			continue
+		for size in sizes:
+			key = '{}/{}'.format(snippet_class.__name__, size)
+			try:
+				result = bench_snippet(snippet_class, size, repeat)
+			except Exception as e:
+				results['errors'][key] = ''.join(traceback.format_exception_only(type(e), e)).strip()
+				if verbose:
+					print('{:<48} ERROR {}'.format(key, results['errors'][key]), file=sys.stderr)
+				break
+			results['snippets'][key] = result
+			if verbose:
+				print('{:<48} {:8.4f}s {:4} files'.format(key, result['total'], result['files']))
+	results['core'] = bench_core(repeat)
+	if verbose:
+		for name, result in results['core'].items():
+			print('{:<48} {:8.6f}s'.format(name, result['seconds']))
+	return results
+
+def compare(results, baseline, threshold=0.1):
+	"""
+	List of (key, baseline seconds, seconds, ratio) for every benchmark in both
+	results that is more than threshold slower than the baseline. Snippet runs
+	are also only flagged when they are MIN_DIFFERENCE seconds slower.
+	"""
+	timings = [
+		(key, baseline['snippets'][key]['total'], result['total'], MIN_DIFFERENCE)
+		for key, result in results['snippets'].items() if key in baseline.get('snippets', {})
+	]
+	timings += [
+		(key, baseline['core'][key]['seconds'], result['seconds'], 0)
+		for key, result in (results.get('core') or {}).items() if key in (baseline.get('core') or {})
+	]
+
+	regressions = []
+	for key, old, new, min_difference in timings:
+		ratio = new / old if old else float('inf')
+		if ratio > 1 + threshold and new - old > min_difference:
+			regressions.append((key, old, new, ratio))
+	return regressions
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Benchmark all snippets and the core renderers')
+	parser.add_argument('-o', '--output', help='Write the results as JSON to this file')
+	parser.add_argument('-c', '--compare', help='Results of an earlier run, regressions give exit status 1')
+	parser.add_argument('-t', '--threshold', type=float, default=0.1, help='Slowdown flagged as regression, 0.1 is 10%%')
+	parser.add_argument('-r', '--repeat', type=int, default=3)
+	parser.add_argument('-s', '--snippet', action='append', help='Only benchmark this snippet class, can be repeated')
+	parser.add_argument('--size', action='append', choices=list(SIZES), help='Only benchmark this spec size, can be repeated')
+	args = parser.parse_args(argv)
+
+	results = run(args.snippet, args.size, args.repeat)
+	if args.output:
+		with open(args.output, 'w') as output_file:
+			json.dump(results, output_file, indent=4)
+
+	if not args.compare:
+		return 0
+
+	with open(args.compare) as baseline_file:
+		baseline = json.load(baseline_file)
+	regressions = compare(results, baseline, args.threshold)
+	for key, old, new, ratio in regressions:
+		print('REGRESSION {:<37} {:8.4f}s -> {:8.4f}s ({:+.0%})'.format(key, old, new, ratio - 1))
+	if not regressions:
+		print('No regressions against {}'.format(args.compare))
+	return 1 if regressions else 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Compare saving the large ui_component and db_schema files of a ModelSnippet
+module with writelines() on the fully rendered string against the chunked
+save(), measuring time and peak traced memory.
+
+Usage: python3 benchmarks/bench_write.py [models] [fields]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from context import mage2gen
+from mage2gen.snippets import ModelSnippet
+
+def build_module(models, fields):
+	module = mage2gen.Module(package='Bench', name='Write')
+	snippet = ModelSnippet(module)
+	for index in range(models):
+		for field in range(fields):
+			snippet.add(model_name='model{}'.format(index), field_name='field{}'.format(field), web_api=True)
+	return module
+
+def legacy_save(output_file, path):
+	with open(path, 'w+', encoding='utf-8') as legacy_file:
+		legacy_file.writelines(output_file.generate())
+
+def chunked_save(output_file, path):
+	output_file.save(path)
+
+def bench(name, save, files, path):
+	tracemalloc.start()
+	start = time.perf_counter()
+	for index, (file_name, output_file) in enumerate(files):
+		save(output_file, os.path.join(path, '{}.{}'.format(index, file_name.rsplit('.', 1)[-1])))
+	duration = time.perf_counter() - start
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	print('{:<8} {:.4f}s peak {:.1f} KiB'.format(name, duration, peak / 1024))
+
+def main(models=1, fields=1000):
+	module = build_module(models, fields)
+	files = [(path, node) for path, node in module._xmls.items() if 'ui_component' in path or 'db_schema' in path]
+	size = sum(len(node.generate()) for path, node in files)
+	print('{} files, {} characters'.format(len(files), size))
+
+	path = tempfile.mkdtemp()
+	try:
+		bench('legacy', legacy_save, files, path)
+		bench('chunked', chunked_save, files, path)
+	finally:
+		shutil.rmtree(path)
+
+if __name__ == '__main__':
+	main(*[int(arg) for arg in sys.argv[1:3]])
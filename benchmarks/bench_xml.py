@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Compare Xmlnode.generate with the previous ElementTree, tostring and minidom
+round trip on the XML files of a module with ModelSnippet and EavEntitySnippet
+UI components.
+
+Usage: python3 benchmarks/bench_xml.py [models] [repeat]
+"""
+import sys
+import timeit
+from xml.etree.ElementTree import Element, SubElement, tostring
+from xml.dom import minidom
+
+from context import mage2gen
+from mage2gen.snippets import ModelSnippet, EavEntitySnippet
+
+def legacy_generate(node, element=None):
+	if element is not None:
+		el = SubElement(element, node.node_name)
+	else:
+		el = Element(node.node_name)
+		if not node.xsd:
+			el.set('xmlns:xsi', "http://www.w3.org/2001/XMLSchema-instance")
+
+	if node.node_text:
+		el.text = node.node_text
+
+	for key, value in node.attributes.items():
+		el.set(str(key), str(value))
+
+	for child in node.nodes:
+		legacy_generate(child, el)
+
+	if element is None:
+		reparsed = minidom.parseString(tostring(el, 'utf-8'))
+		if node.xsd:
+			return reparsed.toprettyxml(indent="\t").split('\n', 1)[-1]
+		return reparsed.toprettyxml(indent="\t")
+
+def build_module(models):
+	module = mage2gen.Module(package='Bench', name='Xml')
+	model_snippet = ModelSnippet(module)
+	entity_snippet = EavEntitySnippet(module)
+	for index in range(models):
+		for field in range(5):
+			model_snippet.add(model_name='model{}'.format(index), field_name='field{}'.format(field), web_api=True)
+		entity_snippet.add(entity_name='entity{}'.format(index), adminhtml_grid=True, adminhtml_form=True, web_api=True)
+	return module
+
+def main(models=20, repeat=5):
+	module = build_module(models)
+	nodes = list(module._xmls.values())
+
+	for node in nodes:
+		assert node.generate() == legacy_generate(node), 'Output differs from legacy serializer'
+
+	size = sum(len(node.generate()) for node in nodes)
+	legacy = min(timeit.repeat(lambda: [legacy_generate(node) for node in nodes], number=1, repeat=repeat))
+	current = min(timeit.repeat(lambda: [node.generate() for node in nodes], number=1, repeat=repeat))
+
+	print('{} XML files, {} characters'.format(len(nodes), size))
+	print('legacy  : {:.4f}s'.format(legacy))
+	print('current : {:.4f}s'.format(current))
+	print('speedup : {:.1f}x'.format(legacy / current))
+
+if __name__ == '__main__':
+	main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Write synthetic module specs with thousands of snippets, for stress testing
+mage2gen and for saatva2gen batch. Every kind adds count snippets that merge
+into shared files the way large real modules do: models in one db_schema,
+plugins on a few hundred classes in one di.xml and system fields in a few
+system.xml groups.
+
+Usage: python3 benchmarks/stress_spec.py kind count [output]
+	kind is one of models, plugins, system or mixed
+"""
+import json
+import sys
+from collections import OrderedDict
+
+def name_suffix(index):
+	"""Letters for index, names must be unique per add but some snippet params do not allow digits"""
+	suffix = ''
+	while True:
+		suffix = chr(ord('a') + index % 26) + suffix
+		index = index // 26 - 1
+		if index < 0:
+			return suffix
+
+def model_calls(count):
+	for index in range(count):
+		yield 'model', OrderedDict([
+			('model_name', 'model' + name_suffix(index // 2)),
+			('field_name', 'field' + name_suffix(index % 2)),
+			('web_api', index % 4 == 0),
+		])
+
+def plugin_calls(count):
+	# Class names without namespace, PluginSnippet looks up the method params
+	# of namespaced Magento classes in a data file that is not always installed
+	for index in range(count):
+		yield 'plugin', OrderedDict([
+			('classname', 'Product{}'.format(name_suffix(index // 10).title())),
+			('methodname', 'get{}'.format(name_suffix(index % 10).title())),
+			('plugintype', ('before', 'after', 'around')[index % 3]),
+		])
+
+def system_calls(count):
+	for index in range(count):
+		yield 'system', OrderedDict([
+			('tab', 'stress'),
+			('section', 'section' + name_suffix(index // 500)),
+			('group', 'group' + name_suffix(index // 50)),
+			('field', 'field' + name_suffix(index)),
+		])
+
+def mixed_calls(count):
+	generators = [model_calls(count // 10), plugin_calls(count // 2), system_calls(count - count // 10 - count // 2)]
+	for calls in generators:
+		for call in calls:
+			yield call
+
+KINDS = OrderedDict([
+	('models', model_calls),
+	('plugins', plugin_calls),
+	('system', system_calls),
+	('mixed', mixed_calls),
+])
+
+def synthetic_spec(kind, count, package='Stress', name=None):
+	"""Module spec with count snippet calls of kind, see KINDS"""
+	snippets = [OrderedDict([('snippet', snippet), ('params', params)]) for snippet, params in KINDS[kind](count)]
+	return OrderedDict([
+		('package', package),
+		('name', name or '{}{}'.format(kind.title(), count)),
+		('description', 'Synthetic {} module with {} snippets'.format(kind, count)),
+		('snippets', snippets),
+	])
+
+def main(kind='mixed', count=1000, output=None):
+	spec = json.dumps(synthetic_spec(kind, int(count)), indent=4)
+	if output:
+		with open(output, 'w') as spec_file:
+			spec_file.write(spec)
+	else:
+		print(spec)
+
+if __name__ == '__main__':
+	main(*sys.argv[1:4])
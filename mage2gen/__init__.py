@@ -15,8 +15,10 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
-from .module import Module, Phpclass, Phpmethod, Xmlnode, StaticFile, GraphQlSchema, GraphQlObjectType, GraphQlObjectItem, Readme
-from .snippet import Snippet, SnippetParam
+__version__ = '2.3.3'
 
-# Load snippets
+from .module import Module, GenerateError, GenerateReport, Phpclass, Phpmethod, Xmlnode, StaticFile, GraphQlSchema, GraphQlObjectType, GraphQlObjectItem, Readme
+from .snippet import Snippet, SnippetParam, SnippetRegistry, snippet_registry
+
+# Snippet registry, snippet modules are imported on first use
 from . import snippets
\ No newline at end of file
@@ -0,0 +1,100 @@
+# A Magento 2 module generator library
+# Copyright (C) 2016 Maikel Martens
+#
+# This file is part of Mage2Gen.
+#
+# Mage2Gen is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+Generate many independent modules in parallel. A bulk manifest is a JSONL
+file with one module spec (see mage2gen.spec) per line, the modules are
+generated in a process pool and a BulkResult is given per spec.
+"""
+import json
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from .spec import SpecError, validate_spec, build_module
+
+BulkResult = namedtuple('BulkResult', ['index', 'module_name', 'seconds', 'error'])
+
+def load_manifest(path):
+	"""Module specs of a JSONL manifest, blank lines and lines starting with # are skipped"""
+	specs = []
+	errors = []
+	with open(path, encoding='utf-8') as manifest:
+		for line_number, line in enumerate(manifest, 1):
+			line = line.strip()
+			if not line or line.startswith('#'):
+				continue
+			try:
+				specs.append(json.loads(line))
+			except ValueError as e:
+				errors.append('{}:{}: {}'.format(path, line_number, e))
+	if errors:
+		raise SpecError(errors)
+	return specs
+
+def spec_module_name(spec):
+	if isinstance(spec, dict):
+		return '{}_{}'.format(spec.get('package'), spec.get('name'))
+	return str(spec)
+
+def generate_spec(index, spec, root_location, incremental=False):
+	"""Build and generate one module spec, used in the pool workers"""
+	start = time.perf_counter()
+	try:
+		build_module(spec).generate_module(root_location, incremental=incremental)
+		error = None
+	except Exception as e:
+		error = ''.join(traceback.format_exception_only(type(e), e)).strip()
+	return BulkResult(index, spec_module_name(spec), time.perf_counter() - start, error)
+
+def generate_bulk(specs, root_location, processes=None, incremental=False):
+	"""
+	Generate module specs into root_location with a pool of processes, None
+	uses one per CPU and 1 generates in this process. Gives a BulkResult
+	per spec in spec order, failed modules have an error message.
+
+	Invalid specs and specs for a module name used earlier in the list are
+	not generated, so two processes never write the same module.
+	"""
+	results = [None] * len(specs)
+	tasks = []
+	module_names = set()
+	for index, spec in enumerate(specs):
+		errors = validate_spec(spec)
+		module_name = spec_module_name(spec)
+		if not errors and module_name.lower() in module_names:
+			errors = ['module {} is already in the manifest'.format(module_name)]
+		if errors:
+			results[index] = BulkResult(index, module_name, 0.0, '\n'.join(errors))
+			continue
+		module_names.add(module_name.lower())
+		tasks.append((index, spec, root_location, incremental))
+
+	if processes == 1 or len(tasks) < 2:
+		for task in tasks:
+			results[task[0]] = generate_spec(*task)
+		return results
+
+	with ProcessPoolExecutor(max_workers=processes) as executor:
+		futures = [executor.submit(generate_spec, *task) for task in tasks]
+		for task, future in zip(tasks, futures):
+			try:
+				results[task[0]] = future.result()
+			except Exception as e:
+				results[task[0]] = BulkResult(task[0], spec_module_name(task[1]), 0.0, str(e) or type(e).__name__)
+	return results
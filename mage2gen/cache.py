@@ -0,0 +1,173 @@
+# A Magento 2 module generator library
+# Copyright (C) 2016 Maikel Martens
+#
+# This file is part of Mage2Gen.
+#
+# Mage2Gen is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+On disk cache of generated modules. Entries are keyed on a hash of the
+module spec, the mage2gen version and the contents of the package (code,
+templates and licenses), so a change to any of them gives new entries.
+On a hit the files are written from the cache without running snippets.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+
+from . import __version__
+from .module import Module, SPEC_VERSION
+from .sink import MemorySink, ZipSink
+from .spec import build_module
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_package_digest = None
+
+def package_digest():
+	"""Hash of the python files, templates and licenses of mage2gen, computed once"""
+	global _package_digest
+	if _package_digest is None:
+		digest = hashlib.sha256()
+		for root, dirs, file_names in os.walk(PACKAGE_DIR):
+			dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+			for file_name in sorted(file_names):
+				if os.path.splitext(file_name)[1] in ('.py', '.tmpl', '.txt'):
+					path = os.path.join(root, file_name)
+					digest.update(os.path.relpath(path, PACKAGE_DIR).replace(os.sep, '/').encode('utf-8') + b'\0')
+					with open(path, 'rb') as source:
+						digest.update(hashlib.sha256(source.read()).digest())
+		_package_digest = digest.hexdigest()
+	return _package_digest
+
+def spec_key(spec):
+	"""Cache key of a module spec, equal specs give equal keys whatever the order of their object keys"""
+	spec = dict(spec)
+	spec.setdefault('version', SPEC_VERSION)
+	canonical = json.dumps([__version__, package_digest(), spec], sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+	return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class OutputCache:
+	"""
+	Generated files of module specs stored as zip files in cache_dir. When
+	the entries take more than max_size bytes the least recently used ones
+	are removed.
+	"""
+
+	def __init__(self, cache_dir, max_size=256 * 1024 * 1024):
+		self.cache_dir = cache_dir
+		self.max_size = max_size
+		self._lock = threading.Lock()
+		os.makedirs(cache_dir, exist_ok=True)
+
+	def entry_path(self, key):
+		return os.path.join(self.cache_dir, key + '.zip')
+
+	def get(self, key):
+		"""Ordered dict of path to content for a key, None when not cached"""
+		path = self.entry_path(key)
+		try:
+			with zipfile.ZipFile(path) as archive:
+				files = OrderedDict((info.filename, archive.read(info).decode('utf-8')) for info in archive.infolist())
+			os.utime(path)
+		except (OSError, zipfile.BadZipFile):
+			return None
+		return files
+
+	def put(self, key, files):
+		"""Store a dict of path to content, files is replaced atomically"""
+		handle, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self.cache_dir)
+		try:
+			with os.fdopen(handle, 'wb') as temp_file, ZipSink(temp_file) as sink:
+				for path, content in files.items():
+					sink.write(path, content)
+			os.replace(temp_path, self.entry_path(key))
+		except Exception:
+			os.remove(temp_path)
+			raise
+		self.evict()
+
+	def entries(self):
+		"""List of (last used, size, path) of the cache entries, least recently used first"""
+		entries = []
+		for file_name in os.listdir(self.cache_dir):
+			if file_name.endswith('.zip'):
+				path = os.path.join(self.cache_dir, file_name)
+				try:
+					stat = os.stat(path)
+				except OSError:
+					continue
+				entries.append((stat.st_mtime, stat.st_size, path))
+		return sorted(entries)
+
+	def size(self):
+		return sum(size for last_used, size, path in self.entries())
+
+	def evict(self):
+		"""Remove least recently used entries until the cache fits in max_size"""
+		with self._lock:
+			entries = self.entries()
+			total = sum(size for last_used, size, path in entries)
+			for last_used, size, path in entries:
+				if total <= self.max_size:
+					break
+				try:
+					os.remove(path)
+				except OSError:
+					pass
+				total -= size
+
+	def clear(self):
+		for last_used, size, path in self.entries():
+			try:
+				os.remove(path)
+			except OSError:
+				pass
+
+	def generate_to(self, spec, sink, workers=None, incremental=False):
+		"""
+		Write the files of a module spec to sink, from the cache when it has
+		the spec. Gives True for a cache hit, on a miss the spec is validated
+		and generated and raises SpecError when it is invalid. Workers and
+		incremental are the options of Module.generate_to, incremental runs
+		use the same manifest as generating the module without the cache.
+		"""
+		key = spec_key(spec)
+		files = self.get(key)
+		hit = files is not None
+		if not hit:
+			memory = MemorySink()
+			build_module(spec).generate_to(memory)
+			files = OrderedDict((path, content.decode('utf-8')) for path, content in memory.files.items())
+			self.put(key, files)
+
+		module = Module(spec['package'], spec['name'])
+		module.write_files(sink, [(path, CachedFile(content)) for path, content in files.items()], workers, incremental=incremental)
+		return hit
+
+
+class CachedFile:
+	"""File of a cache entry, written as it was generated"""
+
+	def __init__(self, content):
+		self.content = content
+
+	def generate(self):
+		return self.content
+
+	def write(self, stream):
+		stream.write(self.content)
@@ -0,0 +1,268 @@
+# A Magento 2 module generator library
+# Copyright (C) 2016 Maikel Martens
+#
+# This file is part of Mage2Gen.
+#
+# Mage2Gen is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from .sink import Sink
+
+# Section categories and the generate phase their own time is counted in
+PHASES = OrderedDict([
+	('snippet', 'add'),
+	('merge', 'merge'),
+	('render', 'render'),
+	('write', 'write'),
+])
+
+# Module methods timed as merge sections while profiling
+MERGE_METHODS = ('add_composer_require', 'add_class', 'add_graphqlschema', 'add_xml', 'add_static_file')
+
+class Stat:
+	"""Totals of the sections with the same category and name"""
+	__slots__ = ('category', 'name', 'count', 'seconds', 'self_seconds', 'bytes')
+
+	def __init__(self, category, name):
+		self.category = category
+		self.name = name
+		self.count = 0
+		self.seconds = 0.0
+		self.self_seconds = 0.0
+		self.bytes = 0
+
+	def to_dict(self):
+		return OrderedDict((key, getattr(self, key)) for key in self.__slots__)
+
+
+class Section:
+	"""
+	Timed part of generating a module, use as context manager. Set bytes for
+	sections that produce output. Time spent in nested sections is not part
+	of the self time of a section.
+	"""
+	__slots__ = ('profile', 'category', 'name', 'bytes', 'start', 'child_seconds', 'stack')
+
+	def __init__(self, profile, category, name):
+		self.profile = profile
+		self.category = category
+		self.name = name
+		self.bytes = 0
+
+	def __enter__(self):
+		self.stack = self.profile._stack()
+		self.stack.append(self)
+		self.child_seconds = 0.0
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, *args):
+		seconds = time.perf_counter() - self.start
+		frames = ';'.join('{}:{}'.format(section.category, section.name) for section in self.stack)
+		self.stack.pop()
+		if self.stack:
+			self.stack[-1].child_seconds += seconds
+		self.profile.record(self.category, self.name, seconds, seconds - self.child_seconds, self.bytes, frames)
+
+
+class Profile:
+	"""
+	Wall time, call count and bytes of snippet adds, merges and rendering
+	and writing files, see Module.profile. on_record is called with the
+	category, name, seconds and bytes of every finished section.
+	"""
+
+	def __init__(self, on_record=None):
+		self.on_record = on_record
+		self.stats = OrderedDict()
+		self.stacks = OrderedDict()
+		self._local = threading.local()
+		self._lock = threading.Lock()
+
+	def _stack(self):
+		stack = getattr(self._local, 'stack', None)
+		if stack is None:
+			stack = self._local.stack = []
+		return stack
+
+	def section(self, category, name):
+		return Section(self, category, name)
+
+	def record(self, category, name, seconds, self_seconds=None, nbytes=0, frames=None):
+		self_seconds = seconds if self_seconds is None else self_seconds
+		with self._lock:
+			stat = self.stats.get((category, name))
+			if stat is None:
+				stat = self.stats[(category, name)] = Stat(category, name)
+			stat.count += 1
+			stat.seconds += seconds
+			stat.self_seconds += self_seconds
+			stat.bytes += nbytes
+			frames = frames or '{}:{}'.format(category, name)
+			self.stacks[frames] = self.stacks.get(frames, 0.0) + self_seconds
+		if self.on_record:
+			self.on_record(category, name, seconds, nbytes)
+
+	def phases(self):
+		"""Own time of all sections per generate phase"""
+		phases = OrderedDict((phase, 0.0) for phase in PHASES.values())
+		for stat in self.stats.values():
+			phase = PHASES.get(stat.category)
+			if phase:
+				phases[phase] += stat.self_seconds
+		return phases
+
+	def to_dict(self):
+		return OrderedDict([
+			('version', 1),
+			('phases', self.phases()),
+			('stats', [stat.to_dict() for stat in self.stats.values()]),
+		])
+
+	def to_json(self, indent=4):
+		return json.dumps(self.to_dict(), indent=indent)
+
+	def to_folded(self):
+		"""Own time per stack in microseconds, in the folded format of flamegraph.pl and speedscope"""
+		return ''.join('{} {}\n'.format(frames, int(round(seconds * 1000000))) for frames, seconds in self.stacks.items())
+
+	def write_json(self, path):
+		with open(path, 'w', encoding='utf-8') as json_file:
+			json_file.write(self.to_json())
+
+	def write_folded(self, path):
+		with open(path, 'w', encoding='utf-8') as folded_file:
+			folded_file.write(self.to_folded())
+
+
+class ProfiledSink(Sink):
+	"""Sink recording every file write as write section, streams of open are recorded when closed"""
+
+	def __init__(self, sink, profile):
+		self.sink = sink
+		self.profile = profile
+
+	def write(self, path, content):
+		nbytes = len(content.encode('utf-8'))
+		with self.profile.section('write', path) as section:
+			section.bytes = nbytes
+			self.sink.write(path, content)
+
+	def open(self, path):
+		return ProfiledStream(self.sink.open(path), self.profile, path)
+
+	def read(self, path):
+		return self.sink.read(path)
+
+	def exists(self, path):
+		return self.sink.exists(path)
+
+	def remove(self, path):
+		self.sink.remove(path)
+
+
+class ProfiledStream:
+	"""
+	Stream of ProfiledSink.open, writing chunks and closing the stream are
+	recorded together as one write section. Their time is left out of the self
+	time of the render section the chunks are written in.
+	"""
+
+	def __init__(self, stream, profile, path):
+		self.stream = stream
+		self.profile = profile
+		self.path = path
+		self.seconds = 0.0
+		self.bytes = 0
+
+	def timed(self, function, *args):
+		start = time.perf_counter()
+		try:
+			return function(*args)
+		finally:
+			seconds = time.perf_counter() - start
+			self.seconds += seconds
+			stack = self.profile._stack()
+			if stack:
+				stack[-1].child_seconds += seconds
+
+	def write(self, text):
+		self.bytes += len(text.encode('utf-8'))
+		return self.timed(self.stream.write, text)
+
+	def __enter__(self):
+		self.timed(self.stream.__enter__)
+		return self
+
+	def __exit__(self, *args):
+		self.timed(self.stream.__exit__, *args)
+		self.profile.record('write', self.path, self.seconds, self.seconds, self.bytes)
+
+
+class ProfiledFile:
+	"""Output file recording rendering as render section"""
+
+	def __init__(self, output_file, profile, path):
+		self.output_file = output_file
+		self.profile = profile
+		self.path = path
+
+	def generate(self):
+		with self.profile.section('render', self.path):
+			return self.output_file.generate()
+
+	def write(self, stream):
+		with self.profile.section('render', self.path):
+			self.output_file.write(stream)
+
+
+def profiled_method(profile, category, name, method):
+	def profiled(*args, **kwargs):
+		with profile.section(category, name):
+			return method(*args, **kwargs)
+	profiled.__wrapped__ = method
+	return profiled
+
+def instrument(module, profile):
+	"""
+	Record the merges and generated files of module in profile. The timed
+	methods are set on the module instance, so a module that is not
+	instrumented runs without any profiling code.
+	"""
+	module._profile = profile
+	for name in MERGE_METHODS:
+		setattr(module, name, profiled_method(profile, 'merge', name, getattr(type(module), name).__get__(module)))
+
+	emit_file = getattr(type(module), '_emit_file').__get__(module)
+	def profiled_emit_file(sink, path, output_file, *args):
+		return emit_file(ProfiledSink(sink, profile), path, ProfiledFile(output_file, profile, path), *args)
+	module._emit_file = profiled_emit_file
+
+	render_file = getattr(type(module), '_render_file').__get__(module)
+	def profiled_render_file(path, output_file, *args):
+		return render_file(path, ProfiledFile(output_file, profile, path), *args)
+	module._render_file = profiled_render_file
+
+	write_content = getattr(type(module), '_write_content').__get__(module)
+	def profiled_write_content(sink, *args):
+		return write_content(ProfiledSink(sink, profile), *args)
+	module._write_content = profiled_write_content
+
+def uninstrument(module):
+	module._profile = None
+	for name in MERGE_METHODS + ('_emit_file', '_render_file', '_write_content'):
+		module.__dict__.pop(name, None)
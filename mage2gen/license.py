@@ -90,4 +90,36 @@ class MIT(FileLicense):
 class APACHE2(FileLicense):
 	template_license = 'apache2.txt'
 	template_short_license = 'apache2_short.txt'
-	identifier = 'Apache-2.0'
\ No newline at end of file
+	identifier = 'Apache-2.0'
+
+LICENSES = {license.identifier: license for license in (GPLV3, OSLV3, MIT, APACHE2)}
+
+def dump_license(license):
+	"""Dict with the license settings, for module specs"""
+	data = {
+		'identifier': license.identifier,
+		'copyright': license.copyright,
+		'module_name': license.module_name,
+		'description': license.description,
+		'year': license.license_year,
+	}
+	if license.identifier not in LICENSES:
+		data['text'] = license.license_text
+		data['short_text'] = license.short_license_text
+	return data
+
+def load_license(data):
+	"""License from dump_license data, unknown identifiers give a License with the dumped texts"""
+	license_class = LICENSES.get(data.get('identifier'))
+	kwargs = {
+		'copyright': data.get('copyright', ''),
+		'module_name': data.get('module_name', ''),
+		'description': data.get('description', ''),
+	}
+	if license_class:
+		license = license_class(**kwargs)
+	else:
+		license = License(license_text=data.get('text', ''), short_license_text=data.get('short_text', ''), **kwargs)
+		license.identifier = data.get('identifier', License.identifier)
+	license.license_year = data.get('year', license.license_year)
+	return license
@@ -15,15 +15,47 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
+import io
 import os
+import copy
 import json
+import hashlib
 from collections import defaultdict, OrderedDict
-from xml.etree.ElementTree import Element, SubElement, tostring, ElementTree
-from xml.dom import minidom
-
-from .utils import upperfirst
-
-TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), 'templates')
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from .utils import upperfirst, merge_unique, intern_value
+from .license import dump_license, load_license
+from .snippet import snippet_registry
+from .template import TEMPLATE_DIR, Chunks, templates
+from .sink import FileSystemSink, open_file
+from .instrument import Profile, instrument, uninstrument
+
+# Classes, methods, XML nodes and files can be shared between modules, see
+# their share and writable methods. A shared object is never changed, adding
+# to it first replaces it with a writable copy that shares its children.
+
+_slot_names = {}
+
+def slot_names(cls):
+	"""Names of the __slots__ attributes of a class and its base classes"""
+	names = _slot_names.get(cls)
+	if names is None:
+		names = _slot_names[cls] = tuple(
+			name for klass in cls.__mro__ for name in klass.__dict__.get('__slots__', ()) if name not in ('__dict__', '__weakref__')
+		)
+	return names
+
+def clone(obj):
+	"""Shallow copy of an object with an instance dict and/or slots, faster than copy.copy"""
+	cloned = obj.__class__.__new__(obj.__class__)
+	state = getattr(obj, '__dict__', None)
+	if state:
+		cloned.__dict__.update(state)
+	for name in slot_names(obj.__class__):
+		setattr(cloned, name, getattr(obj, name))
+	cloned._shared = False
+	return cloned
 
 ###############################################################################
 # PHP Class
@@ -31,10 +63,12 @@ TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), 'templates')
 class Phpclass:
 
 	template_file = os.path.join(TEMPLATE_DIR,'class.tmpl')
+	_shared = False
 
 	def __init__(self, class_namespace, extends=None, implements=None, attributes=None, dependencies=None, abstract=False):
 		self.class_namespace = self.upper_class_namespace(class_namespace)
 		self.methods = []
+		self._method_index = {}
 		self.extends = extends
 		self.implements = implements if implements else []
 		self.attributes = attributes if attributes else []
@@ -45,10 +79,38 @@ class Phpclass:
 	def __eq__(self, other):
 		return self.class_namespace == other.class_namespace
 
+	def copy(self):
+		"""Copy of the class and its methods, sharing only immutable values"""
+		phpclass = clone(self)
+		phpclass.methods = [method.copy() for method in self.methods]
+		phpclass._method_index = dict(self._method_index)
+		phpclass.implements = copy.copy(self.implements)
+		phpclass.attributes = copy.copy(self.attributes)
+		phpclass.dependencies = copy.copy(self.dependencies)
+		return phpclass
+
+	def share(self):
+		"""Mark the class and its methods as shared, they are copied before adding to them"""
+		if self._shared:
+			return self
+		self._shared = True
+		for method in self.methods:
+			method.share()
+		return self
+
+	def writable(self):
+		"""The class itself, or a copy sharing its methods when the class is shared"""
+		if not self._shared:
+			return self
+		phpclass = clone(self)
+		phpclass.methods = list(self.methods)
+		phpclass._method_index = dict(self._method_index)
+		return phpclass
+
 	def __add__(self, other):
-		self.attributes = set(list(self.attributes) + list(other.attributes))
-		self.implements = set(list(self.implements) + list(other.implements))
-		self.dependencies = set(list(self.dependencies) + list(other.dependencies))
+		self.attributes = merge_unique(self.attributes, other.attributes)
+		self.implements = merge_unique(self.implements, other.implements)
+		self.dependencies = merge_unique(self.dependencies, other.dependencies)
 		for method in other.methods :
 			self.add_method(method)
 		return self
@@ -65,16 +127,26 @@ class Phpclass:
 		return '\\'.join(upperfirst(n) for n in class_namespace.strip('\\').split('\\'))
 
 	def add_method(self, method):
-		if method in self.methods:
-			method_index = self.methods.index(method)
-			self.methods[method_index] = self.methods[method_index] + method
+		# Methods are indexed on name, rebuild when methods was changed without add_method
+		if len(self._method_index) != len(self.methods):
+			self._method_index = {}
+			for index, current_method in enumerate(self.methods):
+				self._method_index.setdefault(current_method.name, index)
+
+		method_index = self._method_index.get(method.name)
+		if method_index is not None:
+			self.methods[method_index] = self.methods[method_index].writable() + method
 		else :
+			self._method_index[method.name] = len(self.methods)
 			self.methods.append(method)
 
+	def method_chunks(self):
+		for index, method in enumerate(self.methods):
+			yield '\n\n' if index else '\n'
+			yield method.generate()
+
 	def context_data(self):
-		methods = '\n\n'.join(m.generate() for m in self.methods)
-		if methods:
-			methods = '\n' + methods
+		methods = Chunks(self.method_chunks, code_formatted=True) if self.methods else ''
 
 		if self.attributes:
 			attributes = '\n\t' + '\n\t'.join(self.attributes) + '\n'
@@ -98,28 +170,32 @@ class Phpclass:
 		}
 
 	def generate(self):
-		with open(self.template_file, 'rb') as tmpl:
-			template = tmpl.read().decode('utf-8')
+		# Make generated code PSR2 compliant
+		return templates.get(self.template_file).render_code(**self.context_data())
 
-		return template.format(
-			**self.context_data()
-		).replace('\t', '    ') # Make generated code PSR2 compliant
+	def write(self, stream):
+		"""Write the class to a text stream, one chunk per method"""
+		for chunk in templates.get(self.template_file).render_code_chunks(**self.context_data()):
+			stream.write(chunk)
 
 	def save(self, root_location):
 		path = os.path.join(root_location, self.class_namespace.replace('\\', '/') + '.php')
-		try:
-			os.makedirs(os.path.dirname(path))
-		except Exception:
-			pass
-
-		with open(path, 'w+', encoding='utf-8') as class_file:
-			class_file.writelines(self.generate())
+		with open_file(path) as class_file:
+			self.write(class_file)
 
 class Phpmethod:
 	PUBLIC = 'public'
 	PROTECTED = 'protected'
 	PRIVATE = 'private'
 
+	template_file = os.path.join(TEMPLATE_DIR, 'method.tmpl')
+
+	# Lists shorter than this are searched directly when merging, longer lists get a set
+	UNIQUE_CODES_MIN = 8
+
+	# Large modules have thousands of methods, slots keep them compact
+	__slots__ = ('name', 'access', 'params', 'docstring', 'body', 'end_body', 'body_start', 'body_return', '_unique_codes', '_shared')
+
 	def __init__(self, name, **kwargs):
 		"""
 
@@ -133,22 +209,32 @@ class Phpmethod:
 		self.end_body = [kwargs.get('end_body', '')]
 		self.body_start = kwargs.get('body_start', '')
 		self.body_return = kwargs.get('body_return', '')
-		self.template_file = os.path.join(TEMPLATE_DIR, 'method.tmpl')
+		self._unique_codes = None
+		self._shared = False
 
 	def __eq__(self, other):
 		return self.name == other.name
 
-	def __add__(self, other):
-		for code in other.body:
-			if code not in self.body:
-				self.body.append(code)
-		for code in other.end_body:
-			if code not in self.end_body:
-				self.end_body.insert(0, code)
+	def copy(self):
+		method = clone(self)
+		method.params = list(self.params)
+		method.docstring = list(self.docstring)
+		method.body = list(self.body)
+		method.end_body = list(self.end_body)
+		method._unique_codes = None
+		return method
+
+	def share(self):
+		self._shared = True
+		return self
 
-		for param in other.params:
-			if param not in self.params:
-				self.params.append(param)
+	def writable(self):
+		return self.copy() if self._shared else self
+
+	def __add__(self, other):
+		self.add_unique_codes('body', other.body)
+		self.add_unique_codes('end_body', other.end_body, first=True)
+		self.add_unique_codes('params', other.params)
 		return self
 
 	def __hash__(self):
@@ -171,9 +257,39 @@ class Phpmethod:
 		return docstring
 
 
+	def unique_codes(self, name):
+		"""
+		Entries of the body, end_body or params list for dedupe. Long lists
+		get a set for O(1) lookups, rebuilt when the list was changed outside
+		of merging, short lists are given as is.
+		"""
+		items = getattr(self, name)
+		if len(items) < self.UNIQUE_CODES_MIN:
+			return items
+		if self._unique_codes is None:
+			self._unique_codes = {}
+		indexed_items, codes, duplicates = self._unique_codes.get(name, (None, None, None))
+		if indexed_items is not items or len(items) - len(codes) != duplicates:
+			codes = set(items)
+			self._unique_codes[name] = (items, codes, len(items) - len(codes))
+		return codes
+
+	def add_unique_codes(self, name, codes, first=False):
+		"""Add the codes missing from the body, end_body or params list, at the start with first"""
+		items = getattr(self, name)
+		for code in codes:
+			unique = self.unique_codes(name)
+			if code in unique:
+				continue
+			if unique is not items:
+				unique.add(code)
+			if first:
+				items.insert(0, code)
+			else:
+				items.append(code)
+
 	def add_body_code(self,code):
-		if code not in self.body:
-			self.append(code)
+		self.add_unique_codes('body', [code])
 
 	def body_code(self):
 		body_string = ''
@@ -189,35 +305,55 @@ class Phpmethod:
 			body_string += self.body_return
 		return body_string.strip()
 
+	def context_data(self):
+		params = self.params_code()
+		return {
+			'method': self.name,
+			'access': self.access,
+			'docstring': self.docstring_code(),
+			'params': params,
+			'body': self.body_code(),
+			'brace_break': ' ' if len(params) > 40 else '\n\t',
+		}
+
 	def generate(self):
-		with open(self.template_file, 'rb') as tmpl:
-			template = tmpl.read().decode('utf-8')
-
-		return template.format(
-			method=self.name,
-			access=self.access,
-			docstring=self.docstring_code(),
-			params=self.params_code(),
-			body=self.body_code(),
-			brace_break= ' ' if len(self.params_code()) > 40 else '\n\t'
-		).replace('\t', '    ') # Make generated code PSR2 compliant
+		# Make generated code PSR2 compliant
+		return templates.get(self.template_file).render_code(**self.context_data())
 
 ###############################################################################
 # XML
 ###############################################################################
+XSI_NAMESPACE = 'http://www.w3.org/2001/XMLSchema-instance'
+
+def escape_xml(value):
+	return value.replace('&', '&amp;').replace('<', '&lt;').replace('"', '&quot;').replace('>', '&gt;')
+
 class Xmlnode:
 
+	DEFAULT_MATCH_ATTRIBUTES = ('name', 'id', 'for')
+
+	# Nodes with fewer children are searched directly when merging, larger nodes get an index
+	INDEX_MIN_NODES = 16
+
+	# Modules with UI components have tens of thousands of nodes, slots keep
+	# them compact and names and attribute values are interned, so repeated
+	# strings like xsi:type and schema locations are stored once
+	__slots__ = ('node_name', 'node_text', 'attributes', 'match_attributes', 'nodes', 'xsd', '_node_index', '_indexed_nodes', '_shared')
+
 	def __init__(self, node_name, attributes=None, nodes=None, node_text=None, match_attributes=None, xsd=False):
 
 		if nodes :
 			nodes = [x for x in nodes if x]
 
-		self.node_name = node_name
-		self.node_text = node_text
-		self.attributes = attributes if attributes else {}
-		self.match_attributes = match_attributes if match_attributes else ['name', 'id', 'for']
+		self.node_name = intern_value(node_name)
+		self.node_text = intern_value(node_text)
+		self.attributes = {intern_value(key): intern_value(value) for key, value in attributes.items()} if attributes else {}
+		self.match_attributes = match_attributes if match_attributes else self.DEFAULT_MATCH_ATTRIBUTES
 		self.nodes = nodes if nodes else []
 		self.xsd = xsd
+		self._node_index = None
+		self._indexed_nodes = 0
+		self._shared = False
 
 	def __str__(self):
 		return self.node_name
@@ -230,99 +366,232 @@ class Xmlnode:
 					return False
 		return True
 
+	def copy(self):
+		"""Copy of the node and all child nodes"""
+		node = clone(self)
+		node.attributes = self.attributes.copy()
+		node.nodes = [child.copy() for child in self.nodes]
+		node._node_index = None
+		node._indexed_nodes = 0
+		return node
+
+	def share(self):
+		"""Mark the node and its child nodes as shared, they are copied before adding to them"""
+		if self._shared:
+			return self
+		self._shared = True
+		for node in self.nodes:
+			node.share()
+		return self
+
+	def writable(self):
+		"""The node itself, or a copy sharing its child nodes when the node is shared"""
+		if not self._shared:
+			return self
+		node = clone(self)
+		node.nodes = list(self.nodes)
+		node._node_index = None
+		node._indexed_nodes = 0
+		return node
+
 	def output_tree(self, depth=0):
 		output = ("  " * depth) + "<{} {}>\n".format(self.node_name, self.attributes)
 		for node in self.nodes:
 			output += node.output_tree(depth + 1)
 		return output
 
-	def add_nodes(self, nodes):
-		for node in nodes:
-			if node in self.nodes and node.nodes:
-				index = self.nodes.index(node)
-				self.nodes[index].add_nodes(node.nodes)
-			elif node not in self.nodes:
-				self.nodes.append(node)
-
-	def generate(self, element=None):
-		if element != None:
-			el = SubElement(element, self.node_name)
-		else:
-			el = Element(self.node_name)
-			if not self.xsd:
-				el.set('xmlns:xsi',"http://www.w3.org/2001/XMLSchema-instance")
+	def match_keys(self):
+		"""Names of the match attributes set on this node, sorted"""
+		return tuple(sorted(key for key in self.match_attributes if key in self.attributes))
 
-		if self.node_text:
-			el.text = self.node_text
+	def _index_node(self, node, position):
+		keys = node.match_keys()
+		positions = self._node_index.setdefault(node.node_name, {}).setdefault(keys, {})
+		positions.setdefault(tuple(node.attributes[key] for key in keys), position)
 
-		for key, value in self.attributes.items():
-			el.set(str(key), str(value))
+	def _matches(self, node):
+		"""Node has the same name and the same values for the match attributes set on this node"""
+		if self.node_name != node.node_name:
+			return False
+		try:
+			return all(node.attributes[key] == self.attributes[key] for key in self.match_keys())
+		except KeyError:
+			return False
 
-		for node in self.nodes:
-			node.generate(el)
+	def _find_node(self, node):
+		"""
+		Position of the first child equal to node. Children of large nodes are
+		indexed on node name and the values of their match attributes, the
+		index is rebuilt when nodes was changed without add_nodes.
+		"""
+		if len(self.nodes) < self.INDEX_MIN_NODES:
+			self._node_index = None
+			for position, child in enumerate(self.nodes):
+				if child._matches(node):
+					return position
+			return None
+
+		if self._node_index is None or self._indexed_nodes != len(self.nodes):
+			self._node_index = {}
+			for position, child in enumerate(self.nodes):
+				self._index_node(child, position)
+			self._indexed_nodes = len(self.nodes)
+
+		position = None
+		for keys, positions in self._node_index.get(node.node_name, {}).items():
+			try:
+				found = positions.get(tuple(node.attributes[key] for key in keys))
+			except KeyError:
+				continue
+			if found is not None and (position is None or found < position):
+				position = found
+		return position
 
-		if element == None:
-			output = tostring(el, 'utf-8')
-			reparsed = minidom.parseString(output)
-			if self.xsd:
-				return reparsed.toprettyxml(indent="\t").split('\n', 1)[-1]
+	def add_nodes(self, nodes):
+		for node in nodes:
+			index = self._find_node(node)
+			if index is None:
+				if self._node_index is not None:
+					self._index_node(node, len(self.nodes))
+					self._indexed_nodes += 1
+				self.nodes.append(node)
+			elif node.nodes:
+				current_node = self.nodes[index] = self.nodes[index].writable()
+				current_node.add_nodes(node.nodes)
+
+	def write(self, stream):
+		"""Write the node as an indented XML document to a text stream"""
+		if self.xsd:
+			attributes = self.attributes
+		else:
+			stream.write('<?xml version="1.0" ?>\n')
+			attributes = OrderedDict([('xmlns:xsi', XSI_NAMESPACE)])
+			attributes.update(self.attributes)
+
+		self.write_node(stream.write, '', attributes)
+
+	def write_node(self, write, indent, attributes=None):
+		attributes = self.attributes if attributes is None else attributes
+		output = [indent, '<', self.node_name]
+
+		# Namespace declarations are written before the other attributes, the
+		# others keep their insertion order like minidom does from Python 3.8
+		namespaces = []
+		for key, value in attributes.items():
+			key = str(key)
+			if key == 'xmlns' or key.startswith('xmlns:'):
+				namespaces.extend((' ', key, '="', escape_xml(str(value)), '"'))
 			else:
-				return reparsed.toprettyxml(indent="\t")
+				output.extend((' ', key, '="', escape_xml(str(value)), '"'))
+		if namespaces:
+			output[3:3] = namespaces
+
+		text = self.node_text
+		if text and '\r' in text:
+			text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+		if self.nodes:
+			output.append('>\n')
+			child_indent = indent + '\t'
+			if text:
+				output.extend((escape_xml(child_indent + text), '\n'))
+			write(''.join(output))
+			for node in self.nodes:
+				node.write_node(write, child_indent)
+			write(indent + '</' + self.node_name + '>\n')
+		elif text:
+			output.extend(('>', escape_xml(text), '</', self.node_name, '>\n'))
+			write(''.join(output))
+		else:
+			output.append('/>\n')
+			write(''.join(output))
 
-	def save(self, xml_path):
-		try:
-			os.makedirs(os.path.dirname(xml_path))
-		except Exception:
-			pass
+	def generate(self):
+		stream = io.StringIO()
+		self.write(stream)
+		return stream.getvalue()
 
-		with open(xml_path, 'w+', encoding='utf-8') as xml_file:
-			xml_file.writelines(self.generate())
+	def save(self, xml_path):
+		with open_file(xml_path) as xml_file:
+			self.write(xml_file)
 
 
 ###############################################################################
 # Template files
 ###############################################################################
+def merge_codes(static_file, name, codes):
+	"""
+	Append the codes missing from a context data list of a static file. A set
+	of the list is kept between merges for O(1) lookups, rebuilt when the list
+	was changed outside of merging.
+	"""
+	items = static_file._context_data[name]
+	if static_file._unique_codes is None:
+		static_file._unique_codes = {}
+	indexed_items, unique, duplicates = static_file._unique_codes.get(name, (None, None, None))
+	if indexed_items is not items or len(items) - len(unique) != duplicates:
+		unique = set(items)
+	for code in codes:
+		if code not in unique:
+			unique.add(code)
+			items.append(code)
+	static_file._unique_codes[name] = (items, unique, len(items) - len(unique))
+
 class StaticFile:
 
+	_shared = False
+	_unique_codes = None
+
 	def __init__(self, file_name, body=None, template_file='staticfile.tmpl', context_data=None):
 		self.file_name = file_name
 		self.template_file = os.path.join(TEMPLATE_DIR, template_file)
 		self._context_data = context_data if context_data else {}
 		self._context_data['body'] = [body] if body else []
 
+	def copy(self):
+		static_file = clone(self)
+		static_file._context_data = {key: list(value) if isinstance(value, list) else value for key, value in self._context_data.items()}
+		static_file._unique_codes = None
+		return static_file
+
+	def share(self):
+		self._shared = True
+		return self
+
+	def writable(self):
+		return self.copy() if self._shared else self
+
 	def __add__(self, other):
-		for code in other._context_data['body']:
-			if code not in self._context_data['body']:
-				self._context_data['body'].append(code)
+		merge_codes(self, 'body', other._context_data['body'])
 		return self
 
 	def context_data(self):
-		data = self._context_data
+		data = dict(self._context_data)
 		data['body'] = "\n\n".join(self._context_data['body'])
-		return self._context_data
+		return data
 
 	def generate(self):
-		with open(self.template_file, 'rb') as tmpl:
-			template = tmpl.read().decode('utf-8')
-
-		return template.format(
+		return templates.render(
+			self.template_file,
 			**self.context_data()
 		)
 
-	def save(self, file_path):
-		try:
-			os.makedirs(os.path.dirname(file_path))
-		except Exception:
-			pass
+	def write(self, stream):
+		for chunk in templates.get(self.template_file).render_chunks(**self.context_data()):
+			stream.write(chunk)
 
-		with open(file_path, 'w+', encoding='utf-8') as static_file:
-			static_file.writelines(self.generate())
+	def save(self, file_path):
+		with open_file(file_path) as static_file:
+			self.write(static_file)
 
 ###############################################################################
 # Template files
 ###############################################################################
 class Readme:
 
+	_shared = False
+	_unique_codes = None
+
 	def __init__(self, file_name='README.md', body=None, template_file='readme.tmpl', context_data=None, configuration=None, specifications=None, attributes=None):
 		self.file_name = file_name
 		self.template_file = os.path.join(TEMPLATE_DIR, template_file)
@@ -332,45 +601,45 @@ class Readme:
 		self._context_data['specifications'] = [specifications] if specifications else []
 		self._context_data['attributes'] = [attributes] if attributes else []
 
+	def copy(self):
+		static_file = clone(self)
+		static_file._context_data = {key: list(value) if isinstance(value, list) else value for key, value in self._context_data.items()}
+		static_file._unique_codes = None
+		return static_file
+
+	def share(self):
+		self._shared = True
+		return self
+
+	def writable(self):
+		return self.copy() if self._shared else self
+
 	def __add__(self, other):
-		for code in other._context_data['body']:
-			if code not in self._context_data['body']:
-				self._context_data['body'].append(code)
-		for code in other._context_data['configuration']:
-			if code not in self._context_data['configuration']:
-				self._context_data['configuration'].append(code)
-		for code in other._context_data['specifications']:
-			if code not in self._context_data['specifications']:
-				self._context_data['specifications'].append(code)
-		for code in other._context_data['attributes']:
-			if code not in self._context_data['attributes']:
-				self._context_data['attributes'].append(code)
+		for name in ('body', 'configuration', 'specifications', 'attributes'):
+			merge_codes(self, name, other._context_data[name])
 		return self
 
 	def context_data(self):
-		data = self._context_data
+		data = dict(self._context_data)
 		data['body'] = "\n\n".join(self._context_data['body'])
 		data['configuration'] = "\n\n".join(self._context_data['configuration'])
 		data['specifications'] = "\n\n".join(self._context_data['specifications'])
 		data['attributes'] = "\n\n".join(self._context_data['attributes'])
-		return self._context_data
+		return data
 
 	def generate(self):
-		with open(self.template_file, 'rb') as tmpl:
-			template = tmpl.read().decode('utf-8')
-
-		return template.format(
+		return templates.render(
+			self.template_file,
 			**self.context_data()
 		)
 
-	def save(self, file_path):
-		try:
-			os.makedirs(os.path.dirname(file_path))
-		except Exception:
-			pass
+	def write(self, stream):
+		for chunk in templates.get(self.template_file).render_chunks(**self.context_data()):
+			stream.write(chunk)
 
-		with open(file_path, 'w+', encoding='utf-8') as static_file:
-			static_file.writelines(self.generate())
+	def save(self, file_path):
+		with open_file(file_path) as static_file:
+			self.write(static_file)
 
 
 ###############################################################################
@@ -378,10 +647,31 @@ class Readme:
 ###############################################################################
 class GraphQlSchema:
 	template_file = os.path.join(TEMPLATE_DIR, 'graphqlschema.tmpl')
+	_shared = False
 
 	def __init__(self):
 		self.object_types = []
 
+	def copy(self):
+		schema = clone(self)
+		schema.object_types = [object_type.copy() for object_type in self.object_types]
+		return schema
+
+	def share(self):
+		if self._shared:
+			return self
+		self._shared = True
+		for object_type in self.object_types:
+			object_type.share()
+		return self
+
+	def writable(self):
+		if not self._shared:
+			return self
+		schema = clone(self)
+		schema.object_types = list(self.object_types)
+		return schema
+
 	def __add__(self, other):
 		for object_type in other.object_types:
 			self.add_objecttype(object_type)
@@ -390,51 +680,76 @@ class GraphQlSchema:
 	def add_objecttype(self, object_type):
 		if object_type in self.object_types:
 			object_type_index = self.object_types.index(object_type)
-			self.object_types[object_type_index] = self.object_types[object_type_index] + object_type
+			self.object_types[object_type_index] = self.object_types[object_type_index].writable() + object_type
 		else:
 			self.object_types.append(object_type)
 
-	def context_data(self):
-		object_types = '\n\n'.join(t.generate() for t in self.object_types)
-		if object_types:
-			object_types = '\n' + object_types
+	def object_type_chunks(self):
+		for index, object_type in enumerate(self.object_types):
+			yield '\n\n' if index else '\n'
+			yield object_type.generate()
 
+	def context_data(self):
 		return {
-			'object_types': object_types
+			'object_types': Chunks(self.object_type_chunks, code_formatted=True) if self.object_types else ''
 		}
 
 	def generate(self):
-		with open(self.template_file, 'rb') as tmpl:
-			template = tmpl.read().decode('utf-8')
+		# Make generated code PSR2 compliant
+		return templates.get(self.template_file).render_code(**self.context_data())
 
-		return template.format(
-			**self.context_data()
-		).replace('\t', '    ')  # Make generated code PSR2 compliant
+	def write(self, stream):
+		"""Write the schema to a text stream, one chunk per object type"""
+		for chunk in templates.get(self.template_file).render_code_chunks(**self.context_data()):
+			stream.write(chunk)
 
 	def save(self, path):
-		try:
-			os.makedirs(os.path.dirname(path))
-		except Exception:
-			pass
-
-		with open(path, 'w+', encoding='utf-8') as class_file:
-			class_file.writelines(self.generate())
+		with open_file(path) as schema_file:
+			self.write(schema_file)
 
 
 class GraphQlObjectType:
 
+	template_file = os.path.join(TEMPLATE_DIR, 'graphqlobject.tmpl')
+
+	__slots__ = ('type', 'type_declaration', 'body', 'end_body', 'object_items', '_shared')
+
 	def __init__(self, type, **kwargs):
 
 		self.type = type
 		self.type_declaration = kwargs.get('type_declaration', 'type')
 		self.body = [kwargs.get('body', '')]
 		self.end_body = [kwargs.get('end_body', '')]
-		self.template_file = os.path.join(TEMPLATE_DIR, 'graphqlobject.tmpl')
 		self.object_items = []
+		self._shared = False
 
 	def __eq__(self, other):
 		return self.type == other.type
 
+	def copy(self):
+		object_type = clone(self)
+		object_type.body = list(self.body)
+		object_type.end_body = list(self.end_body)
+		object_type.object_items = [object_item.copy() for object_item in self.object_items]
+		return object_type
+
+	def share(self):
+		if self._shared:
+			return self
+		self._shared = True
+		for object_item in self.object_items:
+			object_item.share()
+		return self
+
+	def writable(self):
+		if not self._shared:
+			return self
+		object_type = clone(self)
+		object_type.body = list(self.body)
+		object_type.end_body = list(self.end_body)
+		object_type.object_items = list(self.object_items)
+		return object_type
+
 	def __add__(self, other):
 		for item in other.object_items:
 			self.add_objectitem(item)
@@ -452,7 +767,7 @@ class GraphQlObjectType:
 	def add_objectitem(self, object_item):
 		if object_item in self.object_items:
 			object_type_index = self.object_items.index(object_item)
-			self.object_items[object_type_index] = self.object_items[object_type_index] + object_item
+			self.object_items[object_type_index] = self.object_items[object_type_index].writable() + object_item
 		else:
 			self.object_items.append(object_item)
 
@@ -463,29 +778,33 @@ class GraphQlObjectType:
 				body_string += '\n\t'.join(s.strip('\t') for s in body_code.splitlines()) + '\n\n\t'
 		return body_string.strip()
 
-	def context_data(self):
-		object_items = '\n'.join(i.generate() for i in self.object_items)
-		if object_items:
-			object_items = '\n' + object_items
+	def object_item_chunks(self):
+		for object_item in self.object_items:
+			yield '\n'
+			yield object_item.generate()
 
+	def context_data(self):
 		return {
 			'type_declaration': self.type_declaration,
 			'type': self.type,
-			'object_items': object_items,
+			'object_items': Chunks(self.object_item_chunks, code_formatted=True) if self.object_items else '',
 			'body': self.body_code()
 		}
 
 	def generate(self):
-		with open(self.template_file, 'rb') as tmpl:
-			template = tmpl.read().decode('utf-8')
-
-		return template.format(
-			**self.context_data()
-		).replace('\t', '    ') # Make generated code PSR2 compliant
+		# Make generated code PSR2 compliant
+		return templates.get(self.template_file).render_code(**self.context_data())
 
 
 class GraphQlObjectItem:
 
+	template_file = os.path.join(TEMPLATE_DIR, 'graphqlobjectitem.tmpl')
+
+	__slots__ = (
+		'item_identifier', 'item_type', 'item_arguments', 'item_resolver', 'item_description', 'item_cache_identity',
+		'body', 'end_body', '_shared',
+	)
+
 	def __init__(self, item_identifier, **kwargs):
 
 		self.item_identifier = item_identifier
@@ -500,7 +819,7 @@ class GraphQlObjectItem:
 		self.item_cache_identity = kwargs.get('item_cache_identity', '')
 		self.body = [kwargs.get('body', '')]
 		self.end_body = [kwargs.get('end_body', '')]
-		self.template_file = os.path.join(TEMPLATE_DIR, 'graphqlobjectitem.tmpl')
+		self._shared = False
 		if self.item_resolver:
 			self.item_resolver = '@resolver( class: "{item_resolver}")'.format(item_resolver=self.item_resolver)
 		if self.item_cache_identity:
@@ -514,6 +833,19 @@ class GraphQlObjectItem:
 	def __eq__(self, other):
 		return self.item_identifier == other.item_identifier
 
+	def copy(self):
+		object_item = clone(self)
+		object_item.body = list(self.body)
+		object_item.end_body = list(self.end_body)
+		return object_item
+
+	def share(self):
+		self._shared = True
+		return self
+
+	def writable(self):
+		return self.copy() if self._shared else self
+
 	def __add__(self, other):
 		for code in other.body:
 			if code not in self.body:
@@ -529,22 +861,61 @@ class GraphQlObjectItem:
 	def __hash__(self):
 		return hash(self.item_type)
 
+	def context_data(self):
+		return {
+			'item_identifier': self.item_identifier,
+			'item_type': self.item_type,
+			'item_resolver': self.item_resolver,
+			'item_description': self.item_description,
+			'item_cache_identity': self.item_cache_identity,
+			'item_arguments': self.item_arguments,
+		}
+
 	def generate(self):
-		with open(self.template_file, 'rb') as tmpl:
-			template = tmpl.read().decode('utf-8')
-
-		return template.format(
-			item_identifier=self.item_identifier,
-			item_type=self.item_type,
-			item_resolver=self.item_resolver,
-			item_description=self.item_description,
-			item_cache_identity=self.item_cache_identity,
-			item_arguments=self.item_arguments
-		).replace('\t', '    ')  # Make generated code PSR2 compliant
+		# Make generated code PSR2 compliant
+		return templates.get(self.template_file).render_code(**self.context_data())
 
 ###############################################################################
 # Module
 ###############################################################################
+MANIFEST_FILE = '.mage2gen-manifest.json'
+
+# Version of the module spec format written by Module.dump
+SPEC_VERSION = 1
+
+def snippet_call_params(call):
+	"""Keyword arguments for the add of a module spec snippet, with extra_params"""
+	params = dict(call.get('params') or {})
+	if call.get('extra_params') is not None:
+		params['extra_params'] = call['extra_params']
+	return params
+
+class GenerateError(Exception):
+
+	def __init__(self, errors):
+		self.errors = errors
+		super().__init__('Could not generate {} file(s):\n{}'.format(
+			len(errors), '\n'.join('{}: {}'.format(path, error) for path, error in errors)
+		))
+
+class GenerateReport:
+	"""
+	Files of an incremental generate, paths are relative to the generate root
+	location. Kept files are no longer generated but were not removed because
+	they were changed after generating, they stay in the manifest.
+	"""
+
+	def __init__(self):
+		self.added = []
+		self.changed = []
+		self.unchanged = []
+		self.removed = []
+		self.kept = []
+
+	def __str__(self):
+		return 'added: {}, changed: {}, unchanged: {}, removed: {}, kept: {}'.format(
+			len(self.added), len(self.changed), len(self.unchanged), len(self.removed), len(self.kept))
+
 class Module:
 
 	def __init__(self, package, name, description='', license=None):
@@ -552,6 +923,10 @@ class Module:
 		self.name = upperfirst(name)
 		self.description = description
 		self.license = license
+		self._profile = None
+		self._snippet_calls = []
+		self._snippet_instances = {}
+		self._snippet_depth = 0
 		self._graphqlschemas = {}
 		self._xmls = {}
 		self._classes = {}
@@ -604,11 +979,106 @@ class Module:
 	    return '{}_{}'.format(self.package, self.name)
 
 	@classmethod
-	def load_module(cls, data):
-		# convert data
-		return cls('Experius', 'Test')
+	def load_module(cls, data, profile=None):
+		"""
+		Module from a module spec as given by dump, the snippets are added
+		again in the same order. See mage2gen.spec for validating specs.
+		With profile the snippet adds are recorded in it, see profile.
+		"""
+		version = data.get('version', SPEC_VERSION)
+		if version != SPEC_VERSION:
+			raise Exception('Unsupported module spec version {}'.format(version))
+
+		module = cls(
+			package=data['package'],
+			name=data['name'],
+			description=data.get('description', ''),
+			license=load_license(data['license']) if data.get('license') else None,
+		)
+		if profile is not None:
+			with module.profile(profile):
+				module._add_snippet_calls(data.get('snippets', []))
+		else:
+			module._add_snippet_calls(data.get('snippets', []))
+		return module
+
+	def _add_snippet_calls(self, calls):
+		snippets = {}
+		for call in calls:
+			snippet_class = snippet_registry.get(call['snippet'])
+			if snippet_class is None:
+				raise Exception('Unknown snippet {}'.format(call['snippet']))
+			key = (snippet_class, call.get('instance', 0))
+			if key not in snippets:
+				snippets[key] = snippet_class(self)
+			snippets[key].add(**snippet_call_params(call))
+
+	@contextmanager
+	def profile(self, profile=None):
+		"""
+		Record snippet adds, merges and rendering and writing files in a
+		mage2gen.instrument.Profile while the context is active:
+
+			with module.profile() as profile:
+				SystemSnippet(module).add(...)
+				module.generate_module('app/code')
+			profile.write_json('profile.json')
+			profile.write_folded('profile.folded')
+
+		Modules are not profiled outside the context and run without any
+		profiling code.
+		"""
+		profile = profile if profile is not None else Profile()
+		instrument(self, profile)
+		try:
+			yield profile
+		finally:
+			uninstrument(self)
 
-	def generate_module(self, root_location):
+	def fork(self):
+		"""
+		New module with the files and snippets of this module. Classes, XML,
+		GraphQl schemas and static files are shared by both modules and only
+		copied when one of them merges into it, so a fork costs the objects
+		changed after forking instead of adding all snippets again.
+		"""
+		for objects in (self._classes, self._xmls, self._graphqlschemas, self._static_files):
+			for value in objects.values():
+				value.share()
+
+		module = self.__class__.__new__(self.__class__)
+		module.__dict__.update(self.__dict__)
+		module._snippet_calls = list(self._snippet_calls)
+		module._snippet_instances = dict(self._snippet_instances)
+		module._snippet_depth = 0
+		uninstrument(module)
+		module._graphqlschemas = dict(self._graphqlschemas)
+		module._xmls = dict(self._xmls)
+		module._classes = dict(self._classes)
+		module._static_files = dict(self._static_files)
+		module._composer = copy.deepcopy(self._composer)
+		return module
+
+	def snapshot(self):
+		"""Fork to keep as base, later changes to this module do not change the snapshot"""
+		return self.fork()
+
+	def dump(self):
+		"""Module spec with the settings and the snippets added to this module, see load_module"""
+		data = OrderedDict()
+		data['version'] = SPEC_VERSION
+		data['package'] = self.package
+		data['name'] = self.name
+		data['description'] = self.description
+		data['license'] = dump_license(self.license) if self.license else None
+		data['snippets'] = copy.deepcopy(self._snippet_calls)
+		return data
+
+	def generate_module(self, root_location, workers=None, executor=None, incremental=False):
+		"""
+		Generate the module files in root_location, see generate_to for the
+		workers, executor and incremental options.
+		"""
 		if not os.path.exists(root_location):
 			raise Exception('Location does not exists')
 
@@ -619,33 +1089,161 @@ class Module:
 		except Exception:
 			pass
 
+		return self.generate_to(FileSystemSink(root_location), workers, executor, incremental)
+
+	def generate_to(self, sink, workers=None, executor=None, incremental=False):
+		"""
+		Render the module files and write them to a sink (mage2gen.sink), the
+		module itself is not changed so it can be generated more than once.
+
+		With workers (a thread pool size) or an executor the files are rendered
+		concurrently and written in order on the calling thread, errors of all
+		files are collected and raised together as a GenerateError.
+
+		With incremental a manifest with the content hash of every file is saved
+		in the module folder. The next incremental run only writes files whose
+		content changed, removes files that are no longer generated and returns
+		a GenerateReport.
+		"""
+		return self.write_files(sink, self.output_files(), workers, executor, incremental)
+
+	def write_files(self, sink, files, workers=None, executor=None, incremental=False):
+		"""
+		Write (path, file) pairs as given by output_files to a sink, with the
+		options of generate_to. A file only needs generate and write methods, so
+		files rendered before can be written with the same manifest.
+		"""
+		manifest_path = '{}/{}/{}'.format(self.package, self.name, MANIFEST_FILE)
+		previous = self._load_manifest(sink, manifest_path) if incremental else {}
+
+		if workers or executor or incremental:
+			# Files are only rendered concurrently, they are written in order so
+			# archives and memory sinks get the same output every time
+			tasks = [(path, (path, output_file, incremental)) for path, output_file in files]
+			results = self._run_tasks(self._render_file, tasks, workers, executor,
+				lambda path, rendered: self._write_content(sink, path, rendered, previous.get(path)))
+		else:
+			results = [self._emit_file(sink, path, output_file) for path, output_file in files]
+
+		if not incremental:
+			return
+
+		report = GenerateReport()
+		manifest = OrderedDict()
+		for (path, output_file), (digest, written) in zip(files, results):
+			manifest[path] = digest
+			if path not in previous:
+				report.added.append(path)
+			elif written:
+				report.changed.append(path)
+			else:
+				report.unchanged.append(path)
+
+		for path, digest in previous.items():
+			if path in manifest:
+				continue
+			content = sink.read(path)
+			if content is None:
+				continue
+			if hashlib.sha256(content).hexdigest() == digest:
+				sink.remove(path)
+				report.removed.append(path)
+			else:
+				# Keep files that were changed after generating
+				report.kept.append(path)
+				manifest[path] = digest
+
+		sink.write(manifest_path, json.dumps({'version': 1, 'files': manifest}, indent=4))
+		return report
+
+	def module_static_files(self):
+		"""Static files every module gets: license, registration.php and composer.json"""
+		static_files = []
 		context_data = {'module_name': self.module_name, 'license': ''}
+		composer = OrderedDict(self._composer)
 
 		if self.license:
-			self._composer['license'] = self.license.identifier
-			self.add_static_file('', StaticFile('LICENSE.txt', body=self.license.get_text()))
-			self.add_static_file('', StaticFile('COPYING.txt', body=self.license.get_short_text()))
+			composer['license'] = self.license.identifier
+			static_files.append(('', StaticFile('LICENSE.txt', body=self.license.get_text())))
+			static_files.append(('', StaticFile('COPYING.txt', body=self.license.get_short_text())))
 			context_data = {'module_name': self.module_name, 'license': self.license.get_php_docstring()}
 
-		self.add_static_file('.', StaticFile('registration.php', template_file='registration.tmpl',context_data=context_data))
-
-		# Add composer as static file
-		self.add_static_file('', StaticFile('composer.json', body=json.dumps(self._composer, indent=4)))
+		static_files.append(('.', StaticFile('registration.php', template_file='registration.tmpl',context_data=context_data)))
+		static_files.append(('', StaticFile('composer.json', body=json.dumps(composer, indent=4))))
+		return static_files
 
+	def output_files(self):
+		"""Ordered list of (path, file) pairs, paths are relative to the generate root location"""
+		files = []
 		for class_name, phpclass in self._classes.items():
-			phpclass.save(root_location)
+			files.append((class_name.replace('\\', '/') + '.php', phpclass))
+
+		static_files = OrderedDict(self._static_files)
+		for path, static_file in self.module_static_files():
+			static_files.setdefault(os.path.join(path, static_file.file_name), static_file)
+
+		module_files = list(self._graphqlschemas.items()) + list(self._xmls.items()) + list(static_files.items())
+		for path, output_file in module_files:
+			path = os.path.normpath(os.path.join(self.package, self.name, path))
+			files.append((path.replace(os.sep, '/'), output_file))
+		return files
+
+	def _emit_file(self, sink, path, output_file):
+		"""Render a single file in chunks to a stream of the sink"""
+		with sink.open(path) as stream:
+			output_file.write(stream)
+		return None, True
+
+	def _render_file(self, path, output_file, incremental=False):
+		"""Content of a file and its content hash, the hash is only made for incremental runs"""
+		content = output_file.generate()
+		return content, hashlib.sha256(content.encode('utf-8')).hexdigest() if incremental else None
+
+	def _write_content(self, sink, path, rendered, previous_digest=None):
+		"""Write a rendered file unless its content did not change, returns the content hash and if the file was written"""
+		content, digest = rendered
+		if digest is not None and digest == previous_digest and sink.exists(path):
+			return digest, False
+
+		sink.write(path, content)
+		return digest, True
+
+	def _run_tasks(self, function, tasks, workers=None, executor=None, callback=None):
+		"""
+		Call function for every (path, arguments) task and return the results in
+		task order. With workers or an executor the tasks run concurrently and
+		the errors of all tasks are raised together as a GenerateError.
 
-		for graphqlschema_file, graphqlobjecttype in self._graphqlschemas.items():
-			path = os.path.join(location, graphqlschema_file)
-			graphqlobjecttype.save(path)
+		With callback the results are passed to callback(path, result) on the
+		calling thread in task order, its return values are returned instead.
+		"""
+		callback = callback or (lambda path, result: result)
+		if not workers and not executor:
+			return [callback(path, function(*arguments)) for path, arguments in tasks]
 
-		for xml_file, node in self._xmls.items():
-			path = os.path.join(location, xml_file)
-			node.save(path)
+		if not executor:
+			with ThreadPoolExecutor(max_workers=workers) as executor:
+				return self._run_tasks(function, tasks, executor=executor, callback=callback)
 
-		for path, static_file in self._static_files.items():
-			path = os.path.join(location, path)
-			static_file.save(path)
+		futures = [(path, executor.submit(function, *arguments)) for path, arguments in tasks]
+
+		results = []
+		errors = []
+		for path, future in futures:
+			try:
+				results.append(callback(path, future.result()))
+			except Exception as e:
+				errors.append((path, e))
+
+		if errors:
+			raise GenerateError(errors)
+		return results
+
+	def _load_manifest(self, sink, manifest_path):
+		try:
+			return json.loads(sink.read(manifest_path).decode('utf-8'), object_pairs_hook=OrderedDict).get('files', {})
+		except (AttributeError, ValueError):
+			return {}
 
 	def add_composer_require(self, require, version = "*", dev = False):
 		if dev:
@@ -654,12 +1252,14 @@ class Module:
 			self._composer['require'][require] = version
 
 	def add_class(self, phpclass):
+		phpclass = phpclass.writable()
 		root_namespace = '{}\{}'.format(self.package, self.name)
 		if root_namespace not in phpclass.class_namespace:
 			phpclass.class_namespace = '{}\{}'.format(root_namespace, phpclass.class_namespace)
 
 		current_class = self._classes.get(phpclass.class_namespace)
 		if current_class:
+			current_class = current_class.writable()
 			current_class += phpclass
 		else:
 			current_class = phpclass
@@ -671,7 +1271,9 @@ class Module:
 	def add_graphqlschema(self, graphqlschema_file, schema):
 		current_schema = self._graphqlschemas.get(graphqlschema_file)
 		if current_schema:
+			current_schema = current_schema.writable()
 			current_schema += schema
+			self._graphqlschemas[graphqlschema_file] = current_schema
 		else:
 			self._graphqlschemas[graphqlschema_file] = schema
 
@@ -680,6 +1282,7 @@ class Module:
 		if current_xml:
 			if current_xml != node:
 				raise Exception('Cant merge XML nodes root node must be the same')
+			current_xml = self._xmls[xml_file] = current_xml.writable()
 			current_xml.add_nodes(node.nodes)
 		else:
 			self._xmls[xml_file] = node
@@ -689,6 +1292,7 @@ class Module:
 
 		current_staticfile = self._static_files.get(full_name)
 		if current_staticfile:
+			current_staticfile = current_staticfile.writable()
 			current_staticfile += staticfile
 		else:
 			current_staticfile = staticfile
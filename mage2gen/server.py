@@ -0,0 +1,215 @@
+# A Magento 2 module generator library
+# Copyright (C) 2016 Maikel Martens
+#
+# This file is part of Mage2Gen.
+#
+# Mage2Gen is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+Long running generator for editor integrations and other frequent callers.
+The server keeps the snippets and templates loaded and listens on a local
+HTTP port:
+
+	GET  /health                 status and number of loaded snippets
+	GET  /snippets               name, label and description of all snippets
+	POST /generate?format=json   module spec as JSON body, see mage2gen.spec
+
+The generate format is json (a path to content object under "files"), zip
+or tar (a gzip compressed tar stream). Modules are generated in a bounded
+thread pool, requests are refused with 503 when the queue is full and get
+a 504 when generating takes longer than the timeout.
+"""
+import io
+import json
+import socketserver
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from .snippet import snippet_registry
+from .spec import SpecError, build_module
+from .sink import MemorySink, ZipSink, TarSink
+from .template import templates
+from .cache import OutputCache
+from .utils import upperfirst
+
+FORMATS = {
+	'json': 'application/json',
+	'zip': 'application/zip',
+	'tar': 'application/gzip',
+}
+
+class RequestError(Exception):
+
+	def __init__(self, status, message, errors=None):
+		self.status = status
+		self.errors = errors if errors is not None else [message]
+		super().__init__(message)
+
+class GeneratorRequestHandler(BaseHTTPRequestHandler):
+	server_version = 'Mage2Gen'
+
+	def setup(self):
+		# Socket timeout for reading the request and writing the response
+		self.timeout = self.server.request_timeout
+		super().setup()
+
+	def send_body(self, status, content_type, body):
+		self.send_response(status)
+		self.send_header('Content-Type', content_type)
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def send_json(self, status, data):
+		self.send_body(status, FORMATS['json'], json.dumps(data, indent=2).encode('utf-8'))
+
+	def handle_request(self, handler):
+		try:
+			self.send_body(200, *handler())
+		except RequestError as e:
+			self.send_json(e.status, {'errors': e.errors})
+		except Exception as e:
+			self.send_json(500, {'errors': [str(e) or type(e).__name__]})
+
+	def do_GET(self):
+		path = urlsplit(self.path).path
+		if path == '/health':
+			self.handle_request(lambda: (FORMATS['json'], json.dumps(self.server.health()).encode('utf-8')))
+		elif path == '/snippets':
+			self.handle_request(lambda: (FORMATS['json'], json.dumps(self.server.snippets()).encode('utf-8')))
+		else:
+			self.send_json(404, {'errors': ['Not found']})
+
+	def do_POST(self):
+		url = urlsplit(self.path)
+		if url.path != '/generate':
+			self.send_json(404, {'errors': ['Not found']})
+			return
+		output_format = parse_qs(url.query).get('format', ['json'])[0]
+		self.handle_request(lambda: self.server.submit(self.read_spec(), output_format))
+
+	def read_spec(self):
+		try:
+			length = int(self.headers.get('Content-Length', 0))
+		except ValueError:
+			raise RequestError(400, 'Invalid Content-Length')
+		if length > self.server.max_request_size:
+			raise RequestError(413, 'Request body is larger than {} bytes'.format(self.server.max_request_size))
+		try:
+			return json.loads(self.rfile.read(length).decode('utf-8'))
+		except ValueError as e:
+			raise RequestError(400, 'Invalid JSON: {}'.format(e))
+
+	def log_message(self, format, *args):
+		if self.server.verbose:
+			super().log_message(format, *args)
+
+
+class GeneratorServer(socketserver.ThreadingMixIn, HTTPServer):
+	"""
+	HTTP server generating module specs in a pool of workers threads, at
+	most workers modules are generated at the same time and queue_size more
+	are accepted to wait for a worker. Bind to localhost only, the server
+	has no authentication.
+
+	With cache_dir the generated files are kept in an OutputCache of at most
+	cache_size bytes, and specs generated before are answered from it.
+	"""
+	daemon_threads = True
+
+	def __init__(self, address=('127.0.0.1', 8765), workers=4, queue_size=16, timeout=30, max_request_size=1024 * 1024,
+			cache_dir=None, cache_size=256 * 1024 * 1024, verbose=False):
+		super().__init__(address, GeneratorRequestHandler)
+		self.cache = OutputCache(cache_dir, cache_size) if cache_dir else None
+		self.workers = workers
+		self.request_timeout = timeout
+		self.max_request_size = max_request_size
+		self.verbose = verbose
+		self.executor = ThreadPoolExecutor(max_workers=workers)
+		self._slots = threading.BoundedSemaphore(workers + queue_size)
+		self.warm_up()
+
+	def warm_up(self):
+		"""Import all snippets, compute their metadata and load all templates"""
+		for snippet in snippet_registry.all():
+			snippet_registry.metadata(snippet)
+		templates.preload()
+
+	def health(self):
+		return {'status': 'ok', 'snippets': len(snippet_registry.names()), 'workers': self.workers}
+
+	def snippets(self):
+		snippets = []
+		for snippet in snippet_registry.all():
+			metadata = snippet_registry.metadata(snippet)
+			snippets.append({'name': metadata.name.lower(), 'label': metadata.label, 'description': metadata.description.strip()})
+		return snippets
+
+	def submit(self, spec, output_format):
+		"""Generate spec in the worker pool, gives the content type and body"""
+		if output_format not in FORMATS:
+			raise RequestError(400, 'Unknown format {}, use one of: {}'.format(output_format, ', '.join(sorted(FORMATS))))
+		if not self._slots.acquire(blocking=False):
+			raise RequestError(503, 'Too many requests, try again later')
+
+		try:
+			future = self.executor.submit(self.generate, spec, output_format)
+		except Exception:
+			self._slots.release()
+			raise
+		future.add_done_callback(lambda future: self._slots.release())
+
+		try:
+			return FORMATS[output_format], future.result(timeout=self.request_timeout)
+		except TimeoutError:
+			# The worker keeps its slot until generating finished
+			future.cancel()
+			raise RequestError(504, 'Generating took longer than {} seconds'.format(self.request_timeout))
+		except SpecError as e:
+			raise RequestError(422, str(e), e.errors)
+
+	def generate_to(self, spec, sink):
+		if self.cache:
+			self.cache.generate_to(spec, sink)
+		else:
+			build_module(spec).generate_to(sink)
+
+	def generate(self, spec, output_format):
+		if output_format == 'json':
+			sink = MemorySink()
+			self.generate_to(spec, sink)
+			files = {path: content.decode('utf-8') for path, content in sink.files.items()}
+			module_name = '{}_{}'.format(upperfirst(spec['package']), upperfirst(spec['name']))
+			return json.dumps({'module': module_name, 'files': files}, indent=2).encode('utf-8')
+
+		archive = io.BytesIO()
+		with (ZipSink(archive) if output_format == 'zip' else TarSink(archive)) as sink:
+			self.generate_to(spec, sink)
+		return archive.getvalue()
+
+	def server_close(self):
+		super().server_close()
+		self.executor.shutdown(wait=False)
+
+
+def serve(host='127.0.0.1', port=8765, **kwargs):
+	"""Run a GeneratorServer until interrupted"""
+	server = GeneratorServer((host, port), **kwargs)
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
@@ -0,0 +1,194 @@
+# A Magento 2 module generator library
+# Copyright (C) 2016 Maikel Martens
+#
+# This file is part of Mage2Gen.
+#
+# Mage2Gen is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import io
+import os
+import tarfile
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+
+# Rendered chunks are collected and written to disk in blocks of this size
+WRITE_BUFFER_SIZE = 64 * 1024
+
+# Earliest date a zip archive can store
+ZIP_MIN_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+def open_file(path):
+	"""Open a file for writing generated text, creating its folder"""
+	try:
+		os.makedirs(os.path.dirname(path))
+	except Exception:
+		pass
+
+	return open(path, 'w+', encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+
+def write_file(path, content):
+	with open_file(path) as output_file:
+		output_file.write(content)
+
+class SinkFile(io.StringIO):
+	"""Text stream that hands its content to Sink.write when closed without errors"""
+
+	def __init__(self, sink, path):
+		super().__init__()
+		self.sink = sink
+		self.path = path
+
+	def __exit__(self, exc_type, *args):
+		if exc_type is None:
+			self.sink.write(self.path, self.getvalue())
+		self.close()
+
+class Sink:
+	"""
+	Destination for generated module files. Paths are relative to the
+	generate root and use / as separator, content is given as str.
+
+	Sinks can be used as context manager to close them after generating.
+	"""
+
+	def write(self, path, content):
+		raise Exception('Not implemented')
+
+	def open(self, path):
+		"""Text stream for writing a file in chunks, use as context manager"""
+		return SinkFile(self, path)
+
+	def read(self, path):
+		"""Content of an earlier written file as bytes, None if not available"""
+		return None
+
+	def exists(self, path):
+		return False
+
+	def remove(self, path):
+		pass
+
+	def close(self):
+		pass
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+
+class FileSystemSink(Sink):
+	"""Write files to a folder on disk"""
+
+	def __init__(self, root_location):
+		self.root_location = root_location
+
+	def full_path(self, path):
+		return os.path.join(self.root_location, *path.split('/'))
+
+	def write(self, path, content):
+		write_file(self.full_path(path), content)
+
+	def open(self, path):
+		return open_file(self.full_path(path))
+
+	def read(self, path):
+		try:
+			with open(self.full_path(path), 'rb') as output_file:
+				return output_file.read()
+		except OSError:
+			return None
+
+	def exists(self, path):
+		return os.path.exists(self.full_path(path))
+
+	def remove(self, path):
+		try:
+			os.remove(self.full_path(path))
+		except OSError:
+			pass
+
+
+class MemorySink(Sink):
+	"""Keep files in memory, files is an ordered dict of path to UTF-8 encoded bytes"""
+
+	def __init__(self):
+		self.files = OrderedDict()
+
+	def write(self, path, content):
+		self.files[path] = content.encode('utf-8')
+
+	def read(self, path):
+		return self.files.get(path)
+
+	def exists(self, path):
+		return path in self.files
+
+	def remove(self, path):
+		self.files.pop(path, None)
+
+
+class ZipSink(Sink):
+	"""
+	Stream files into a zip archive, file is a path or a writable binary file
+	object. Timestamps are stored in UTC, zip does not support dates before
+	1980 so earlier timestamps are stored as 1980-01-01.
+	"""
+
+	def __init__(self, file, compression=zipfile.ZIP_DEFLATED, timestamp=None):
+		self.archive = zipfile.ZipFile(file, 'w', compression)
+		self.compression = compression
+		self.date_time = max(time.gmtime(timestamp)[:6], ZIP_MIN_DATE_TIME)
+		self._lock = threading.Lock()
+
+	def write(self, path, content):
+		info = zipfile.ZipInfo(path, self.date_time)
+		info.compress_type = self.compression
+		info.external_attr = 0o644 << 16
+		data = content.encode('utf-8')
+		with self._lock:
+			self.archive.writestr(info, data)
+
+	def close(self):
+		self.archive.close()
+
+
+class TarSink(Sink):
+	"""
+	Stream files into a tar archive, file is a path or a writable binary file
+	object. The default mode writes a gzip compressed stream, so the file
+	object does not have to be seekable.
+	"""
+
+	def __init__(self, file, mode='w|gz', timestamp=None):
+		if isinstance(file, str):
+			self.archive = tarfile.open(file, mode.replace('|', ':'))
+		else:
+			self.archive = tarfile.open(fileobj=file, mode=mode)
+		self.timestamp = int(time.time() if timestamp is None else timestamp)
+		self._lock = threading.Lock()
+
+	def write(self, path, content):
+		data = content.encode('utf-8')
+		info = tarfile.TarInfo(path)
+		info.size = len(data)
+		info.mtime = self.timestamp
+		info.mode = 0o644
+		with self._lock:
+			self.archive.addfile(info, io.BytesIO(data))
+
+	def close(self):
+		self.archive.close()
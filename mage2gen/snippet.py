@@ -16,8 +16,13 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 import re
+import copy
+import json
 import inspect
-from collections import namedtuple
+import functools
+import importlib
+import threading
+from collections import namedtuple, OrderedDict
 
 from .utils import upperfirst
 
@@ -48,38 +53,334 @@ class SnippetParam:
 		self.label = label if label else upperfirst(name.replace('_', ' '))
 		self.multiple_choices = multiple_choices
 		self.repeat = repeat
+		self._re_validator = re.compile(regex_validator) if regex_validator else None
+		self._re_depend = [(key, re.compile(regex)) for key, regex in depend.items()] if depend else []
 
 	def name_label(self):
 		return upperfirst(self.name.replace('_', ' '))
 
+	def validation_error(self, value):
+		"""Error message for value, None if value is valid"""
+		if self.required and not value and not (self.yes_no and value is False):
+			return 'This field is required'
+
+		if self._re_validator:
+			values = value if isinstance(value, (list, tuple)) else [value]
+			if not all(self._re_validator.match(str(v)) for v in values):
+				return self.error_message
+		return None
+
 	def validate(self, value):
-		re_validate = re.compile(self.regex_validator)
+		error = self.validation_error(value)
+		if error is not None:
+			raise Exception(error)
+
+	def is_active(self, params):
+		"""True when the values in params match the depend regexes of this param"""
+		return all(regex.match(str(params.get(key, ''))) for key, regex in self._re_depend)
+
+SnippetMetadata = namedtuple('SnippetMetadata', ['name', 'label', 'description', 'params', 'extra_params'])
+
+class SnippetRegistry:
+	"""
+	Snippet classes indexed on lower case name, label and class path. The
+	bundled snippets are indexed from the snippets manifest and imported on
+	first lookup, other snippets are added when their class is created.
+	Names of later registered snippets replace earlier ones, like a dict.
+	"""
+
+	def __init__(self):
+		self._snippets = OrderedDict()
+		self._names = OrderedDict()
+		self._labels = {}
+		self._metadata = {}
+		self._bundled = set()
+		self._manifest_loaded = False
+		self._lock = threading.RLock()
+
+	@staticmethod
+	def class_path(snippet):
+		return '{}.{}'.format(snippet.__module__, snippet.__qualname__)
+
+	def _load_manifest(self):
+		if self._manifest_loaded:
+			return
+		from . import snippets
+		with self._lock:
+			if self._manifest_loaded:
+				return
+			for info in snippets.MANIFEST:
+				path = '{}.{}.{}'.format(snippets.__name__, info.module, info.class_name)
+				self._snippets.setdefault(path, None)
+				self._bundled.add(path)
+				self._names[info.name.lower()] = path
+				self._labels[info.label] = path
+			self._manifest_loaded = True
+
+	def register(self, snippet):
+		self._load_manifest()
+		path = self.class_path(snippet)
+		with self._lock:
+			bundled = path in self._snippets
+			self._snippets[path] = snippet
+			if not bundled:
+				self._names[snippet.name().lower()] = path
+				self._labels[snippet.label()] = path
+
+	def unregister(self, snippet):
+		"""Remove a snippet class that is not bundled, names it replaced are not restored"""
+		self._load_manifest()
+		path = self.class_path(snippet)
+		with self._lock:
+			if path in self._bundled or self._snippets.get(path) is not snippet:
+				return
+			del self._snippets[path]
+			self._metadata.pop(snippet, None)
+			for index in (self._names, self._labels):
+				for key in [key for key, value in index.items() if value == path]:
+					del index[key]
+
+	def spec_name(self, snippet):
+		"""Key for a snippet class in module specs, the name or the class path when the name is taken"""
+		name = snippet.name().lower()
+		return name if self.get(name) is snippet else self.class_path(snippet)
+
+	def _resolve(self, path):
+		snippet = self._snippets[path]
+		if snippet is None:
+			module_name, class_name = path.rsplit('.', 1)
+			snippet = getattr(importlib.import_module(module_name), class_name)
+			self._snippets[path] = snippet
+		return snippet
+
+	def get(self, key, default=None):
+		"""Snippet class for a name (any case), label or class path"""
+		self._load_manifest()
+		path = self._names.get(key.lower()) or self._labels.get(key) or key
+		if path not in self._snippets:
+			return default
+		return self._resolve(path)
+
+	def __getitem__(self, key):
+		snippet = self.get(key)
+		if snippet is None:
+			raise KeyError(key)
+		return snippet
+
+	def __contains__(self, key):
+		self._load_manifest()
+		return key.lower() in self._names or key in self._labels or key in self._snippets
+
+	def names(self):
+		"""Lower case names of all snippets, without importing them"""
+		self._load_manifest()
+		return list(self._names)
+
+	def labels(self):
+		self._load_manifest()
+		return list(self._labels)
+
+	def all(self):
+		"""All snippet classes, bundled snippets first in manifest order"""
+		self._load_manifest()
+		return [self._resolve(path) for path in list(self._snippets)]
+
+	def metadata(self, key):
+		"""SnippetMetadata of a snippet class or key, computed once per class"""
+		snippet = key if isinstance(key, type) else self[key]
+		metadata = self._metadata.get(snippet)
+		if metadata is None:
+			metadata = SnippetMetadata(
+				name=snippet.name(),
+				label=snippet.label(),
+				description=snippet.description,
+				params=snippet.params(),
+				extra_params=snippet.extra_params(),
+			)
+			self._metadata[snippet] = metadata
+		return metadata
+
+
+snippet_registry = SnippetRegistry()
+
+def cached_params(function):
+	"""
+	Classmethod that calls function once per class and returns a copy of the
+	cached list after that, for params() and extra_params().
+	"""
+	cache = {}
+
+	def cached(cls):
+		params = cache.get(cls)
+		if params is None:
+			params = cache[cls] = function(cls)
+		return list(params)
+	cached.__name__ = function.__name__
+	cached.__doc__ = function.__doc__
+	cached.__wrapped__ = function
+	return classmethod(cached)
+
+class SnippetAddCache:
+	"""
+	Memo of snippet add calls, keyed on the snippet class, params, module
+	package and name and the snippet instance state. An entry has the objects
+	the add gave to the module, marked as shared. Replaying it adds the same
+	objects again and modules copy them on write. Holds at most max_entries
+	entries, the default 0 disables the cache.
+	"""
+
+	def __init__(self, max_entries=0):
+		self.max_entries = max_entries
+		self.hits = 0
+		self.misses = 0
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, key):
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None:
+				self.misses += 1
+			else:
+				self.hits += 1
+				self._entries.move_to_end(key)
+			return entry
+
+	def put(self, key, entry):
+		with self._lock:
+			self._entries[key] = entry
+			while len(self._entries) > self.max_entries:
+				self._entries.popitem(last=False)
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+			self.hits = self.misses = 0
 
-		if self.required and not value:
-			raise Exception('This field is required')
 
-		if self.regex_validator and not re_validate.match(value):
-			raise Exception(self.error_message)
+add_cache = SnippetAddCache()
+
+def shared_value(value):
+	return value.share() if hasattr(value, 'share') else value
+
+def snippet_state(snippet):
+	return {key: value for key, value in vars(snippet).items() if key not in ('_module', '_add_calls')}
+
+def memoized_add(snippet, function, args, kwargs, params):
+	"""Call the add function of snippet, or replay the module changes of an identical earlier call"""
+	module = snippet._module
+	try:
+		key = json.dumps([
+			snippet_registry.class_path(type(snippet)), module.package, module.name, params, snippet_state(snippet)
+		], sort_keys=True)
+	except (TypeError, ValueError):
+		key = None
+	if key is None or not snippet.memoize or not add_cache.max_entries:
+		return function(snippet, *args, **kwargs)
+
+	entry = add_cache.get(key)
+	if entry is not None:
+		calls, state = entry
+		for method, call_args in calls:
+			getattr(module, method)(*call_args)
+		snippet.__dict__.update(copy.deepcopy(state))
+		return None
+
+	snippet._add_calls = []
+	try:
+		result = function(snippet, *args, **kwargs)
+		calls = snippet._add_calls
+	finally:
+		snippet._add_calls = None
+	if result is None:
+		add_cache.put(key, (calls, copy.deepcopy(snippet_state(snippet))))
+	return result
+
+def recorded_add(function):
+	"""
+	Wrap the add method of a snippet to record the call in the snippets of
+	its module, see Module.dump. Only the outermost add is recorded, not the
+	add of a parent class or of other snippets used by the snippet.
+
+	Snippets can keep state between add calls, so calls on a second instance
+	of a snippet class in the same module record the instance number.
+	"""
+	signature = inspect.signature(function)
+
+	@functools.wraps(function)
+	def add(self, *args, **kwargs):
+		module = self._module
+		if getattr(module, '_snippet_depth', None) is None or module._snippet_depth:
+			return function(self, *args, **kwargs)
+
+		try:
+			arguments = signature.bind(self, *args, **kwargs).arguments
+		except TypeError:
+			return function(self, *args, **kwargs)
+
+		params = OrderedDict()
+		for name, value in list(arguments.items())[1:]:
+			if signature.parameters[name].kind == inspect.Parameter.VAR_KEYWORD:
+				params.update(value)
+			else:
+				params[name] = value
+		call = OrderedDict([('snippet', snippet_registry.spec_name(type(self)))])
+		instances = module._snippet_instances
+		if self not in instances:
+			instances[self] = sum(1 for snippet in instances if type(snippet) is type(self))
+		if instances[self]:
+			call['instance'] = instances[self]
+		call['params'] = copy.deepcopy(params)
+		extra_params = call['params'].pop('extra_params', None)
+		if extra_params:
+			call['extra_params'] = extra_params
+
+		profile = getattr(module, '_profile', None)
+		module._snippet_depth += 1
+		try:
+			if profile is None:
+				result = memoized_add(self, function, args, kwargs, params)
+			else:
+				with profile.section('snippet', type(self).__name__):
+					result = memoized_add(self, function, args, kwargs, params)
+		finally:
+			module._snippet_depth -= 1
+		module._snippet_calls.append(call)
+		return result
+	return add
 
 class MetaClass(type):
 	snippets = []
 
 	def __new__(cls, clsname, bases, attrs):
+		for name in ('params', 'extra_params'):
+			if isinstance(attrs.get(name), classmethod):
+				attrs[name] = cached_params(attrs[name].__func__)
+		if clsname != 'Snippet' and callable(attrs.get('add')):
+			attrs['add'] = recorded_add(attrs['add'])
 		newclass = super(MetaClass, cls).__new__(cls, clsname, bases, attrs)
 		if clsname != 'Snippet':
 			MetaClass.snippets.append(newclass)
+			snippet_registry.register(newclass)
 		return newclass
 
 class Snippet(metaclass=MetaClass):
 	snippet_label = None
 	description = ''
+	# Results of add are memoized in add_cache, a snippet must only change
+	# the module through the add_* methods and only depend on its params,
+	# the module package and name and its own attributes. Set to False for
+	# snippets that do not.
+	memoize = True
+	_add_calls = None
 
 	def __init__(self, module):
 		self._module = module
 
 	@classmethod
 	def snippets(cls):
-		return type(cls).snippets
+		"""Bundled snippets in manifest order followed by other registered snippets"""
+		return snippet_registry.all()
 
 	@classmethod
 	def label(cls):
@@ -116,25 +417,65 @@ class Snippet(metaclass=MetaClass):
 		"""
 		return []
 
+	@classmethod
+	def validate_all(cls, params):
+		"""
+		Validate the params for add() in one pass, gives a dict of param name
+		to error message for every invalid param. Extra params are read from
+		the extra_params entry, params without a value and without default
+		and params whose depend does not match are skipped.
+		"""
+		errors = OrderedDict()
+		extra_params = params.get('extra_params') or {}
+		for values, snippet_params in ((params, cls.params()), (extra_params, cls.extra_params())):
+			for param in snippet_params:
+				if not isinstance(param, SnippetParam) or not param.is_active(values):
+					continue
+				value = values.get(param.name, param.default)
+				if value is None and not param.required:
+					continue
+				error = param.validation_error(value)
+				if error is not None:
+					errors[param.name] = error
+		return errors
 
 	@property
 	def module_name(self):
 	    return self._module.module_name
 
+	def record_add(self, method, *args):
+		"""
+		Keep the arguments of a module add_* call while memoizing add. Objects are
+		marked as shared after the module took them, so merging into them later
+		copies them instead of changing the cached call.
+		"""
+		if self._add_calls is not None:
+			self._add_calls.append((method, [shared_value(value) for value in args]))
+
 	def add_composer_require(self, require, version = "*", dev = False):
-		return self._module.add_composer_require(require, version, dev)
+		result = self._module.add_composer_require(require, version, dev)
+		self.record_add('add_composer_require', require, version, dev)
+		return result
 
 	def add_class(self, phpclass):
-		return self._module.add_class(phpclass)
+		result = self._module.add_class(phpclass)
+		self.record_add('add_class', phpclass)
+		return result
 
 	def add_graphqlschema(self, graphqschema_file, graphqlschema):
-		return self._module.add_graphqlschema(graphqschema_file, graphqlschema)
+		result = self._module.add_graphqlschema(graphqschema_file, graphqlschema)
+		self.record_add('add_graphqlschema', graphqschema_file, graphqlschema)
+		return result
 
 	def add_xml(self, xml_file, node):
-		return self._module.add_xml(xml_file, node)
+		result = self._module.add_xml(xml_file, node)
+		self.record_add('add_xml', xml_file, node)
+		return result
 
 	def add_static_file(self, path, staticfile):
-		return self._module.add_static_file(path, staticfile)
+		result = self._module.add_static_file(path, staticfile)
+		self.record_add('add_static_file', path, staticfile)
+		return result
 
 	def add(self, *args, **kwargs):
 		raise Exception('Not implemented')
@@ -1,37 +1,74 @@
 # Copyright © Experius All rights reserved.
 # See COPYING.txt for license details.
+"""
+Registry of the bundled snippets. The manifest lists the snippet names and
+labels, a snippet module is only imported on first use of its class, for
+example with `from mage2gen.snippets import ModelSnippet`.
+"""
+import importlib
+from collections import namedtuple, OrderedDict
 
-from .controller import ControllerSnippet
-from .plugin import PluginSnippet
-from .system import SystemSnippet
-from .observer import ObserverSnippet
-from .console import ConsoleSnippet
-from .shipping import ShippingSnippet
-from .language import LanguageSnippet
-from .payment import PaymentSnippet
-from .productattribute import ProductAttributeSnippet
-from .producttype import ProductTypeSnippet
-from .customerattribute import CustomerAttributeSnippet
-from .categoryattribute import CategoryAttributeSnippet
-from .cronjob import CronjobSnippet
-from .crongroup import CrongroupSnippet
-from .unittest import UnitTestSnippet
-from .model import ModelSnippet
-from .api import ApiSnippet
-from .widget import WidgetSnippet
-from .cache import CacheSnippet
-from .configurationtype import ConfigurationTypeSnippet
-from .block import BlockSnippet
-from .helper import HelperSnippet
-from .graphqlendpoint import GraphQlEndpointSnippet
-from .graphqlroutelocator import GraphQlRouteLocatorSnippet
-from .preference import PreferenceSnippet
-from .viewmodel import ViewModelSnippet
-from .companyattribute import CompanyAttributeSnippet
-from .component import ComponentSnippet
-from .saleattribute import SalesAttributeSnippet
-from .eaventity import EavEntitySnippet
-from .eaventityattribute import EavEntityAttributeSnippet
-from .customerdata import CustomerSectionDataSnippet
-from .router import RouterSnippet
-from .pagebuildercontenttype import PageBuilderContentTypeSnippet
+SnippetInfo = namedtuple('SnippetInfo', ['class_name', 'module', 'name', 'label'])
+
+# Bundled snippets in registration order, name and label are the values of
+# Snippet.name() and Snippet.label()
+MANIFEST = [SnippetInfo(*info) for info in (
+	('ControllerSnippet', 'controller', 'Controller', 'Controller'),
+	('PluginSnippet', 'plugin', 'Plugin', 'Plugin'),
+	('SystemSnippet', 'system', 'System', 'System / Config / Setting'),
+	('ObserverSnippet', 'observer', 'Observer', 'Observer / Event'),
+	('ConsoleSnippet', 'console', 'Console', 'Console Command'),
+	('ShippingSnippet', 'shipping', 'Shipping', 'Shipping Method'),
+	('LanguageSnippet', 'language', 'Language', 'Language'),
+	('PaymentSnippet', 'payment', 'Payment', 'Payment Method'),
+	('ProductAttributeSnippet', 'productattribute', 'Productattribute', 'Product Attribute'),
+	('ProductTypeSnippet', 'producttype', 'Producttype', 'Product Type'),
+	('CustomerAttributeSnippet', 'customerattribute', 'Customerattribute', 'Customer Attribute'),
+	('CategoryAttributeSnippet', 'categoryattribute', 'Categoryattribute', 'Category Attribute'),
+	('CronjobSnippet', 'cronjob', 'Cronjob', 'Cronjob'),
+	('CrongroupSnippet', 'crongroup', 'Crongroup', 'Crongroup'),
+	('UnitTestSnippet', 'unittest', 'Unittest', 'Unit Test'),
+	('ModelSnippet', 'model', 'Model', 'Model'),
+	('ApiSnippet', 'api', 'Api', 'Api'),
+	('WidgetSnippet', 'widget', 'Widget', 'Widget'),
+	('CacheSnippet', 'cache', 'Cache', 'Cache'),
+	('ConfigurationTypeSnippet', 'configurationtype', 'Configurationtype', 'Configuration Type'),
+	('BlockSnippet', 'block', 'Block', 'Block'),
+	('HelperSnippet', 'helper', 'Helper', 'Helper'),
+	('GraphQlEndpointSnippet', 'graphqlendpoint', 'Graphqlendpoint', 'GraphQl Endpoint'),
+	('GraphQlRouteLocatorSnippet', 'graphqlroutelocator', 'Graphqlroutelocator', 'GraphQl Url Locator'),
+	('PreferenceSnippet', 'preference', 'Preference', 'Preference / Rewrite'),
+	('ViewModelSnippet', 'viewmodel', 'Viewmodel', 'Viewmodel'),
+	('CompanyAttributeSnippet', 'companyattribute', 'Companyattribute', 'Company Attribute (Magento Commerce)'),
+	('ComponentSnippet', 'component', 'Component', 'Component'),
+	('SalesAttributeSnippet', 'saleattribute', 'Salesattribute', 'Sales Attribute'),
+	('EavEntitySnippet', 'eaventity', 'Eaventity', 'EAV Entity'),
+	('EavEntityAttributeSnippet', 'eaventityattribute', 'Eaventityattribute', 'EAV Attribute (custom)'),
+	('CustomerSectionDataSnippet', 'customerdata', 'Customersectiondata', 'Customer(Section) Data'),
+	('RouterSnippet', 'router', 'Router', 'Router'),
+	('PageBuilderContentTypeSnippet', 'pagebuildercontenttype', 'Pagebuildercontenttype', 'PageBuilder Content Type'),
+)]
+
+_manifest = OrderedDict((info.class_name, info) for info in MANIFEST)
+
+__all__ = list(_manifest)
+
+def load_snippet(class_name):
+	"""Snippet class for a manifest class name, importing its module on first use"""
+	snippet = globals().get(class_name)
+	if snippet is None:
+		module = importlib.import_module('.' + _manifest[class_name].module, __name__)
+		snippet = globals()[class_name] = getattr(module, class_name)
+	return snippet
+
+def load_all():
+	"""All bundled snippet classes in manifest order"""
+	return [load_snippet(class_name) for class_name in _manifest]
+
+def __getattr__(name):
+	if name in _manifest:
+		return load_snippet(name)
+	raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+def __dir__():
+	return sorted(set(globals()) | set(_manifest))
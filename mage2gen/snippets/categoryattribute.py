@@ -4,6 +4,7 @@
 import os, locale
 from .. import Module, Phpclass, Phpmethod, Xmlnode, StaticFile, Snippet, SnippetParam, Readme
 from ..utils import upperfirst
+from ..template import templates
 
 
 class CategoryAttributeSnippet(Snippet):
@@ -158,12 +159,9 @@ class CategoryAttributeSnippet(Snippet):
 
         sort_order = extra_params.get('sort_order', '333') if extra_params.get('sort_order', '333') else '333'
 
-        templatePath = os.path.join(os.path.dirname(__file__), '../templates/attributes/categoryattribute.tmpl')
+        template = templates.get('attributes/categoryattribute.tmpl')
 
-        with open(templatePath, 'rb') as tmpl:
-            template = tmpl.read().decode('utf-8')
-
-        methodBody = template.format(
+        methodBody = template.render(
             attribute_code=attribute_code,
             attribute_label=attribute_label,
             value_type=value_type,
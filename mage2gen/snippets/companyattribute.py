@@ -19,6 +19,7 @@
 
 import os
 from .. import Phpclass, Phpmethod, Xmlnode, Snippet, SnippetParam, Readme
+from ..template import templates
 
 class CompanyAttributeSnippet(Snippet):
 	snippet_label = 'Company Attribute (Magento Commerce)'
@@ -42,12 +43,9 @@ class CompanyAttributeSnippet(Snippet):
 		if not attribute_code:
 			attribute_code = attribute_label.lower().replace(' ','_')[:30]
 
-		templatePath = os.path.join(os.path.dirname(__file__), '../templates/attributes/companyattribute.tmpl')
+		template = templates.get('attributes/companyattribute.tmpl')
 
-		with open(templatePath, 'rb') as tmpl:
-			template = tmpl.read().decode('utf-8')
-
-		methodBody = template.format(
+		methodBody = template.render(
 			attribute_code=attribute_code,
 			attribute_label=attribute_label
 		)
@@ -20,6 +20,7 @@
 import os, locale
 from .. import Module, Phpclass, Phpmethod, Xmlnode, StaticFile, Snippet, SnippetParam, Readme
 from ..utils import upperfirst
+from ..template import templates
 
 class CustomerAttributeSnippet(Snippet):
 	snippet_label = 'Customer Attribute'
@@ -155,12 +156,9 @@ class CustomerAttributeSnippet(Snippet):
 			forms_php_array = None
 
 		template = 'customerattribute.tmpl' if customer_entity=='customer' else 'customeraddressattribute.tmpl'
-		templatePath = os.path.join(os.path.dirname(__file__), '../templates/attributes/'+template)
+		template = templates.get('attributes/' + template)
 
-		with open(templatePath, 'rb') as tmpl:
-			template = tmpl.read().decode('utf-8')
-
-		methodBody = template.format(
+		methodBody = template.render(
 			attribute_code=attribute_code,
 			attribute_label=attribute_label,
 			value_type=value_type,
@@ -18,6 +18,7 @@
 import os, locale
 from .. import Module, Phpclass, Phpmethod, Xmlnode, StaticFile, Snippet, SnippetParam, Readme
 from ..utils import upperfirst
+from ..template import templates
 
 class EavEntityAttributeSnippet(Snippet):
 	snippet_label = 'EAV Attribute (custom)'
@@ -92,14 +93,11 @@ class EavEntityAttributeSnippet(Snippet):
 		else:
 			source_model = "''"
 
-		templatePath = os.path.join(os.path.dirname(__file__), '../templates/attributes/eavattribute.tmpl')
-
-		with open(templatePath, 'rb') as tmpl:
-			template = tmpl.read().decode('utf-8')
+		template = templates.get('attributes/eavattribute.tmpl')
 
 		options_php_array_string = options_php_array_string
 
-		methodBody = template.format(
+		methodBody = template.render(
 			entity_type=entity_type,
 			attribute_code=attribute_code,
 			attribute_label=attribute_label,
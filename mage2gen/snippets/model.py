@@ -30,9 +30,8 @@ class InterfaceClass(Phpclass):
 
 class InterfaceMethod(Phpmethod):
 
-	def __init__(self, *args, **kwargs):
-		super().__init__(*args, **kwargs)
-		self.template_file = os.path.join(TEMPLATE_DIR,'interfacemethod.tmpl')
+	template_file = os.path.join(TEMPLATE_DIR,'interfacemethod.tmpl')
+	__slots__ = ()
 
 class ModelSnippet(Snippet):
 	description = """
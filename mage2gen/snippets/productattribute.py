@@ -4,6 +4,7 @@
 import os, locale
 from .. import Module, Phpclass, Phpmethod, Xmlnode, StaticFile, Snippet, SnippetParam, Readme
 from ..utils import upperfirst
+from ..template import templates
 
 class ProductAttributeSnippet(Snippet):
 	snippet_label = 'Product Attribute'
@@ -98,10 +99,7 @@ class ProductAttributeSnippet(Snippet):
 		else:
 			source_model = "''"
 
-		templatePath = os.path.join(os.path.dirname(__file__), '../templates/attributes/productattribute.tmpl')
-
-		with open(templatePath, 'rb') as tmpl:
-			template = tmpl.read().decode('utf-8')
+		template = templates.get('attributes/productattribute.tmpl')
 
 		is_swatch_option = frontend_input == 'swatch_visual' or frontend_input == 'swatch_text'
 
@@ -112,7 +110,7 @@ class ProductAttributeSnippet(Snippet):
 		else:
 			options_php_array_string = options_php_array_string
 
-		methodBody = template.format(
+		methodBody = template.render(
 			attribute_code=attribute_code,
 			attribute_label=attribute_label,
 			value_type=value_type,
@@ -19,6 +19,7 @@
 import os, locale
 from .. import Module, Phpclass, Phpmethod, Xmlnode, StaticFile, Snippet, SnippetParam, Readme
 from ..utils import upperfirst
+from ..template import templates
 
 
 class ProductTypeSnippet(Snippet):
@@ -128,12 +129,9 @@ class ProductTypeSnippet(Snippet):
 
         self.add_xml('etc/product_types.xml', product_type_xml)
 
-        templatePath = os.path.join(os.path.dirname(__file__), '../templates/producttype.tmpl')
+        template = templates.get('producttype.tmpl')
 
-        with open(templatePath, 'rb') as tmpl:
-            template = tmpl.read().decode('utf-8')
-
-        methodBody = template.format(
+        methodBody = template.render(
             product_type_class_name="\{}".format(product_type_class_name)
         )
 
@@ -0,0 +1,140 @@
+# A Magento 2 module generator library
+# Copyright (C) 2016 Maikel Martens
+#
+# This file is part of Mage2Gen.
+#
+# Mage2Gen is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+Module spec files describe a module and the snippets to add to it, so
+modules can be generated without the interactive console:
+
+	{
+		"package": "Saatva",
+		"name": "Blog",
+		"description": "Blog posts",
+		"snippets": [
+			{"snippet": "model", "params": {"model_name": "post", "field_name": "title"}}
+		]
+	}
+
+Entries can have the extra_params of the snippet next to params, and an
+instance number to add with a separate instance of the snippet class. The
+optional "version" is the spec format version and "license" is a license
+as given by mage2gen.license.dump_license. Module.dump gives the spec of a
+module and Module.load_module builds the module again.
+
+A spec file holds one module or a list of modules under "modules". Specs
+are read from JSON, or from YAML when PyYAML is installed.
+"""
+import inspect
+import json
+import os
+
+from .module import Module, SPEC_VERSION, snippet_call_params
+from .license import LICENSES
+from .snippet import snippet_registry
+
+try:
+	import yaml
+except ImportError:
+	yaml = None
+
+class SpecError(Exception):
+
+	def __init__(self, errors):
+		self.errors = errors
+		super().__init__('Invalid module spec:\n{}'.format('\n'.join(errors)))
+
+def load_spec(path):
+	"""Read a spec file, gives the list of module specs in it"""
+	with open(path, encoding='utf-8') as spec_file:
+		if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+			if yaml is None:
+				raise SpecError(['{}: reading YAML specs requires PyYAML'.format(path)])
+			try:
+				data = yaml.safe_load(spec_file)
+			except yaml.YAMLError as e:
+				raise SpecError(['{}: {}'.format(path, e)])
+		else:
+			try:
+				data = json.load(spec_file)
+			except ValueError as e:
+				raise SpecError(['{}: {}'.format(path, e)])
+
+	if isinstance(data, dict) and 'modules' in data:
+		data = data['modules']
+	return data if isinstance(data, list) else [data]
+
+def validate_spec(spec):
+	"""Gives a list with every error in a module spec, empty when the spec is valid"""
+	if not isinstance(spec, dict):
+		return ['Module spec must be an object']
+
+	errors = []
+	if spec.get('version', SPEC_VERSION) != SPEC_VERSION:
+		return ['Unsupported spec version {}, expected {}'.format(spec['version'], SPEC_VERSION)]
+
+	for key in ('package', 'name'):
+		if not spec.get(key) or not isinstance(spec[key], str):
+			errors.append('{} is required'.format(key))
+
+	license = spec.get('license')
+	if license is not None and not isinstance(license, dict):
+		errors.append('license must be an object')
+	elif license and license.get('identifier') not in LICENSES and 'text' not in license:
+		errors.append('license {} is unknown and has no text'.format(license.get('identifier')))
+
+	snippets = spec.get('snippets', [])
+	if not isinstance(snippets, list):
+		return errors + ['snippets must be a list']
+
+	for index, entry in enumerate(snippets):
+		prefix = 'snippets[{}]'.format(index)
+		if not isinstance(entry, dict) or not isinstance(entry.get('snippet'), str):
+			errors.append('{}: snippet name is required'.format(prefix))
+			continue
+
+		snippet_class = snippet_registry.get(entry['snippet'])
+		if snippet_class is None:
+			errors.append('{}: unknown snippet {}'.format(prefix, entry['snippet']))
+			continue
+
+		if not isinstance(entry.get('instance', 0), int) or entry.get('instance', 0) < 0:
+			errors.append('{}: instance must be a number of 0 or more'.format(prefix))
+			continue
+		if not isinstance(entry.get('params', {}), dict) or not isinstance(entry.get('extra_params', {}), (dict, type(None))):
+			errors.append('{}: params and extra_params must be objects'.format(prefix))
+			continue
+		params = snippet_call_params(entry)
+
+		try:
+			inspect.signature(snippet_class.add).bind(None, **params)
+		except TypeError as e:
+			errors.append('{} ({}): {}'.format(prefix, entry['snippet'], e))
+			continue
+
+		for name, error in snippet_class.validate_all(params).items():
+			errors.append('{} ({}): {}: {}'.format(prefix, entry['snippet'], name, error))
+	return errors
+
+def build_module(spec, profile=None):
+	"""
+	Module with the snippets of a spec added in order, raises SpecError for
+	an invalid spec. With profile the snippet adds are recorded in it.
+	"""
+	errors = validate_spec(spec)
+	if errors:
+		raise SpecError(errors)
+
+	return Module.load_module(spec, profile=profile)
@@ -0,0 +1,188 @@
+# A Magento 2 module generator library
+# Copyright (C) 2016 Maikel Martens
+#
+# This file is part of Mage2Gen.
+#
+# Mage2Gen is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os
+import string
+import threading
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), 'templates')
+
+# PSR-2 indents code with four spaces, templates and snippets use tabs
+PSR2_INDENT = '    '
+
+_formatter = string.Formatter()
+
+class Chunks:
+	"""
+	Template value rendered on demand, iterating gives the chunks of the value
+	and str() joins them. Used to stream large values like the methods of a
+	class without building them as one string.
+
+	Set code_formatted when the chunks are already rendered with render_code,
+	so their tabs are not expanded a second time.
+	"""
+
+	def __init__(self, function, *args, code_formatted=False):
+		self.function = function
+		self.args = args
+		self.code_formatted = code_formatted
+
+	def __iter__(self):
+		return iter(self.function(*self.args))
+
+	def __str__(self):
+		return ''.join(self)
+
+	def __format__(self, format_spec):
+		return format(str(self), format_spec)
+
+
+class Template:
+	"""
+	A template file parsed once into literal text and replacement fields.
+
+	Rendering gives the same result as calling str.format on the template
+	source, templates using conversions, format specs or positional fields
+	fall back to str.format.
+
+	render_code gives the same result as render followed by replacing every
+	tab with four spaces, but the literal text is expanded once when the
+	template is parsed and each value is expanded once while rendering.
+	"""
+
+	def __init__(self, path, source, mtime=None):
+		self.path = path
+		self.source = source
+		self.mtime = mtime
+		self.parts = []
+		self.code_parts = []
+		self.simple = True
+
+		for literal, field_name, format_spec, conversion in _formatter.parse(source):
+			if field_name is not None and (format_spec or conversion or not field_name.isidentifier()):
+				self.simple = False
+			self.parts.append((literal, field_name))
+			self.code_parts.append((literal.replace('\t', PSR2_INDENT), field_name))
+
+	@classmethod
+	def load(cls, path):
+		with open(path, 'rb') as tmpl:
+			mtime = os.fstat(tmpl.fileno()).st_mtime
+			source = tmpl.read().decode('utf-8')
+		return cls(path, source, mtime)
+
+	def render(self, **context):
+		if not self.simple:
+			return self.source.format(**context)
+
+		output = []
+		for literal, field_name in self.parts:
+			output.append(literal)
+			if field_name is not None:
+				value = context[field_name]
+				output.append(value if type(value) is str else format(value))
+		return ''.join(output)
+
+	def render_code(self, **context):
+		return ''.join(self.render_code_chunks(**context))
+
+	def render_code_chunks(self, **context):
+		"""Render chunks of PSR-2 code, tabs are replaced by four spaces"""
+		if not self.simple:
+			yield self.source.format(**context).replace('\t', PSR2_INDENT)
+			return
+
+		for literal, field_name in self.code_parts:
+			if literal:
+				yield literal
+			if field_name is not None:
+				value = context[field_name]
+				if isinstance(value, Chunks):
+					if value.code_formatted:
+						yield from value
+					else:
+						for chunk in value:
+							yield chunk.replace('\t', PSR2_INDENT)
+				else:
+					yield (value if type(value) is str else format(value)).replace('\t', PSR2_INDENT)
+
+	def render_chunks(self, **context):
+		"""Render the template as a sequence of chunks, Chunks values are not joined"""
+		if not self.simple:
+			yield self.source.format(**context)
+			return
+
+		for literal, field_name in self.parts:
+			if literal:
+				yield literal
+			if field_name is not None:
+				value = context[field_name]
+				if isinstance(value, Chunks):
+					yield from value
+				else:
+					yield value if type(value) is str else format(value)
+
+
+class TemplateRegistry:
+	"""
+	Process wide store of loaded templates, every template file is read and
+	parsed once. With auto_reload the file mtime is checked on each lookup
+	so changed templates are picked up during development.
+	"""
+
+	def __init__(self, template_dir=TEMPLATE_DIR, auto_reload=False):
+		self.template_dir = template_dir
+		self.auto_reload = auto_reload
+		self._templates = {}
+		self._lock = threading.Lock()
+
+	def get(self, template_file):
+		path = os.path.join(self.template_dir, template_file)
+		template = self._templates.get(path)
+
+		if template and self.auto_reload:
+			try:
+				if os.stat(path).st_mtime != template.mtime:
+					template = None
+			except OSError:
+				template = None
+
+		if not template:
+			with self._lock:
+				template = Template.load(path)
+				self._templates[path] = template
+		return template
+
+	def render(self, template_file, **context):
+		return self.get(template_file).render(**context)
+
+	def preload(self):
+		"""Load every .tmpl file in the template folder, gives the number of templates"""
+		count = 0
+		for root, dirs, file_names in os.walk(self.template_dir):
+			for file_name in file_names:
+				if file_name.endswith('.tmpl'):
+					self.get(os.path.relpath(os.path.join(root, file_name), self.template_dir))
+					count += 1
+		return count
+
+	def clear(self):
+		with self._lock:
+			self._templates.clear()
+
+
+templates = TemplateRegistry(auto_reload=bool(os.environ.get('MAGE2GEN_TEMPLATE_RELOAD')))
@@ -15,6 +15,7 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
+import sys
 import string
 
 
@@ -34,3 +35,17 @@ def upperfirst(word):
 def lowerfirst(word):
 	return word[0].lower() + word[1:]
 
+def merge_unique(*iterables):
+	"""List of the items of all iterables without duplicates, in first seen order"""
+	seen = set()
+	items = []
+	for iterable in iterables:
+		for item in iterable:
+			if item not in seen:
+				seen.add(item)
+				items.append(item)
+	return items
+
+def intern_value(value):
+	"""Interned value when value is a str, repeated names and values are then stored once"""
+	return sys.intern(value) if type(value) is str else value
@@ -18,6 +18,9 @@ setup(
 	classifiers=[
         'License :: OSI Approved :: GNU General Public License v3 (GPLv3)',
         'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
         'Topic :: Software Development :: Code Generators',
 	],
 	author = 'Maikel Martens',
@@ -26,5 +29,6 @@ setup(
 	url = 'https://github.com/JPinkstonSaatva/Mage2Gen',
 	download_url = 'https://github.com/krukas/Mage2Gen/releases/tag/2.3.3',
 	keywords = ['Magento', 'Magento2', 'module', 'generator', 'mage2gen'],
+	python_requires='>=3.8',
 	install_requires=[],
 )
@@ -1,6 +1,42 @@
 #!/usr/bin/env python3
+"""
+Run all tests. With --batch the modules of the snippet tests are generated
+into one tree and checked with a single phpcs run after the suite, or one
+run per process with --processes. MAGE2GEN_PHPCS=python checks them with the
+pure Python PSR-2 check, which is also used when php is not installed.
+"""
+import argparse
+import os
+import sys
 import unittest
 
+TESTS_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_PATH))
+
+from tests import utils
+
 if __name__ == "__main__":
-	testsuite = unittest.TestLoader().discover('.')
-	unittest.TextTestRunner(verbosity=1).run(testsuite)
+	parser = argparse.ArgumentParser(description='Run the mage2gen tests')
+	parser.add_argument('--batch', action='store_true', help='Check the code style of all generated modules at once')
+	parser.add_argument('--processes', type=int, default=1, help='Number of phpcs processes for --batch')
+	args = parser.parse_args()
+
+	batch = utils.BatchSniffer(args.processes) if args.batch else None
+	utils.CodeSniffer.batch = batch
+
+	testsuite = unittest.TestLoader().discover(TESTS_PATH)
+	result = unittest.TextTestRunner(verbosity=1).run(testsuite)
+	success = result.wasSuccessful()
+
+	if batch:
+		try:
+			errors = batch.run()
+		finally:
+			batch.cleanup()
+		for name, file_errors in errors.items():
+			print('CODE STYLE: {}{}'.format(name, utils.CodeSniffer.format_errors(file_errors)))
+		print('Checked {} modules with {}, {} with code style errors'.format(
+			len(batch.entries), utils.CodeSniffer.engine(), len(errors)))
+		success = success and not errors
+
+	sys.exit(0 if success else 1)
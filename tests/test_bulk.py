@@ -0,0 +1,72 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from context import mage2gen
+from mage2gen.bulk import load_manifest, generate_bulk
+from mage2gen.spec import SpecError
+from test_module import read_tree
+
+SAATVA2GEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'saatva2gen')
+
+def brand_spec(name):
+	return {'package': 'Package', 'name': name, 'snippets': [
+		{'snippet': 'model', 'params': {'model_name': 'brand', 'field_name': 'name', 'web_api': True}},
+		{'snippet': 'cache', 'params': {'name': name.lower()}},
+	]}
+
+class TestBulk(unittest.TestCase):
+
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def write_manifest(self, specs):
+		path = os.path.join(self.path, 'manifest.jsonl')
+		with open(path, 'w') as manifest:
+			manifest.write('# brands\n\n')
+			for spec in specs:
+				manifest.write(json.dumps(spec) + '\n')
+		return path
+
+	def test_load_manifest(self):
+		specs = [brand_spec('First'), brand_spec('Second')]
+		self.assertEqual(load_manifest(self.write_manifest(specs)), specs)
+
+		with open(os.path.join(self.path, 'broken.jsonl'), 'w') as manifest:
+			manifest.write('{}\n{\n')
+		with self.assertRaisesRegex(SpecError, 'broken.jsonl:2'):
+			load_manifest(os.path.join(self.path, 'broken.jsonl'))
+
+	def test_generate_bulk(self):
+		specs = [brand_spec('Brand{}'.format(index)) for index in range(4)]
+		os.mkdir(os.path.join(self.path, 'pool'))
+		os.mkdir(os.path.join(self.path, 'serial'))
+		results = generate_bulk(specs, os.path.join(self.path, 'pool'), processes=2)
+		serial = generate_bulk(specs, os.path.join(self.path, 'serial'), processes=1)
+
+		self.assertEqual([(r.index, r.module_name, r.error) for r in results],
+			[(index, 'Package_Brand{}'.format(index), None) for index in range(4)])
+		self.assertTrue(all(r.seconds > 0 for r in results + serial))
+		self.assertEqual(read_tree(os.path.join(self.path, 'pool')), read_tree(os.path.join(self.path, 'serial')))
+
+	def test_generate_bulk_failures(self):
+		specs = [brand_spec('Brand'), brand_spec('brand'), {'package': 'Package', 'name': 'Broken', 'snippets': [{'snippet': 'unknown'}]}]
+		results = generate_bulk(specs, self.path, processes=2)
+
+		self.assertIsNone(results[0].error)
+		self.assertIn('already in the manifest', results[1].error)
+		self.assertIn('unknown snippet', results[2].error)
+		self.assertFalse(os.path.exists(os.path.join(self.path, 'Package', 'Broken')))
+
+	def test_bulk_command(self):
+		output = os.path.join(self.path, 'output')
+		manifest = self.write_manifest([brand_spec('First'), brand_spec('Second')])
+		subprocess.check_call([sys.executable, SAATVA2GEN, 'bulk', '-q', '-j', '2', '-o', output, manifest])
+
+		self.assertEqual(sorted(os.listdir(os.path.join(output, 'Package'))), ['First', 'Second'])
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from context import mage2gen
+from mage2gen.cache import OutputCache, spec_key
+from mage2gen.module import MANIFEST_FILE
+from mage2gen.sink import MemorySink
+from mage2gen.spec import SpecError, build_module
+
+SPEC = {
+	'package': 'Package',
+	'name': 'Name',
+	'snippets': [{'snippet': 'model', 'params': {'model_name': 'test', 'field_name': 'name', 'web_api': True}}],
+}
+
+class TestCache(unittest.TestCase):
+
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+		self.cache = OutputCache(self.path)
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def generate(self, spec):
+		sink = MemorySink()
+		hit = self.cache.generate_to(spec, sink)
+		return hit, sink.files
+
+	def test_spec_key(self):
+		reordered = {'snippets': SPEC['snippets'], 'name': 'Name', 'package': 'Package', 'version': 1}
+		self.assertEqual(spec_key(SPEC), spec_key(reordered))
+		self.assertNotEqual(spec_key(SPEC), spec_key(dict(SPEC, description='Other')))
+
+	def test_generate_from_cache(self):
+		expected = MemorySink()
+		build_module(SPEC).generate_to(expected)
+
+		self.assertEqual(self.generate(SPEC), (False, expected.files))
+		with mock.patch('mage2gen.cache.build_module', side_effect=AssertionError('Snippets executed')):
+			self.assertEqual(self.generate(SPEC), (True, expected.files))
+
+	def test_invalid_spec(self):
+		with self.assertRaises(SpecError):
+			self.generate({'package': 'Package'})
+		self.assertEqual(self.cache.entries(), [])
+
+	def test_evict_least_recently_used(self):
+		files = {'file.txt': 'x' * 1000}
+		for index, key in enumerate(['first', 'second', 'third']):
+			self.cache.put(key, files)
+			os.utime(self.cache.entry_path(key), (1000000000 + index, 1000000000 + index))
+		self.cache.get('first')
+
+		self.cache.max_size = self.cache.size() - 1
+		self.cache.evict()
+		self.assertIsNone(self.cache.get('second'))
+		self.assertEqual(self.cache.get('first'), files)
+		self.assertEqual(self.cache.get('third'), files)
+
+	def test_generate_incremental(self):
+		expected = MemorySink()
+		build_module(SPEC).generate_to(expected, incremental=True)
+		self.generate(SPEC)
+
+		sink = MemorySink()
+		self.assertTrue(self.cache.generate_to(SPEC, sink, workers=2, incremental=True))
+		self.assertEqual(sink.files, expected.files)
+
+		sink.files['Package/Name/Model/Test.php'] = b'<?php // edited'
+		written = []
+		sink.write = lambda path, content: written.append(path)
+		self.cache.generate_to(SPEC, sink, incremental=True)
+		self.assertEqual(written, ['Package/Name/' + MANIFEST_FILE])
+		self.assertEqual(sink.files['Package/Name/Model/Test.php'], b'<?php // edited')
@@ -0,0 +1,76 @@
+import os
+import unittest
+from unittest import mock
+from context import mage2gen
+from mage2gen.snippets import ModelSnippet, SystemSnippet
+from tests import utils
+
+BAD_SOURCE = '''<?php
+namespace Package\\Name;
+use Magento\\Framework\\DataObject;
+class Test {
+	public function test() {
+        $value = 'TRUE if(';
+        if($value === NULL) { // FALSE
+            return TRUE;
+        }else {
+            return false;
+        }
+    }
+}
+?>'''
+
+class TestCodeSniffer(unittest.TestCase):
+
+	def sources(self, source):
+		return [(message['line'], message['source'].rsplit('.', 2)[1]) for message in utils.Psr2Check().check_source(source)]
+
+	def test_psr2_check(self):
+		self.assertEqual(self.sources(BAD_SOURCE), [
+			(2, 'NamespaceDeclaration'),
+			(3, 'UseDeclaration'),
+			(4, 'ClassDeclaration'),
+			(5, 'DisallowTabIndent'),
+			(5, 'MultiLineFunctionDeclaration'),
+			(7, 'ControlSignature'),
+			(7, 'LowerCaseConstant'),
+			(8, 'LowerCaseConstant'),
+			(9, 'ControlSignature'),
+			(14, 'ClosingTag'),
+			(14, 'EndFileNewline'),
+		])
+		self.assertEqual(self.sources('<?php\n\nReturn [];  \n\n'), [(3, 'LowerCaseKeyword'), (3, 'SuperfluousWhitespace'), (4, 'EndFileNewline')])
+		self.assertEqual(self.sources('<?php\n\n$text = "a\\"NULL\\\\";\n/* if(\nTRUE */\n'), [])
+
+	def test_batch(self):
+		batch = utils.BatchSniffer(processes=2)
+		try:
+			for name in ('first', 'second', 'third'):
+				module = mage2gen.Module(package='Package', name='Name')
+				ModelSnippet(module).add(model_name='test', field_name='name')
+				SystemSnippet(module).add(tab='test', section='test', group='test', field='test')
+				path = batch.add(name, module)
+			with open(os.path.join(path, 'Package', 'Name', 'Broken.php'), 'w') as php_file:
+				php_file.write('<?php\n\nreturn NULL;\n')
+
+			with mock.patch.dict(os.environ, {'MAGE2GEN_PHPCS': 'python'}):
+				self.assertEqual(len(batch.chunks()), 2)
+				errors = batch.run()
+		finally:
+			batch.cleanup()
+
+		broken = os.path.join('Package', 'Name', 'Broken.php')
+		self.assertEqual([message['line'] for message in errors['third'][broken]], [3])
+		self.assertNotIn(broken, errors.get('first', {}))
+		self.assertNotIn(broken, errors.get('second', {}))
+		self.assertFalse(os.path.exists(batch.path))
+
+	def test_generate_and_test_batch(self):
+		module = mage2gen.Module(package='Package', name='Name')
+		batch, utils.CodeSniffer.batch = utils.CodeSniffer.batch, utils.BatchSniffer()
+		try:
+			self.assertTrue(utils.CodeSniffer.generate_and_test(module, test=self))
+			self.assertEqual([name for name, args in utils.CodeSniffer.batch.entries.values()], [self.id()])
+		finally:
+			utils.CodeSniffer.batch.cleanup()
+			utils.CodeSniffer.batch = batch
@@ -0,0 +1,82 @@
+import json
+import unittest
+from context import mage2gen
+from mage2gen.instrument import Profile
+from mage2gen.sink import MemorySink
+from mage2gen.snippets import ModelSnippet, SystemSnippet
+
+class TestInstrument(unittest.TestCase):
+
+	def create_module(self, module):
+		ModelSnippet(module).add(model_name='test', field_name='name')
+		SystemSnippet(module).add(tab='test', section='test', group='test', field='test')
+
+	def generate(self, module, **kwargs):
+		sink = MemorySink()
+		module.generate_to(sink, **kwargs)
+		return sink.files
+
+	def test_profile(self):
+		module = mage2gen.Module(package='Package', name='Name')
+		with module.profile() as profile:
+			self.create_module(module)
+			files = self.generate(module, workers=2)
+
+		stats = {(stat.category, stat.name): stat for stat in profile.stats.values()}
+		self.assertEqual(stats[('snippet', 'ModelSnippet')].count, 1)
+		self.assertGreater(stats[('merge', 'add_xml')].count, 1)
+		self.assertEqual(stats[('write', 'Package/Name/etc/module.xml')].bytes, len(files['Package/Name/etc/module.xml']))
+		self.assertEqual(sum(stat.bytes for stat in stats.values() if stat.category == 'write'), sum(map(len, files.values())))
+		self.assertEqual(list(profile.phases()), ['add', 'merge', 'render', 'write'])
+		self.assertGreater(stats[('snippet', 'ModelSnippet')].seconds, stats[('snippet', 'ModelSnippet')].self_seconds)
+
+		data = json.loads(profile.to_json())
+		self.assertEqual(data['version'], 1)
+		self.assertEqual(len(data['stats']), len(profile.stats))
+
+		folded = profile.to_folded().splitlines()
+		self.assertIn('snippet:ModelSnippet;merge:add_class', [line.rsplit(' ', 1)[0] for line in folded])
+		self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in folded))
+
+	def test_profile_streams(self):
+		opened = []
+		class StreamSink(MemorySink):
+			def open(self, path):
+				opened.append(path)
+				return super().open(path)
+
+		module = mage2gen.Module(package='Package', name='Name')
+		self.create_module(module)
+		sink = StreamSink()
+		with module.profile() as profile:
+			module.generate_to(sink)
+
+		self.assertEqual(opened, list(sink.files))
+		writes = {stat.name: stat for stat in profile.stats.values() if stat.category == 'write'}
+		self.assertEqual(set(writes), set(sink.files))
+		self.assertTrue(all(writes[path].bytes == len(content) and writes[path].count == 1 for path, content in sink.files.items()))
+
+	def test_profile_off(self):
+		module = mage2gen.Module(package='Package', name='Name')
+		with module.profile():
+			self.create_module(module)
+
+		self.assertIsNone(module._profile)
+		self.assertNotIn('add_xml', vars(module))
+		self.assertNotIn('_emit_file', vars(module))
+
+		other = mage2gen.Module(package='Package', name='Name')
+		self.create_module(other)
+		self.assertEqual(self.generate(module), self.generate(other))
+
+	def test_load_module(self):
+		module = mage2gen.Module(package='Package', name='Name')
+		self.create_module(module)
+		records = []
+
+		profile = Profile(on_record=lambda *record: records.append(record))
+		loaded = mage2gen.Module.load_module(module.dump(), profile=profile)
+
+		self.assertIsNone(loaded._profile)
+		self.assertIn(('snippet', 'SystemSnippet'), profile.stats)
+		self.assertEqual(len(records), sum(stat.count for stat in profile.stats.values()))
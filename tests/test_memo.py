@@ -0,0 +1,120 @@
+import unittest
+from context import mage2gen
+from mage2gen.sink import MemorySink
+from mage2gen.snippet import add_cache, SnippetAddCache
+from mage2gen.snippets import ModelSnippet, EavEntitySnippet, SystemSnippet, ControllerSnippet
+from tests import utils
+
+class StatefulSnippet(mage2gen.Snippet):
+	memoize = False
+
+	def add(self, name):
+		self.add_xml('etc/di.xml', mage2gen.Xmlnode('config', nodes=[
+			mage2gen.Xmlnode('preference', attributes={'for': name, 'type': name + 'Impl'}),
+		]))
+
+utils.unregister_snippet(StatefulSnippet)
+
+class TestMemo(unittest.TestCase):
+
+	def setUp(self):
+		add_cache.clear()
+		self.max_entries = add_cache.max_entries
+		add_cache.max_entries = 256
+
+	def tearDown(self):
+		add_cache.max_entries = self.max_entries
+		add_cache.clear()
+
+	def create_module(self):
+		module = mage2gen.Module(package='Package', name='Name', description='Description')
+		ModelSnippet(module).add(model_name='test', field_name='name', web_api=True)
+		model = ModelSnippet(module)
+		model.add(model_name='other', field_name='name')
+		model.add(model_name='third', field_name='code')
+		EavEntitySnippet(module).add(entity_name='brand', adminhtml_grid=True, adminhtml_form=True, web_api=True)
+		SystemSnippet(module).add(tab='test', section='test', group='test', field='test')
+		ControllerSnippet(module).add(frontname='test', section='index', action='ajax', ajax=True)
+		return module
+
+	def generate(self, module):
+		sink = MemorySink()
+		module.generate_to(sink)
+		return sink.files
+
+	def test_replay_equals_add(self):
+		add_cache.max_entries = 0
+		expected = self.generate(self.create_module())
+		self.assertEqual((add_cache.hits, add_cache.misses), (0, 0))
+
+		add_cache.max_entries = 256
+		self.assertEqual(self.generate(self.create_module()), expected)
+		self.assertEqual((add_cache.hits, add_cache.misses), (0, 6))
+		self.assertEqual(self.generate(self.create_module()), expected)
+		self.assertEqual((add_cache.hits, add_cache.misses), (6, 6))
+
+	def test_disabled_by_default(self):
+		self.assertEqual(SnippetAddCache().max_entries, 0)
+
+		add_cache.max_entries = 0
+		module = mage2gen.Module(package='Package', name='Name')
+		ModelSnippet(module).add(model_name='test', field_name='name')
+		self.assertFalse(any(phpclass._shared for phpclass in module._classes.values()))
+
+		# Memoized adds keep the objects they added instead of copies, and mark them shared
+		add_cache.max_entries = 256
+		ModelSnippet(module).add(model_name='other', field_name='name')
+		self.assertTrue(module._classes['Package\\Name\\Model\\Other']._shared)
+
+	def test_snippet_state_in_key(self):
+		module = mage2gen.Module(package='Package', name='Name')
+		model = ModelSnippet(module)
+		model.add(model_name='test', field_name='name')
+		model.add(model_name='test', field_name='name')
+		self.assertEqual(add_cache.misses, 2)
+
+		other = mage2gen.Module(package='Other', name='Name')
+		ModelSnippet(other).add(model_name='test', field_name='name')
+		self.assertEqual(add_cache.misses, 3)
+		self.assertIn('Other\\Name\\Model\\Test', other._classes)
+
+	def test_replay_does_not_change_cache(self):
+		expected = self.generate(self.create_module())
+
+		module = self.create_module()
+		SystemSnippet(module).add(tab='test', section='test', group='test', field='other')
+		ModelSnippet(module).add(model_name='test', field_name='title')
+		self.assertNotEqual(self.generate(module), expected)
+
+		self.assertEqual(self.generate(self.create_module()), expected)
+
+	def test_memoize_disabled(self):
+		module = mage2gen.Module(package='Package', name='Name')
+		StatefulSnippet(module).add(name='A')
+		StatefulSnippet(module).add(name='A')
+		self.assertEqual((add_cache.hits, add_cache.misses), (0, 0))
+
+	def test_shared_objects_copy_on_write(self):
+		node = mage2gen.Xmlnode('config', nodes=[
+			mage2gen.Xmlnode('type', attributes={'name': 'A'}, nodes=[mage2gen.Xmlnode('plugin', attributes={'name': 'a'})]),
+		]).share()
+		module = mage2gen.Module(package='Package', name='Name')
+		module.add_xml('etc/di.xml', node)
+		module.add_xml('etc/di.xml', mage2gen.Xmlnode('config', nodes=[
+			mage2gen.Xmlnode('type', attributes={'name': 'A'}, nodes=[mage2gen.Xmlnode('plugin', attributes={'name': 'b'})]),
+		]))
+
+		self.assertEqual(len(node.nodes[0].nodes), 1)
+		self.assertEqual(len(module._xmls['etc/di.xml'].nodes[0].nodes), 2)
+
+		phpclass = mage2gen.Phpclass('Model\\Test')
+		phpclass.add_method(mage2gen.Phpmethod('execute', body='$a = 1;'))
+		phpclass.share()
+		module.add_class(phpclass)
+		other = mage2gen.Phpclass('Model\\Test')
+		other.add_method(mage2gen.Phpmethod('execute', body='$b = 2;'))
+		module.add_class(other)
+
+		self.assertEqual(phpclass.class_namespace, 'Model\\Test')
+		self.assertEqual(phpclass.methods[0].body, ['$a = 1;'])
+		self.assertEqual(module._classes['Package\\Name\\Model\\Test'].methods[0].body, ['$a = 1;', '$b = 2;'])
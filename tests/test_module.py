@@ -0,0 +1,186 @@
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from context import mage2gen
+from mage2gen.sink import MemorySink
+from mage2gen.snippets import ModelSnippet, SystemSnippet
+
+class BrokenFile(mage2gen.StaticFile):
+
+	def context_data(self):
+		raise ValueError('Broken template')
+
+def read_tree(path):
+	files = {}
+	for root, dirs, file_names in os.walk(path):
+		for file_name in file_names:
+			file_path = os.path.join(root, file_name)
+			with open(file_path, 'rb') as output_file:
+				files[os.path.relpath(file_path, path)] = output_file.read()
+	return files
+
+class TestModule(unittest.TestCase):
+
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def create_module(self):
+		module = mage2gen.Module(package='Package', name='Name', description='Description')
+		ModelSnippet(module).add(model_name='test', field_name='name', web_api=True)
+		SystemSnippet(module).add(tab='test', section='test', group='test', field='test')
+		return module
+
+	def generate(self, name, **kwargs):
+		path = os.path.join(self.path, name)
+		os.mkdir(path)
+		self.create_module().generate_module(path, **kwargs)
+		return read_tree(path)
+
+	def test_generate_workers(self):
+		serial = self.generate('serial')
+
+		self.assertIn(os.path.join('Package', 'Name', 'etc', 'module.xml'), serial)
+		self.assertEqual(self.generate('workers', workers=4), serial)
+
+	def test_generate_executor(self):
+		with ThreadPoolExecutor(max_workers=2) as executor:
+			self.assertEqual(self.generate('executor', executor=executor), self.generate('serial'))
+
+	def test_write_equals_generate(self):
+		for path, output_file in self.create_module().output_files():
+			stream = io.StringIO()
+			output_file.write(stream)
+			self.assertEqual(stream.getvalue(), output_file.generate(), path)
+
+	def test_generate_errors(self):
+		module = self.create_module()
+		module.add_static_file('etc', BrokenFile('broken.xml'))
+		module.add_static_file('view', BrokenFile('broken.html'))
+
+		with self.assertRaises(mage2gen.GenerateError) as context:
+			module.generate_module(self.path, workers=4)
+
+		self.assertEqual([path for path, error in context.exception.errors], [
+			'Package/Name/etc/broken.xml',
+			'Package/Name/view/broken.html',
+		])
+		self.assertTrue(os.path.exists(os.path.join(self.path, 'Package', 'Name', 'etc', 'module.xml')))
+
+	def test_generate_incremental(self):
+		report = self.create_module().generate_module(self.path, incremental=True)
+		module_xml = os.path.join(self.path, 'Package', 'Name', 'etc', 'module.xml')
+
+		self.assertIn('Package/Name/etc/module.xml', report.added)
+		self.assertEqual((report.changed, report.unchanged, report.removed), ([], [], []))
+		self.assertTrue(os.path.exists(os.path.join(self.path, 'Package', 'Name', mage2gen.module.MANIFEST_FILE)))
+		self.assertNotIn(os.path.join('Package', 'Name', mage2gen.module.MANIFEST_FILE), report.added)
+
+		os.utime(module_xml, (1000000000, 1000000000))
+		report = self.create_module().generate_module(self.path, incremental=True)
+
+		self.assertEqual((report.added, report.changed, report.removed), ([], [], []))
+		self.assertIn('Package/Name/etc/module.xml', report.unchanged)
+		self.assertEqual(os.stat(module_xml).st_mtime, 1000000000)
+
+	def test_generate_incremental_changes(self):
+		self.create_module().generate_module(self.path, incremental=True)
+
+		module = mage2gen.Module(package='Package', name='Name', description='Changed')
+		ModelSnippet(module).add(model_name='test', field_name='name', web_api=True)
+		ModelSnippet(module).add(model_name='other', field_name='name')
+		report = module.generate_module(self.path, incremental=True)
+
+		self.assertIn('Package/Name/Model/Other.php', report.added)
+		self.assertIn('Package/Name/composer.json', report.changed)
+		self.assertIn('Package/Name/etc/adminhtml/system.xml', report.removed)
+		self.assertFalse(os.path.exists(os.path.join(self.path, 'Package', 'Name', 'etc', 'adminhtml', 'system.xml')))
+
+	def test_generate_incremental_keeps_changed_files(self):
+		self.create_module().generate_module(self.path, incremental=True)
+		system_xml = os.path.join(self.path, 'Package', 'Name', 'etc', 'adminhtml', 'system.xml')
+		with open(system_xml, 'a') as xml_file:
+			xml_file.write('<!-- changed -->')
+
+		module = mage2gen.Module(package='Package', name='Name', description='Description')
+		report = module.generate_module(self.path, incremental=True)
+
+		self.assertNotIn('Package/Name/etc/adminhtml/system.xml', report.removed)
+		self.assertEqual(report.kept, ['Package/Name/etc/adminhtml/system.xml'])
+		self.assertTrue(os.path.exists(system_xml))
+
+		report = module.generate_module(self.path, incremental=True)
+		self.assertEqual(report.kept, ['Package/Name/etc/adminhtml/system.xml'])
+
+	def test_generate_hash_seed(self):
+		script = (
+			'import sys\n'
+			'sys.path.insert(0, {!r})\n'
+			'import test_module\n'
+			'test_module.TestModule().create_module().generate_module(sys.argv[1])\n'
+		).format(os.path.dirname(os.path.abspath(__file__)))
+
+		trees = []
+		for seed in ('1', '2'):
+			path = os.path.join(self.path, seed)
+			os.mkdir(path)
+			subprocess.check_call([sys.executable, '-c', script, path], env=dict(os.environ, PYTHONHASHSEED=seed))
+			trees.append(read_tree(path))
+		self.assertEqual(trees[0], trees[1])
+
+	def test_fork(self):
+		def files(module):
+			sink = MemorySink()
+			module.generate_to(sink)
+			return sink.files
+
+		base = self.create_module()
+		expected = files(base)
+		fork = base.fork()
+		ModelSnippet(fork).add(model_name='test', field_name='title')
+		SystemSnippet(fork).add(tab='test', section='test', group='test', field='other')
+
+		variant = self.create_module()
+		ModelSnippet(variant).add(model_name='test', field_name='title')
+		SystemSnippet(variant).add(tab='test', section='test', group='test', field='other')
+
+		self.assertEqual(files(base), expected)
+		self.assertEqual(files(fork), files(variant))
+		self.assertEqual(fork.dump(), variant.dump())
+		self.assertIs(fork._xmls['etc/module.xml'], base._xmls['etc/module.xml'])
+		self.assertIsNot(fork._xmls['etc/adminhtml/system.xml'], base._xmls['etc/adminhtml/system.xml'])
+
+	def test_snapshot(self):
+		module = self.create_module()
+		snapshot = module.snapshot()
+		module.add_composer_require('magento/framework', '*')
+		ModelSnippet(module).add(model_name='other', field_name='name')
+
+		self.assertNotIn('Package\\Name\\Model\\Other', snapshot._classes)
+		self.assertEqual(snapshot._composer['require'], {})
+		self.assertEqual(len(snapshot.dump()['snippets']), 2)
+
+	def test_merge_static_files(self):
+		readme = mage2gen.Readme(body='one', configuration='config')
+		readme += mage2gen.Readme(body='two')
+		readme._context_data['body'].append('three')
+		readme += mage2gen.Readme(body='three')
+		readme += mage2gen.Readme(body='one', configuration='config')
+		readme += mage2gen.Readme(body='four')
+		self.assertEqual(readme._context_data['body'], ['one', 'two', 'three', 'four'])
+		self.assertEqual(readme._context_data['configuration'], ['config'])
+
+		static_file = mage2gen.StaticFile('test.txt', body='one')
+		copy = static_file.copy()
+		copy += mage2gen.StaticFile('test.txt', body='two')
+		static_file += mage2gen.StaticFile('test.txt', body='two')
+		static_file += mage2gen.StaticFile('test.txt', body='one')
+		self.assertEqual(static_file._context_data['body'], ['one', 'two'])
+		self.assertEqual(copy._context_data['body'], ['one', 'two'])
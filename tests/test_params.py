@@ -0,0 +1,78 @@
+import unittest
+from context import mage2gen
+from mage2gen import Snippet, SnippetParam
+from tests import utils
+
+class ParamsSnippet(Snippet):
+
+	def add(self, name, code='', enabled=False, extra_params=None):
+		pass
+
+	@classmethod
+	def params(cls):
+		return [
+			SnippetParam(name='name', required=True, regex_validator=r'^[a-z]+$', error_message='Only lowercase'),
+			SnippetParam(name='code', regex_validator=r'^\d+$', error_message='Only digits', depend={'enabled': r'True'}),
+			SnippetParam(name='enabled', yes_no=True, default=False),
+		]
+
+	@classmethod
+	def extra_params(cls):
+		return [
+			'Extra',
+			SnippetParam(name='sort_order', regex_validator=r'^\d+$', error_message='Only digits'),
+		]
+
+utils.unregister_snippet(ParamsSnippet)
+
+class TestParams(unittest.TestCase):
+
+	def test_validate(self):
+		param = SnippetParam(name='name', required=True, regex_validator=r'^[a-z]+$', error_message='Only lowercase')
+
+		self.assertIsNone(param.validation_error('abc'))
+		with self.assertRaisesRegex(Exception, 'This field is required'):
+			param.validate('')
+		with self.assertRaisesRegex(Exception, 'Only lowercase'):
+			param.validate('ABC')
+
+		sort_order = SnippetParam(name='sort_order', default=10, regex_validator=r'^\d+$', error_message='Only digits')
+		self.assertIsNone(sort_order.validation_error(10))
+		self.assertEqual(sort_order.validation_error(-1), 'Only digits')
+
+		enabled = SnippetParam(name='enabled', required=True, yes_no=True)
+		self.assertIsNone(enabled.validation_error(False))
+		self.assertEqual(enabled.validation_error(None), 'This field is required')
+
+	def test_params_cached(self):
+		params = ParamsSnippet.params()
+
+		self.assertIsNot(ParamsSnippet.params(), params)
+		self.assertEqual(ParamsSnippet.params(), params)
+		self.assertEqual([p.name for p in Snippet.params.__func__.__wrapped__(ParamsSnippet)], ['name', 'code', 'enabled'])
+
+	def test_signature_params_per_class(self):
+		class SignatureSnippet(Snippet):
+			def add(self, first, second=True, extra_params=None):
+				pass
+		self.addCleanup(utils.unregister_snippet, SignatureSnippet)
+
+		params = SignatureSnippet.params()
+		self.assertEqual([(p.name, p.required, p.yes_no) for p in params], [('first', True, False), ('second', False, True)])
+		self.assertIs(SignatureSnippet.params()[0], params[0])
+
+	def test_validate_all(self):
+		self.assertEqual(ParamsSnippet.validate_all({'name': 'valid'}), {})
+		self.assertEqual(dict(ParamsSnippet.validate_all({
+			'name': 'Invalid',
+			'code': 'abc',
+			'enabled': True,
+			'extra_params': {'sort_order': 'first'},
+		})), {
+			'name': 'Only lowercase',
+			'code': 'Only digits',
+			'sort_order': 'Only digits',
+		})
+
+	def test_validate_all_depend(self):
+		self.assertEqual(dict(ParamsSnippet.validate_all({'code': 'abc', 'enabled': False})), {'name': 'This field is required'})
@@ -31,6 +31,16 @@ class TestPhp(unittest.TestCase):
 
 		self.assertEqual(len(merged_class.attributes), 2)
 
+	def test_merge_order(self):
+		php_class1 = mage2gen.Phpclass('\\Test\\Class1', implements=['B', 'A'], attributes=['$c', '$a'], dependencies=['Z'])
+		php_class2 = mage2gen.Phpclass('\\Test\\Class1', implements=['A', 'C'], attributes=['$b', '$c'], dependencies=['Y', 'Z'])
+
+		merged_class = php_class1 + php_class2
+
+		self.assertEqual(merged_class.implements, ['B', 'A', 'C'])
+		self.assertEqual(merged_class.attributes, ['$c', '$a', '$b'])
+		self.assertEqual(merged_class.dependencies, ['Z', 'Y'])
+
 	def test_class_namespace(self):
 		php_class = mage2gen.Phpclass('\\Test\\Class1')
 
@@ -45,3 +55,36 @@ class TestPhp(unittest.TestCase):
 		php_class = mage2gen.Phpclass('Test\\Model\\Class')
 
 		self.assertEqual(php_class.namespace, 'Test\\Model')
+
+	def test_merge_same_method(self):
+		php_class = mage2gen.Phpclass('\\Test\\Class1')
+		php_class.add_method(mage2gen.Phpmethod('getTest', params=['$a'], body='$a = 1;', end_body='return $a;'))
+		php_class.add_method(mage2gen.Phpmethod('getOther'))
+		php_class.add_method(mage2gen.Phpmethod('getTest', params=['$a', '$b'], body='$b = 2;', end_body='$a += $b;'))
+		php_class.add_method(mage2gen.Phpmethod('getTest', params=['$b'], body='$a = 1;', end_body='return $a;'))
+
+		self.assertEqual([m.name for m in php_class.methods], ['getTest', 'getOther'])
+		method = php_class.methods[0]
+		self.assertEqual(method.params, ['$a', '$b'])
+		self.assertEqual(method.body, ['$a = 1;', '$b = 2;'])
+		self.assertEqual(method.end_body, ['$a += $b;', 'return $a;'])
+
+	def test_add_body_code(self):
+		method = mage2gen.Phpmethod('getTest', body='$a = 1;')
+		method.add_body_code('$b = 2;')
+		method.add_body_code('$a = 1;')
+		method.body.append('$c = 3;')
+		method.add_body_code('$c = 3;')
+
+		self.assertEqual(method.body, ['$a = 1;', '$b = 2;', '$c = 3;'])
+
+	def test_merge_long_method(self):
+		method = mage2gen.Phpmethod('getTest')
+		for index in range(20):
+			method += mage2gen.Phpmethod('getTest', body='$a{} = 1;'.format(index % 12))
+		method.body.append('$b = 2;')
+		method.add_body_code('$b = 2;')
+		method.add_body_code('$a3 = 1;')
+
+		self.assertEqual(method.body, [''] + ['$a{} = 1;'.format(index) for index in range(12)] + ['$b = 2;'])
+		self.assertFalse(hasattr(method, '__dict__'))
@@ -0,0 +1,57 @@
+import io
+import unittest
+from context import mage2gen
+from mage2gen.template import Template, templates
+from mage2gen.snippets import ModelSnippet, EavEntitySnippet, ControllerSnippet, PluginSnippet, GraphQlEndpointSnippet
+
+def legacy_generate(obj):
+	"""The str.format and tab replace post-pass generate used before"""
+	return templates.get(obj.template_file).source.format(**obj.context_data()).replace('\t', '    ')
+
+def code_objects(module):
+	for phpclass in module._classes.values():
+		yield phpclass
+		for method in phpclass.methods:
+			yield method
+	for schema in module._graphqlschemas.values():
+		yield schema
+		for object_type in schema.object_types:
+			yield object_type
+			for object_item in object_type.object_items:
+				yield object_item
+
+class TestPsr2(unittest.TestCase):
+
+	def create_module(self):
+		module = mage2gen.Module(package='Package', name='Name', description='Description')
+		ModelSnippet(module).add(model_name='test', field_name='name', web_api=True)
+		EavEntitySnippet(module).add(entity_name='brand', adminhtml_grid=True, adminhtml_form=True, web_api=True)
+		ControllerSnippet(module).add(frontname='test', section='index', action='ajax', ajax=True)
+		PluginSnippet(module).add(classname='Product', methodname='getSku', plugintype='around')
+		GraphQlEndpointSnippet(module).add(base_type='Query', custom_type='brandType', data_provider_dependency='Magento\\Foo',
+			identifier='brand', description='Brand', object_arguments='id,name', object_fields='id,name', add_cache_identity=True)
+		return module
+
+	def test_render_code(self):
+		source = 'class {name}\n{{\n\t{body}\n}}\n'
+		context = {'name': 'A\tB', 'body': 'if (true) {\n\t\treturn;\n\t}'}
+		template = Template('code.tmpl', source)
+
+		self.assertEqual(template.render_code(**context), source.format(**context).replace('\t', '    '))
+		self.assertEqual(Template('code.tmpl', '\t{value:>2}').render_code(value='\t'), '    ' + ' ' + '    ')
+
+	def test_generate_equals_legacy(self):
+		objects = list(code_objects(self.create_module()))
+
+		self.assertTrue(any(isinstance(obj, mage2gen.GraphQlObjectItem) for obj in objects))
+		for obj in objects:
+			output = obj.generate()
+			self.assertNotIn('\t', output)
+			self.assertEqual(output, legacy_generate(obj))
+
+	def test_write_equals_generate(self):
+		module = self.create_module()
+		for obj in list(module._classes.values()) + list(module._graphqlschemas.values()):
+			stream = io.StringIO()
+			obj.write(stream)
+			self.assertEqual(stream.getvalue(), obj.generate())
@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+import unittest
+from context import mage2gen
+from mage2gen import snippets
+from tests import utils
+
+class TestRegistry(unittest.TestCase):
+
+	def test_import_is_lazy(self):
+		script = (
+			'import sys\n'
+			'sys.path.insert(0, {!r})\n'
+			'import mage2gen\n'
+			'mage2gen.Module("Package", "Name")\n'
+			'print(sorted(name for name in sys.modules if name.startswith("mage2gen.snippets.")))\n'
+		).format(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+		output = subprocess.check_output([sys.executable, '-c', script], universal_newlines=True)
+		self.assertEqual(output.strip(), '[]')
+
+	def test_manifest(self):
+		for info in snippets.MANIFEST:
+			snippet = snippets.load_snippet(info.class_name)
+			self.assertEqual(snippet.__name__, info.class_name)
+			self.assertEqual(snippet.__module__, 'mage2gen.snippets.' + info.module)
+			self.assertEqual(snippet.name(), info.name)
+			self.assertEqual(snippet.label(), info.label)
+
+	def test_snippets_order(self):
+		self.assertEqual([s.__name__ for s in mage2gen.Snippet.snippets()], [info.class_name for info in snippets.MANIFEST])
+
+	def test_attribute(self):
+		from mage2gen.snippets.model import ModelSnippet
+		self.assertIs(snippets.ModelSnippet, ModelSnippet)
+		with self.assertRaises(AttributeError):
+			snippets.UnknownSnippet
+
+	def test_registry_lookup(self):
+		from mage2gen.snippets.model import ModelSnippet
+		registry = mage2gen.snippet_registry
+
+		self.assertIs(registry.get('model'), ModelSnippet)
+		self.assertIs(registry.get('Model'), ModelSnippet)
+		self.assertIs(registry.get('EAV Entity'), snippets.EavEntitySnippet)
+		self.assertIs(registry['mage2gen.snippets.model.ModelSnippet'], ModelSnippet)
+		self.assertIn('graphqlendpoint', registry)
+		self.assertIsNone(registry.get('unknown'))
+		with self.assertRaises(KeyError):
+			registry['unknown']
+
+	def test_registry_names(self):
+		self.assertEqual(mage2gen.snippet_registry.names(), [info.name.lower() for info in snippets.MANIFEST])
+
+	def test_registry_register(self):
+		registry = mage2gen.SnippetRegistry()
+		class CustomSnippet(mage2gen.Snippet):
+			snippet_label = 'Custom Label'
+		self.addCleanup(utils.unregister_snippet, CustomSnippet)
+		registry.register(CustomSnippet)
+
+		self.assertIs(registry.get('custom'), CustomSnippet)
+		self.assertIs(registry.get('Custom Label'), CustomSnippet)
+		self.assertIs(mage2gen.snippet_registry.get('custom'), CustomSnippet)
+		self.assertIs(registry.all()[-1], CustomSnippet)
+
+		registry.unregister(CustomSnippet)
+		self.assertIsNone(registry.get('custom'))
+		self.assertNotIn('Custom Label', registry)
+		self.assertEqual(registry.all(), mage2gen.Snippet.snippets()[:-1])
+		registry.unregister(snippets.ModelSnippet)
+		self.assertIs(registry.get('model'), snippets.ModelSnippet)
+
+	def test_registry_metadata(self):
+		registry = mage2gen.SnippetRegistry()
+		metadata = registry.metadata('model')
+
+		self.assertIs(registry.metadata(snippets.ModelSnippet), metadata)
+		self.assertEqual((metadata.name, metadata.label), ('Model', 'Model'))
+		self.assertEqual([p.name for p in metadata.params], [p.name for p in snippets.ModelSnippet.params()])
+		self.assertEqual(len(metadata.extra_params), len(snippets.ModelSnippet.extra_params()))
@@ -0,0 +1,108 @@
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+import unittest
+import zipfile
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from context import mage2gen
+from mage2gen.server import GeneratorServer
+from mage2gen.sink import MemorySink
+from mage2gen.spec import build_module
+
+SPEC = {
+	'package': 'Package',
+	'name': 'Name',
+	'snippets': [{'snippet': 'model', 'params': {'model_name': 'test', 'field_name': 'name'}}],
+}
+
+class SlowServer(GeneratorServer):
+
+	def generate(self, spec, output_format):
+		time.sleep(0.5)
+		return b'{}'
+
+class TestServer(unittest.TestCase):
+
+	def start_server(self, server_class=GeneratorServer, **kwargs):
+		server = server_class(('127.0.0.1', 0), **kwargs)
+		thread = threading.Thread(target=server.serve_forever)
+		thread.daemon = True
+		thread.start()
+		self.addCleanup(server.server_close)
+		self.addCleanup(server.shutdown)
+		return 'http://127.0.0.1:{}'.format(server.server_address[1])
+
+	def request(self, url, data=None):
+		body = json.dumps(data).encode('utf-8') if data is not None else None
+		try:
+			with urlopen(Request(url, data=body), timeout=10) as response:
+				return response.status, response.read()
+		except HTTPError as e:
+			return e.code, e.read()
+
+	def test_health_and_snippets(self):
+		url = self.start_server()
+		status, body = self.request(url + '/health')
+		self.assertEqual(status, 200)
+		self.assertEqual(json.loads(body.decode('utf-8'))['status'], 'ok')
+
+		status, body = self.request(url + '/snippets')
+		self.assertIn('model', [snippet['name'] for snippet in json.loads(body.decode('utf-8'))])
+
+	def test_generate_json(self):
+		sink = MemorySink()
+		build_module(SPEC).generate_to(sink)
+
+		status, body = self.request(self.start_server() + '/generate', SPEC)
+		files = json.loads(body.decode('utf-8'))['files']
+		self.assertEqual(status, 200)
+		self.assertEqual({path: content.encode('utf-8') for path, content in files.items()}, dict(sink.files))
+
+	def test_generate_cached(self):
+		cache_dir = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, cache_dir)
+		url = self.start_server(cache_dir=cache_dir)
+
+		first = self.request(url + '/generate', SPEC)
+		self.assertEqual(len(os.listdir(cache_dir)), 1)
+		self.assertEqual(self.request(url + '/generate', SPEC), first)
+
+	def test_generate_archives(self):
+		url = self.start_server()
+		status, body = self.request(url + '/generate?format=zip', SPEC)
+		self.assertIn('Package/Name/Model/Test.php', zipfile.ZipFile(io.BytesIO(body)).namelist())
+
+		status, body = self.request(url + '/generate?format=tar', SPEC)
+		self.assertIn('Package/Name/Model/Test.php', tarfile.open(fileobj=io.BytesIO(body)).getnames())
+
+	def test_errors(self):
+		url = self.start_server()
+		status, body = self.request(url + '/generate', {'package': 'Package'})
+		self.assertEqual(status, 422)
+		self.assertIn('name is required', json.loads(body.decode('utf-8'))['errors'])
+
+		self.assertEqual(self.request(url + '/generate?format=rar', SPEC)[0], 400)
+		self.assertEqual(self.request(url + '/unknown')[0], 404)
+		with self.assertRaises(HTTPError) as context:
+			urlopen(Request(url + '/generate', data=b'{'), timeout=10)
+		self.assertEqual(context.exception.code, 400)
+
+	def test_timeout(self):
+		url = self.start_server(SlowServer, timeout=0.1)
+		self.assertEqual(self.request(url + '/generate', SPEC)[0], 504)
+
+	def test_queue_full(self):
+		url = self.start_server(SlowServer, workers=1, queue_size=0)
+		results = []
+		thread = threading.Thread(target=lambda: results.append(self.request(url + '/generate', SPEC)[0]))
+		thread.start()
+		time.sleep(0.2)
+		self.assertEqual(self.request(url + '/generate', SPEC)[0], 503)
+		thread.join()
+		self.assertEqual(results, [200])
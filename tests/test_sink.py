@@ -0,0 +1,98 @@
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from context import mage2gen
+from mage2gen.sink import MemorySink, ZipSink, TarSink
+from mage2gen.license import GPLV3
+from mage2gen.snippets import ModelSnippet, SystemSnippet
+
+class TestSink(unittest.TestCase):
+
+	def create_module(self):
+		module = mage2gen.Module(package='Package', name='Name', description='Description', license=GPLV3(copyright='Package'))
+		ModelSnippet(module).add(model_name='test', field_name='name', web_api=True)
+		SystemSnippet(module).add(tab='test', section='test', group='test', field='test')
+		return module
+
+	def generate_files(self, module):
+		sink = MemorySink()
+		module.generate_to(sink)
+		return sink.files
+
+	def test_memory_sink_equals_filesystem(self):
+		files = self.generate_files(self.create_module())
+
+		path = tempfile.mkdtemp()
+		try:
+			self.create_module().generate_module(path)
+			for file_path, content in files.items():
+				with open(os.path.join(path, file_path), 'rb') as output_file:
+					self.assertEqual(output_file.read(), content, file_path)
+			self.assertEqual(sum(len(names) for root, dirs, names in os.walk(path)), len(files))
+		finally:
+			shutil.rmtree(path)
+
+	def test_generate_twice(self):
+		module = self.create_module()
+		files = self.generate_files(module)
+
+		self.assertIn('Package/Name/registration.php', files)
+		self.assertIn('Package/Name/LICENSE.txt', files)
+		self.assertEqual(self.generate_files(module), files)
+
+	def test_zip_sink(self):
+		files = self.generate_files(self.create_module())
+		buffer = io.BytesIO()
+		with ZipSink(buffer) as sink:
+			self.create_module().generate_to(sink, workers=4)
+
+		with zipfile.ZipFile(io.BytesIO(buffer.getvalue())) as archive:
+			self.assertEqual(archive.namelist(), list(files))
+			for name in archive.namelist():
+				self.assertEqual(archive.read(name), files[name])
+
+	def test_archive_deterministic(self):
+		archives = []
+		for index in range(5):
+			buffer = io.BytesIO()
+			with ZipSink(buffer, timestamp=0) as sink:
+				self.create_module().generate_to(sink, workers=8)
+			archives.append(buffer.getvalue())
+		self.assertEqual(len(set(archives)), 1)
+
+		sink = MemorySink()
+		self.create_module().generate_to(sink, workers=8)
+		self.assertEqual(list(sink.files), list(self.generate_files(self.create_module())))
+
+	def test_zip_sink_timestamp(self):
+		for timestamp, date_time in ((0, (1980, 1, 1, 0, 0, 0)), (1500000000, (2017, 7, 14, 2, 40, 0))):
+			buffer = io.BytesIO()
+			with ZipSink(buffer, timestamp=timestamp) as sink:
+				self.create_module().generate_to(sink)
+
+			with zipfile.ZipFile(io.BytesIO(buffer.getvalue())) as archive:
+				self.assertEqual({info.date_time for info in archive.infolist()}, {date_time})
+
+	def test_tar_sink(self):
+		files = self.generate_files(self.create_module())
+		buffer = io.BytesIO()
+		with TarSink(buffer) as sink:
+			self.create_module().generate_to(sink)
+
+		with tarfile.open(fileobj=io.BytesIO(buffer.getvalue())) as archive:
+			self.assertEqual(archive.getnames(), list(files))
+			for name in archive.getnames():
+				self.assertEqual(archive.extractfile(name).read(), files[name])
+
+	def test_memory_sink_incremental(self):
+		sink = MemorySink()
+		self.create_module().generate_to(sink, incremental=True)
+		report = mage2gen.Module(package='Package', name='Name', description='Description').generate_to(sink, incremental=True)
+
+		self.assertIn('Package/Name/etc/adminhtml/system.xml', report.removed)
+		self.assertNotIn('Package/Name/etc/adminhtml/system.xml', sink.files)
+		self.assertIn('Package/Name/' + mage2gen.module.MANIFEST_FILE, sink.files)
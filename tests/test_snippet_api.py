@@ -13,7 +13,7 @@ class TestSnippetApi(unittest.TestCase):
 		snippet = ApiSnippet(module)
 		sample_output = snippet.add(api_name='SampleAPI', api_method='GET')
 
-		result = utils.CodeSniffer.generate_and_test(module)
+		result = utils.CodeSniffer.generate_and_test(module, test=self)
 		self.assertTrue(result)
 
 	def tearDown(self):
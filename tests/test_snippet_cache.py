@@ -13,7 +13,7 @@ class TestSnippetCache(unittest.TestCase):
 		snippet = CacheSnippet(module)
 		sample_output = snippet.add('test', 'test cache')
 
-		result = utils.CodeSniffer.generate_and_test(module)
+		result = utils.CodeSniffer.generate_and_test(module, test=self)
 		self.assertTrue(result)
 
 	def tearDown(self):
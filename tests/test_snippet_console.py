@@ -13,7 +13,7 @@ class TestSnippetconsole(unittest.TestCase):
 		snippet = ConsoleSnippet(module)
 		sample_output = snippet.add('test', 'test console')
 
-		result = utils.CodeSniffer.generate_and_test(module)
+		result = utils.CodeSniffer.generate_and_test(module, test=self)
 		self.assertTrue(result)
 
 	def tearDown(self):
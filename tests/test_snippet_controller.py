@@ -18,7 +18,7 @@ class TestSnippetController(unittest.TestCase):
 			adminhtml=False, 
 			ajax=False)
 
-		result = utils.CodeSniffer.generate_and_test(module)
+		result = utils.CodeSniffer.generate_and_test(module, test=self)
 		self.assertTrue(result)
 
 	def test_snippet_admin(self):
@@ -31,7 +31,7 @@ class TestSnippetController(unittest.TestCase):
 			adminhtml=True, 
 			ajax=False)
 
-		result = utils.CodeSniffer.generate_and_test(module)
+		result = utils.CodeSniffer.generate_and_test(module, test=self)
 		self.assertTrue(result)
 
 	def test_snippet_ajax(self):
@@ -44,7 +44,7 @@ class TestSnippetController(unittest.TestCase):
 			adminhtml=False, 
 			ajax=True)
 
-		result = utils.CodeSniffer.generate_and_test(module)
+		result = utils.CodeSniffer.generate_and_test(module, test=self)
 		self.assertTrue(result)
 
 	def tearDown(self):
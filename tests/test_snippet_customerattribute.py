@@ -22,7 +22,7 @@ class TestSnippetCustomerAttribute(unittest.TestCase):
 			source_model='custom', 
 			source_model_options='value1, value2, value3')
 
-		result = utils.CodeSniffer.generate_and_test(module)
+		result = utils.CodeSniffer.generate_and_test(module, test=self)
 		self.assertTrue(result)
 
 	def tearDown(self):
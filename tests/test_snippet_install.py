@@ -13,7 +13,7 @@ class TestSnippetInstall(unittest.TestCase):
 		snippet = InstallSnippet(module)
 		sample_output = snippet.add()
 
-		result = utils.CodeSniffer.generate_and_test(module)
+		result = utils.CodeSniffer.generate_and_test(module, test=self)
 		self.assertTrue(result)
 
 	def tearDown(self):
@@ -13,7 +13,7 @@ class TestSnippetLanguage(unittest.TestCase):
 		snippet = LanguageSnippet(module)
 		sample_output = snippet.add('nl_NL')
 
-		result = utils.CodeSniffer.generate_and_test(module)
+		result = utils.CodeSniffer.generate_and_test(module, test=self)
 		self.assertTrue(result)
 
 	def tearDown(self):
@@ -19,7 +19,7 @@ class TestSnippetModel(unittest.TestCase):
 			adminhtml_form=True,
 			web_api=True)
 
-		result = utils.CodeSniffer.generate_and_test(module)
+		result = utils.CodeSniffer.generate_and_test(module, test=self)
 		self.assertTrue(result)
 
 	def tearDown(self):
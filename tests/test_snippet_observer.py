@@ -13,7 +13,7 @@ class TestSnippetObserver(unittest.TestCase):
 		snippet = ObserverSnippet(module)
 		sample_output = snippet.add('catalog_product_save_after')
 
-		result = utils.CodeSniffer.generate_and_test(module)
+		result = utils.CodeSniffer.generate_and_test(module, test=self)
 		self.assertTrue(result)
 
 	def tearDown(self):
@@ -13,7 +13,7 @@ class TestSnippetPlugin(unittest.TestCase):
 		snippet = PluginSnippet(module)
 		sample_output = snippet.add('Magento\\Catalog\\Model\\Product', 'getName')
 
-		result = utils.CodeSniffer.generate_and_test(module)
+		result = utils.CodeSniffer.generate_and_test(module, test=self)
 		self.assertTrue(result)
 
 	def tearDown(self):
@@ -13,7 +13,7 @@ class TestSnippetProductAttribute(unittest.TestCase):
 		snippet = ProductAttributeSnippet(module)
 		sample_output = snippet.add('test')
 
-		result = utils.CodeSniffer.generate_and_test(module)
+		result = utils.CodeSniffer.generate_and_test(module, test=self)
 		self.assertTrue(result)
 
 	def tearDown(self):
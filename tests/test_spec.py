@@ -0,0 +1,138 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from context import mage2gen
+from mage2gen.license import GPLV3, License, dump_license, load_license
+from mage2gen.sink import MemorySink
+from mage2gen.snippets import ModelSnippet, CacheSnippet
+from mage2gen.spec import SpecError, load_spec, validate_spec, build_module
+
+SAATVA2GEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'saatva2gen')
+
+SPEC = {
+	'package': 'Package',
+	'name': 'Name',
+	'description': 'Description',
+	'snippets': [
+		{'snippet': 'model', 'params': {'model_name': 'test', 'field_name': 'name', 'web_api': True}},
+		{'snippet': 'Cache', 'params': {'name': 'testcache'}},
+		{'snippet': 'model', 'params': {'model_name': 'test', 'field_name': 'title'}},
+	]
+}
+
+class TestSpec(unittest.TestCase):
+
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def write_spec(self, name, spec):
+		path = os.path.join(self.path, name)
+		with open(path, 'w') as spec_file:
+			json.dump(spec, spec_file)
+		return path
+
+	def test_load_spec(self):
+		self.assertEqual(load_spec(self.write_spec('module.json', SPEC)), [SPEC])
+		self.assertEqual(load_spec(self.write_spec('modules.json', {'modules': [SPEC, SPEC]})), [SPEC, SPEC])
+
+		with open(os.path.join(self.path, 'broken.json'), 'w') as spec_file:
+			spec_file.write('{')
+		with self.assertRaises(SpecError):
+			load_spec(os.path.join(self.path, 'broken.json'))
+
+	def test_validate_spec(self):
+		self.assertEqual(validate_spec(SPEC), [])
+		errors = validate_spec({'package': 'Package', 'snippets': [
+			{'snippet': 'unknown'},
+			{'snippet': 'model', 'params': {'model_name': 'test'}},
+			{'snippet': 'model', 'params': {'model_name': 'Not valid', 'field_name': 'name'}},
+			{'params': {}},
+		]})
+
+		self.assertEqual(len(errors), 5)
+		self.assertEqual(errors[0], 'name is required')
+		self.assertIn('unknown snippet unknown', errors[1])
+		self.assertIn('field_name', errors[2])
+		self.assertIn('model_name', errors[3])
+
+	def test_build_module(self):
+		module = build_module(SPEC)
+
+		self.assertEqual(module.module_name, 'Package_Name')
+		self.assertIn('Package\\Name\\Model\\Test', module._classes)
+		self.assertIn('Package\\Name\\Model\\Cache\\Testcache', module._classes)
+		with self.assertRaises(SpecError):
+			build_module({'package': 'Package'})
+
+	def test_batch(self):
+		output = os.path.join(self.path, 'output')
+		spec_path = self.write_spec('module.json', SPEC)
+		subprocess.check_call([sys.executable, SAATVA2GEN, 'batch', '-q', '-o', output, spec_path])
+
+		self.assertTrue(os.path.exists(os.path.join(output, 'Package', 'Name', 'Model', 'Test.php')))
+
+	def test_batch_errors(self):
+		output = os.path.join(self.path, 'output')
+		spec_path = self.write_spec('module.json', {'package': 'Package', 'name': 'Name', 'snippets': [{'snippet': 'unknown'}]})
+		process = subprocess.Popen([sys.executable, SAATVA2GEN, 'batch', '-o', output, spec_path], stderr=subprocess.PIPE, universal_newlines=True)
+		errors = process.communicate()[1]
+
+		self.assertEqual(process.returncode, 1)
+		self.assertIn('unknown snippet unknown', errors)
+		self.assertFalse(os.path.exists(output))
+
+	def create_module(self):
+		module = mage2gen.Module(package='Package', name='Name', description='Description',
+			license=GPLV3(copyright='Copyright', module_name='Package_Name', description='License'))
+		snippet = ModelSnippet(module)
+		snippet.add('test', 'name', web_api=True)
+		snippet.add(model_name='test', field_name='title', extra_params={'field_size': '100'})
+		ModelSnippet(module).add(model_name='test', field_name='code')
+		CacheSnippet(module).add(name='testcache')
+		return module
+
+	def generate(self, module):
+		sink = MemorySink()
+		module.generate_to(sink)
+		return sink.files
+
+	def test_dump(self):
+		data = self.create_module().dump()
+
+		self.assertEqual(data['version'], 1)
+		self.assertEqual(data['license']['identifier'], 'GPL-3.0')
+		self.assertEqual([(call['snippet'], call.get('instance', 0)) for call in data['snippets']],
+			[('model', 0), ('model', 0), ('model', 1), ('cache', 0)])
+		self.assertEqual(data['snippets'][0]['params'], {'model_name': 'test', 'field_name': 'name', 'web_api': True})
+		self.assertEqual(data['snippets'][1]['extra_params'], {'field_size': '100'})
+		self.assertEqual(validate_spec(data), [])
+
+	def test_load_module_round_trip(self):
+		module = self.create_module()
+		data = json.loads(json.dumps(module.dump()))
+		loaded = mage2gen.Module.load_module(data)
+
+		self.assertEqual(loaded.dump(), data)
+		self.assertEqual(self.generate(loaded), self.generate(module))
+
+	def test_load_module_version(self):
+		with self.assertRaises(Exception):
+			mage2gen.Module.load_module({'version': 2, 'package': 'Package', 'name': 'Name'})
+		self.assertIn('Unsupported spec version', validate_spec({'version': 2, 'package': 'Package', 'name': 'Name'})[0])
+
+	def test_license(self):
+		license = load_license(dump_license(GPLV3(copyright='Copyright')))
+		self.assertIsInstance(license, GPLV3)
+		self.assertEqual(license.copyright, 'Copyright')
+
+		custom = License(copyright='Copyright', license_text='Text', short_license_text='Short')
+		custom.identifier = 'Custom'
+		license = load_license(dump_license(custom))
+		self.assertEqual((license.identifier, license.get_text(), license.get_short_text()), ('Custom', 'Text', 'Short'))
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import unittest
+from context import mage2gen
+from mage2gen.template import Template, TemplateRegistry, templates
+
+class TestTemplate(unittest.TestCase):
+
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def write_template(self, name, source, mtime=None):
+		path = os.path.join(self.path, name)
+		with open(path, 'w', encoding='utf-8') as tmpl:
+			tmpl.write(source)
+		if mtime:
+			os.utime(path, (mtime, mtime))
+		return path
+
+	def test_render_equals_format(self):
+		source = '<?php\n{{ escaped }}\nnamespace {namespace};\n\nclass {class_name}\n{{\n{methods}}}\n'
+		context = {'namespace': 'Test\\Model', 'class_name': 'Class', 'methods': 1}
+		template = Template('class.tmpl', source)
+
+		self.assertTrue(template.simple)
+		self.assertEqual(template.render(**context), source.format(**context))
+
+	def test_render_fallback(self):
+		source = '{name!r} {value:>5}'
+		template = Template('fallback.tmpl', source)
+
+		self.assertFalse(template.simple)
+		self.assertEqual(template.render(name='a', value='b'), source.format(name='a', value='b'))
+
+	def test_loaded_once(self):
+		self.assertIs(templates.get('class.tmpl'), templates.get('class.tmpl'))
+
+	def test_auto_reload(self):
+		self.write_template('test.tmpl', 'first {value}', mtime=1000000000)
+		registry = TemplateRegistry(self.path, auto_reload=True)
+		self.assertEqual(registry.render('test.tmpl', value=1), 'first 1')
+
+		self.write_template('test.tmpl', 'second {value}', mtime=1000000010)
+		self.assertEqual(registry.render('test.tmpl', value=1), 'second 1')
+
+	def test_no_reload(self):
+		self.write_template('test.tmpl', 'first {value}', mtime=1000000000)
+		registry = TemplateRegistry(self.path)
+		registry.get('test.tmpl')
+
+		self.write_template('test.tmpl', 'second {value}', mtime=1000000010)
+		self.assertEqual(registry.render('test.tmpl', value=1), 'first 1')
+
+	def test_preload(self):
+		os.mkdir(os.path.join(self.path, 'sub'))
+		self.write_template('first.tmpl', 'first')
+		self.write_template(os.path.join('sub', 'second.tmpl'), 'second')
+		self.write_template('notes.txt', 'not a template')
+		registry = TemplateRegistry(self.path)
+
+		self.assertEqual(registry.preload(), 2)
+		self.assertIs(registry.get(os.path.join(self.path, 'sub', 'second.tmpl')), registry.get(os.path.join('sub', 'second.tmpl')))
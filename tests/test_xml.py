@@ -0,0 +1,156 @@
+import unittest
+from xml.etree.ElementTree import Element, SubElement, tostring
+from xml.dom import minidom
+from context import mage2gen
+from mage2gen.snippets import ModelSnippet, EavEntitySnippet, SystemSnippet
+
+def legacy_generate(node, element=None):
+	"""The ElementTree and minidom round trip Xmlnode.generate used before"""
+	if element is not None:
+		el = SubElement(element, node.node_name)
+	else:
+		el = Element(node.node_name)
+		if not node.xsd:
+			el.set('xmlns:xsi', "http://www.w3.org/2001/XMLSchema-instance")
+
+	if node.node_text:
+		el.text = node.node_text
+
+	for key, value in node.attributes.items():
+		el.set(str(key), str(value))
+
+	for child in node.nodes:
+		legacy_generate(child, el)
+
+	if element is None:
+		reparsed = minidom.parseString(tostring(el, 'utf-8'))
+		if node.xsd:
+			return reparsed.toprettyxml(indent="\t").split('\n', 1)[-1]
+		return reparsed.toprettyxml(indent="\t")
+
+class TestXml(unittest.TestCase):
+
+	def assertLegacyOutput(self, node):
+		self.assertEqual(node.generate(), legacy_generate(node))
+
+	def test_empty_node(self):
+		self.assertLegacyOutput(mage2gen.Xmlnode('config'))
+
+	def test_attributes(self):
+		self.assertLegacyOutput(mage2gen.Xmlnode('config', attributes={
+			'xsi:noNamespaceSchemaLocation': 'urn:magento:framework:ObjectManager/etc/config.xsd'
+		}, nodes=[
+			mage2gen.Xmlnode('type', attributes={'name': 'Magento\\Catalog\\Model\\Product', 'sortOrder': 10, 'disabled': False}),
+		]))
+
+	def test_escaping(self):
+		self.assertLegacyOutput(mage2gen.Xmlnode('config', nodes=[
+			mage2gen.Xmlnode('item', attributes={'name': 'a & b "c" <d>'}, node_text='<p>"Text" & \'more\'</p>'),
+			mage2gen.Xmlnode('item', attributes={'name': 'line\nbreak\ttab'}, node_text='carriage\r\nreturn\rtext'),
+		]))
+
+	def test_text_and_nodes(self):
+		self.assertLegacyOutput(mage2gen.Xmlnode('config', nodes=[
+			mage2gen.Xmlnode('item', node_text='text', nodes=[mage2gen.Xmlnode('child', node_text=' spaced ')]),
+		]))
+
+	def test_namespace_declarations_first(self):
+		self.assertLegacyOutput(mage2gen.Xmlnode('xs:schema', xsd=True, attributes={
+			'attributeFormDefault': 'unqualified',
+			'xmlns:xs': 'http://www.w3.org/2001/XMLSchema',
+		}, nodes=[
+			mage2gen.Xmlnode('xs:element', attributes={'name': 'config'}),
+		]))
+		self.assertLegacyOutput(mage2gen.Xmlnode('config', attributes={
+			'xsi:noNamespaceSchemaLocation': 'urn:magento:module:Magento_Cron:etc/cron_groups.xsd',
+			'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+		}))
+
+	def test_attribute_insertion_order(self):
+		node = mage2gen.Xmlnode('field', xsd=True, attributes={'id': 'a', 'type': 'text', 'sortOrder': 10, 'xmlns:b': 'urn:b', 'canRestore': 1})
+		self.assertEqual(node.generate(), '<field xmlns:b="urn:b" id="a" type="text" sortOrder="10" canRestore="1"/>\n')
+
+	def test_snippet_xml_files(self):
+		module = mage2gen.Module(package='Package', name='Name', description='Description')
+		ModelSnippet(module).add(model_name='test', field_name='name', web_api=True)
+		EavEntitySnippet(module).add(entity_name='brand', adminhtml_grid=True, adminhtml_form=True, web_api=True)
+		SystemSnippet(module).add(tab='test', section='test', group='test', field='test')
+
+		for xml_file, node in module._xmls.items():
+			self.assertEqual(node.generate(), legacy_generate(node), xml_file)
+
+	def test_merge_nodes(self):
+		config = mage2gen.Xmlnode('config', nodes=[
+			mage2gen.Xmlnode('type', attributes={'name': 'A'}, nodes=[
+				mage2gen.Xmlnode('plugin', attributes={'name': 'a_plugin'}),
+			]),
+		])
+		config.add_nodes([
+			mage2gen.Xmlnode('preference', attributes={'for': 'B', 'type': 'C'}),
+			mage2gen.Xmlnode('type', attributes={'name': 'A'}, nodes=[
+				mage2gen.Xmlnode('plugin', attributes={'name': 'a_plugin'}),
+				mage2gen.Xmlnode('plugin', attributes={'name': 'b_plugin'}),
+			]),
+			mage2gen.Xmlnode('type', attributes={'name': 'B'}),
+			mage2gen.Xmlnode('preference', attributes={'for': 'B', 'type': 'D'}),
+		])
+
+		self.assertEqual([(n.node_name, n.attributes.get('name', n.attributes.get('for'))) for n in config.nodes],
+			[('type', 'A'), ('preference', 'B'), ('type', 'B')])
+		self.assertEqual([n.attributes['name'] for n in config.nodes[0].nodes], ['a_plugin', 'b_plugin'])
+
+	def test_merge_node_without_match_attributes(self):
+		config = mage2gen.Xmlnode('config', nodes=[
+			mage2gen.Xmlnode('arguments', nodes=[mage2gen.Xmlnode('argument', attributes={'name': 'a'})]),
+		])
+		config.add_nodes([
+			mage2gen.Xmlnode('arguments', nodes=[mage2gen.Xmlnode('argument', attributes={'name': 'b'})]),
+		])
+
+		self.assertEqual(len(config.nodes), 1)
+		self.assertEqual(len(config.nodes[0].nodes), 2)
+
+	def test_merge_custom_match_attributes(self):
+		routes = mage2gen.Xmlnode('routes', nodes=[
+			mage2gen.Xmlnode('route', attributes={'url': '/V1/test', 'method': 'GET'}, match_attributes={'url', 'method'}),
+		])
+		routes.add_nodes([
+			mage2gen.Xmlnode('route', attributes={'url': '/V1/test', 'method': 'POST'}, match_attributes={'url', 'method'}),
+			mage2gen.Xmlnode('route', attributes={'url': '/V1/test', 'method': 'GET'}, match_attributes={'url', 'method'}),
+		])
+
+		self.assertEqual([n.attributes['method'] for n in routes.nodes], ['GET', 'POST'])
+
+	def test_merge_after_direct_append(self):
+		config = mage2gen.Xmlnode('config')
+		config.add_nodes([mage2gen.Xmlnode('type', attributes={'name': 'A'})])
+		config.nodes.append(mage2gen.Xmlnode('type', attributes={'name': 'B'}))
+		config.add_nodes([mage2gen.Xmlnode('type', attributes={'name': 'B'}), mage2gen.Xmlnode('type', attributes={'name': 'C'})])
+
+		self.assertEqual([n.attributes['name'] for n in config.nodes], ['A', 'B', 'C'])
+
+	def test_merge_large_node(self):
+		def merge(count):
+			config = mage2gen.Xmlnode('config')
+			for index in range(count):
+				config.add_nodes([
+					mage2gen.Xmlnode('type', attributes={'name': str(index % (count // 2))}, nodes=[
+						mage2gen.Xmlnode('plugin', attributes={'name': 'plugin{}'.format(index)}),
+					]),
+					mage2gen.Xmlnode('arguments'),
+				])
+			return [(n.node_name, n.attributes.get('name'), len(n.nodes)) for n in config.nodes]
+
+		for count in (8, 40):
+			self.assertEqual(merge(count), [('type', '0', 2), ('arguments', None, 0)] + [
+				('type', str(index), 2) for index in range(1, count // 2)
+			])
+
+	def test_compact_nodes(self):
+		first = mage2gen.Xmlnode('item', attributes={'{}:{}'.format('xsi', 'type'): ''.join(['str', 'ing'])})
+		second = mage2gen.Xmlnode('item', attributes={'xsi:type': 'string'})
+
+		self.assertFalse(hasattr(first, '__dict__'))
+		self.assertIs(first.match_attributes, second.match_attributes)
+		self.assertIs(list(first.attributes)[0], list(second.attributes)[0])
+		self.assertIs(first.attributes['xsi:type'], second.attributes['xsi:type'])
@@ -1,8 +1,12 @@
 import json
 import os
 import random
+import re
 import string
 import shutil
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from glob import glob
 
 from subprocess import Popen, PIPE
@@ -17,18 +21,38 @@ def tmp_path():
 	)
 
 
+def unregister_snippet(snippet):
+	"""Remove a snippet class defined in a test from the snippet list and registry"""
+	from mage2gen.snippet import MetaClass, snippet_registry
+	if snippet in MetaClass.snippets:
+		MetaClass.snippets.remove(snippet)
+	snippet_registry.unregister(snippet)
+
+
 class CodeSniffer:
 	class CodeStyleException(Exception):
 		def __init__(self, message):
 			self.message = message
 
+	# When set to a BatchSniffer, generate_and_test only adds the module to it
+	batch = None
+
 	@staticmethod
 	def cleanup():
 		for path in glob(os.path.join(BASE_PATH, 'tmp_*')):
 			shutil.rmtree(path)
 
 	@staticmethod
-	def generate_and_test(module, *args):
+	def generate_and_test(module, *args, test=None):
+		"""
+		Generate module and check the code style of its files, args are extra
+		phpcs arguments. In batch mode the module is only added to the batch,
+		named after the id of test.
+		"""
+		if CodeSniffer.batch is not None:
+			CodeSniffer.batch.add(test.id() if test is not None else 'module', module, *args)
+			return True
+
 		path = os.path.join(BASE_PATH, tmp_path())
 
 		os.mkdir(path)
@@ -42,6 +66,17 @@ class CodeSniffer:
 	def __init__(self, path):
 		self.path = path
 
+	@staticmethod
+	def engine():
+		"""
+		phpcs or python, from the MAGE2GEN_PHPCS environment variable. The default
+		auto uses phpcs when php and phpcs.phar are available and Psr2Check otherwise.
+		"""
+		engine = os.environ.get('MAGE2GEN_PHPCS', 'auto')
+		if engine == 'auto':
+			return 'phpcs' if shutil.which('php') and os.path.isfile(PHPCS_PATH) else 'python'
+		return engine
+
 	@staticmethod
 	def execute(*args):
 		command = ['php', PHPCS_PATH]
@@ -52,25 +87,247 @@ class CodeSniffer:
 		return process.communicate()
 
 	@staticmethod
-	def test(*args):
+	def sniff(*args):
+		"""The phpcs JSON report of the paths in args"""
+		if CodeSniffer.engine() == 'python':
+			return Psr2Check().check(*[arg for arg in args if not arg.startswith('-')])
+
 		json_encoded, errors = CodeSniffer.execute('--report=json', '--standard=PSR2', *args)
+		return json.loads(json_encoded.decode())
+
+	@staticmethod
+	def file_errors(output):
+		"""Dict of file name to the error messages of a report"""
+		file_errors = OrderedDict()
+		for file_name, file in output.get('files', {}).items():
+			messages = [message for message in file.get('messages', []) if message['type'] == 'ERROR']
+			if messages:
+				file_errors[file_name] = messages
+		return file_errors
+
+	@staticmethod
+	def format_errors(file_errors):
+		exception_message = "\n"
+		for file_name, messages in file_errors.items():
+			exception_message += "FILE: {}\n".format(file_name)
+			for message in messages:
+				exception_message += "{message[line]: <5} {message[message]}\n".format(message=message)
+			exception_message += "\n"
+		return exception_message
 
-		# Parse JSON
-		output = json.loads(json_encoded.decode())
+	@staticmethod
+	def test(*args):
+		output = CodeSniffer.sniff(*args)
 		total_errors = output.get('totals', {}).get('errors', 0)
 		if total_errors:
-			exception_message = "\n"
-			for file_name, file in output.get('files', {}).items():
-				
-				file_errors = ""
-				for message in file.get('messages', []):
-					if message['type'] == 'ERROR':
-						file_errors += "{message[line]: <5} {message[message]}\n".format(message=message)
-				
-				if file_errors:
-					exception_message += "FILE: {}\n".format(file_name)
-					exception_message += file_errors
-					exception_message += "\n"
-			raise CodeSniffer.CodeStyleException(exception_message)
+			raise CodeSniffer.CodeStyleException(CodeSniffer.format_errors(CodeSniffer.file_errors(output)))
 
 		return True
+
+
+class BatchSniffer:
+	"""
+	Generate many modules into one tree and test them with a single phpcs
+	run, or one run per process of a pool. Errors are mapped back to the name
+	a module was added with, the id of the test that generated it.
+	"""
+
+	def __init__(self, processes=1):
+		self.processes = max(1, processes)
+		self.path = tempfile.mkdtemp(prefix='phpcs_batch_')
+		self.entries = OrderedDict()
+
+	def add(self, name, module, *args):
+		directory = '{:04d}_{}'.format(len(self.entries), re.sub(r'\W+', '_', name))
+		path = os.path.join(self.path, directory)
+		os.mkdir(path)
+		module.generate_module(path)
+		self.entries[directory] = (name, args)
+		return path
+
+	def chunks(self):
+		"""(args, paths) per phpcs run, modules added with other phpcs args are run separately"""
+		groups = OrderedDict()
+		for directory, (name, args) in self.entries.items():
+			groups.setdefault(args, []).append(os.path.join(self.path, directory))
+
+		chunks = []
+		for args, paths in groups.items():
+			size = -(-len(paths) // self.processes)
+			chunks += [(args, paths[index:index + size]) for index in range(0, len(paths), size)]
+		return chunks
+
+	def run(self):
+		"""Dict of name to a dict of module file to error messages, for the modules with errors"""
+		with ThreadPoolExecutor(max_workers=self.processes) as executor:
+			outputs = list(executor.map(lambda chunk: CodeSniffer.sniff(*(chunk[0] + tuple(chunk[1]))), self.chunks()))
+
+		root = os.path.realpath(self.path)
+		errors = OrderedDict()
+		for output in outputs:
+			for file_name, messages in CodeSniffer.file_errors(output).items():
+				directory, _, module_file = os.path.relpath(os.path.realpath(file_name), root).partition(os.sep)
+				name = self.entries[directory][0]
+				errors.setdefault(name, OrderedDict())[module_file] = messages
+		return errors
+
+	def cleanup(self):
+		shutil.rmtree(self.path, ignore_errors=True)
+
+
+class Psr2Check:
+	"""
+	Pure Python check for the most common PSR-2 errors in PHP files, gives a
+	report like phpcs --report=json. It is a fast pre-check and is used when
+	php is not installed, phpcs finds more.
+	"""
+	EXTENSIONS = ('.php', '.inc')
+
+	CONSTANT = re.compile(r'(?<![\w$\\>:])(true|false|null)(?![\w\\])', re.I)
+	KEYWORD = re.compile(
+		r'(?<![\w$\\>:])(abstract|array|as|catch|class|else|elseif|extends|final|foreach|function|if|implements|'
+		r'interface|namespace|new|private|protected|public|return|static|throw|trait|try|use)(?![\w\\])', re.I
+	)
+	CONTROL_SIGNATURE = re.compile(r'(?<![\w$>:])(if|elseif|foreach|for|while|switch|catch)\(')
+	CLOSE_BRACE = re.compile(r'\}(else|elseif|catch|finally)\b')
+	CLASS_BRACE = re.compile(r'^\s*((abstract|final)\s+)?(class|interface|trait)\s+\w+.*\{\s*$')
+	FUNCTION_BRACE = re.compile(
+		r'^\s*((abstract|final|public|protected|private|static)\s+)*function\s+&?\w+\s*\(.*\)\s*(:\s*\??[\w\\]+\s*)?\{\s*$'
+	)
+	NAMESPACE = re.compile(r'^namespace\s+[\w\\]+\s*;')
+	USE = re.compile(r'^use\s+[\w\\]+(\s+as\s+\w+)?\s*;')
+
+	def check(self, *paths):
+		files = OrderedDict()
+		errors = 0
+		for file_name in self.php_files(paths):
+			messages = self.check_file(file_name)
+			files[file_name] = {'errors': len(messages), 'warnings': 0, 'messages': messages}
+			errors += len(messages)
+		return {'totals': {'errors': errors, 'warnings': 0, 'fixable': 0}, 'files': files}
+
+	def php_files(self, paths):
+		for path in paths:
+			if os.path.isfile(path):
+				yield path
+				continue
+			for root, directories, file_names in os.walk(path):
+				directories.sort()
+				for file_name in sorted(file_names):
+					if file_name.endswith(self.EXTENSIONS):
+						yield os.path.join(root, file_name)
+
+	def check_file(self, file_name):
+		with open(file_name, 'rb') as php_file:
+			source = php_file.read().decode('utf-8', 'replace')
+		return self.check_source(source)
+
+	def check_source(self, source):
+		messages = []
+
+		def error(line, column, message, source):
+			messages.append({
+				'message': message, 'source': source, 'severity': 5,
+				'fixable': True, 'type': 'ERROR', 'line': line, 'column': column,
+			})
+
+		if source.startswith('\ufeff'):
+			error(1, 1, 'File contains UTF-8 byte order mark, which may corrupt your application', 'Generic.Files.ByteOrderMark.Found')
+			source = source[1:]
+		if '\r' in source:
+			error(1, 1, 'End of line character is invalid; expected "\\n" but found "\\r\\n"', 'Generic.Files.LineEndings.InvalidEOLChar')
+			source = source.replace('\r\n', '\n').replace('\r', '\n')
+
+		lines = source.split('\n')
+		code_lines = self.code(source).split('\n')
+		last_use = None
+		for index, (line, code) in enumerate(zip(lines, code_lines)):
+			number = index + 1
+			indent = line[:len(line) - len(line.lstrip(' \t'))]
+			if '\t' in indent:
+				error(number, 1, 'Spaces must be used to indent lines; tabs are not allowed', 'Generic.WhiteSpace.DisallowTabIndent.TabsUsed')
+			if line != line.rstrip(' \t'):
+				error(number, len(line.rstrip(' \t')) + 1, 'Whitespace found at end of line', 'Squiz.WhiteSpace.SuperfluousWhitespace.EndLine')
+
+			for match in self.CONSTANT.finditer(code):
+				if match.group(1) != match.group(1).lower():
+					error(number, match.start(1) + 1, 'TRUE, FALSE and NULL must be lowercase; expected "{}" but found "{}"'.format(
+						match.group(1).lower(), match.group(1)), 'Generic.PHP.LowerCaseConstant.Found')
+			for match in self.KEYWORD.finditer(code):
+				if match.group(1) != match.group(1).lower():
+					error(number, match.start(1) + 1, 'PHP keywords must be lowercase; expected "{}" but found "{}"'.format(
+						match.group(1).lower(), match.group(1)), 'Generic.PHP.LowerCaseKeyword.Found')
+			for match in self.CONTROL_SIGNATURE.finditer(code):
+				error(number, match.start(1) + 1, 'Expected 1 space after {} keyword; 0 found'.format(match.group(1).upper()),
+					'Squiz.ControlStructures.ControlSignature.SpaceAfterKeyword')
+			for match in self.CLOSE_BRACE.finditer(code):
+				error(number, match.start() + 1, 'Expected 1 space after closing brace; 0 found',
+					'Squiz.ControlStructures.ControlSignature.SpaceAfterCloseBrace')
+
+			match = self.CLASS_BRACE.match(code)
+			if match:
+				error(number, len(code.rstrip()), 'Opening brace of a {} must be on the line after the definition'.format(match.group(3)),
+					'PSR2.Classes.ClassDeclaration.OpenBraceNewLine')
+			elif self.FUNCTION_BRACE.match(code):
+				error(number, len(code.rstrip()), 'Opening brace should be on a new line', 'Squiz.Functions.MultiLineFunctionDeclaration.BraceOnSameLine')
+
+			next_line = lines[index + 1] if index + 1 < len(lines) else ''
+			if self.NAMESPACE.match(code) and next_line.strip():
+				error(number, 1, 'There must be one blank line after the namespace declaration', 'PSR2.Namespaces.NamespaceDeclaration.BlankLineAfter')
+			if self.USE.match(code):
+				last_use = number
+		if last_use is not None and last_use < len(lines) and lines[last_use].strip():
+			error(last_use, 1, 'There must be one blank line after the last USE statement; 0 found;', 'PSR2.Namespaces.UseDeclaration.SpaceAfterLastUse')
+
+		if source.rstrip().endswith('?>'):
+			error(len(source.rstrip().split('\n')), 1, 'A closing tag is not permitted at the end of a PHP file', 'PSR2.Files.ClosingTag.NotAllowed')
+		newlines = len(source) - len(source.rstrip('\n'))
+		if source and newlines != 1:
+			error(len(lines) - newlines + (1 if newlines else 0), 1, 'Expected 1 newline at end of file; {} found'.format(newlines),
+				'PSR2.Files.EndFileNewline.{}'.format('TooMany' if newlines else 'NoneFound'))
+		return sorted(messages, key=lambda message: (message['line'], message['column']))
+
+	@staticmethod
+	def code(source):
+		"""The source with the content of strings and comments blanked out, lines stay on their numbers"""
+		blank = lambda text: ''.join('\n' if char == '\n' else ' ' for char in text)
+		output = []
+		state = None
+		index = 0
+		while index < len(source):
+			char = source[index]
+			if state is None:
+				if char in '\'"':
+					state = char
+					output.append(char)
+				elif char == '#' or source.startswith('//', index):
+					state = '//'
+					output.append(' ')
+				elif source.startswith('/*', index):
+					state = '/*'
+					output.append('  ')
+					index += 1
+				else:
+					output.append(char)
+			elif state == '//':
+				if char == '\n':
+					state = None
+				output.append(blank(char))
+			elif state == '/*':
+				if source.startswith('*/', index):
+					state = None
+					output.append('  ')
+					index += 1
+				else:
+					output.append(blank(char))
+			elif char == '\\':
+				output.append(blank(source[index:index + 2]))
+				index += 1
+			else:
+				if char == state:
+					state = None
+					output.append(char)
+				else:
+					output.append(blank(char))
+			index += 1
+		return ''.join(output)